@@ -1,39 +1,83 @@
-from flask import Flask, render_template, request
-from alfabeto import validar_expresion_regular, procesar_alfabeto
-from expresion_regular import a_postfijo
-from thompson import construir_afn_postfijo
-from afd import convertir_afn_a_afd, dibujar_afd
+import json
+import logging
+import os
+import tracemalloc
+from flask import Flask, render_template, request, jsonify, url_for, Response, stream_with_context
+from alfabeto import procesar_alfabeto
+from expresion_regular import ErrorExpresion, a_postfijo, dividir_palabra
+from glushkov import construir_afn_glushkov, construir_afd_posiciones
+from thompson import construir_afn_compacto_postfijo
+from itertools import islice
+from afn import AFNCompacto, lineas_transiciones_afn
+from afd import convertir_afn_a_afd, compilar_afd, AFDCompilado
+from minimizacion import minimizar_afd
+from multipatron import construir_clasificador, estimar_bytes_clasificador
+from compilador import CONSTRUCCIONES, construir_afn_thompson, tabla_subexpresiones
+from clases import agrupar_postfijo
+from afd_perezoso import AFDPerezoso
+from derivadas import AFDDerivadas, construir_afd_derivadas
+from cache_automatas import AutomataCompilado, CacheAutomatas, clave_automata, id_automata
+from renderizado import RenderizadorAFD, hash_afd
+from diagramas import afd_a_dot, afd_a_svg
+from metricas import Metricas, Perfil, es_explosion
+from vectorizado import evaluar_muchos
+from busqueda import Buscador
 
 app = Flask(__name__)
+LINEAS_POR_PAGINA_AFN = 500
+MAX_PALABRAS_API = 100000
+MAX_COINCIDENCIAS_API = 100000
+MAX_ESTADOS_SVG = 300  # Más estados que esto no se leen en un diagrama en línea
+SIN_AFN = "Con derivadas de Brzozowski no se construye un AFN: se deriva la expresión directamente"
+logger = logging.getLogger(__name__)
+cache_automatas = CacheAutomatas()
+cache_clasificadores = CacheAutomatas(max_entradas=32, medir=estimar_bytes_clasificador)
+metricas = Metricas()
+renderizador = RenderizadorAFD(metricas=metricas)
 
-def mostrar_transiciones_afn(afn):
-    """Genera un resumen de las transiciones del AFN."""
-    transiciones = []
-    visitados = set()
+metricas.describir("etapa_segundos", "Tiempo de cada etapa del pipeline")
+metricas.describir("etapa_memoria_pico_bytes", "Memoria pico de cada etapa (con tracemalloc activo)")
+metricas.describir("estados_afn", "Estados de los AFNs construidos")
+metricas.describir("estados_afd", "Estados de los AFDs construidos")
+metricas.describir("estados_afd_minimo", "Estados de los AFDs minimizados")
+metricas.describir("transiciones_afd", "Transiciones de los AFDs construidos")
+metricas.describir("explosiones", "Expresiones cuyo AFD tiene muchos más estados que el AFN")
+
+def metricas_cache():
+    """Valores del caché de autómatas para /metrics."""
+    estadisticas = cache_automatas.estadisticas()
+    return [
+        ("cache_entradas", "gauge", estadisticas["entradas"]),
+        ("cache_bytes", "gauge", estadisticas["bytes"]),
+        ("cache_aciertos", "counter", estadisticas["aciertos"]),
+        ("cache_fallos", "counter", estadisticas["fallos"]),
+        ("cache_desalojos", "counter", estadisticas["desalojos"]),
+        ("subexpresiones", "gauge", len(tabla_subexpresiones)),
+        ("subexpresiones_reutilizadas", "counter", tabla_subexpresiones.reutilizados),
+    ]
 
-    def recorrer(estado):
-        if estado in visitados:
-            return
-        visitados.add(estado)
+metricas.agregar_fuente(metricas_cache)
 
-        # Transiciones normales
-        for simbolo, destinos in sorted(estado.transiciones.items()):
-            for destino in destinos:
-                transiciones.append(f"{estado} --{simbolo}--> {destino}")
+# Con AUTOMATAS_TRACEMALLOC=1 también se mide la memoria pico de cada etapa,
+# a costa de hacer más lento todo el proceso
+if os.environ.get("AUTOMATAS_TRACEMALLOC") == "1":
+    tracemalloc.start()
 
-        # Transiciones epsilon
-        for destino in sorted(estado.epsilon, key=lambda x: x.nombre if x.nombre else str(id(x))):
-            transiciones.append(f"{estado} --ε--> {destino}")
+def volcar_perfil(perfil, expresion):
+    """Escribe el perfil de una petición en el log y lo retorna como texto JSON."""
+    texto = json.dumps(perfil.como_dict(), ensure_ascii=False)
+    logger.info("Perfil de %r: %s", expresion, texto)
+    return texto
 
-        # Recorrer destinos
-        for destinos in estado.transiciones.values():
-            for destino in destinos:
-                recorrer(destino)
-        for destino in estado.epsilon:
-            recorrer(destino)
+def mostrar_transiciones_afn(afn, desde=0, cantidad=None):
+    """Genera un resumen de las transiciones del AFN, opcionalmente sólo una página."""
+    hasta = None if cantidad is None else desde + cantidad
+    return "\n".join(islice(lineas_transiciones_afn(afn), desde, hasta))
 
-    recorrer(afn.inicio)
-    return "\n".join(sorted(transiciones))
+def pagina_transiciones_afn(afn):
+    """Retorna la primera página del listado del AFN y si el listado cabe completo en ella."""
+    lineas = list(islice(lineas_transiciones_afn(afn), LINEAS_POR_PAGINA_AFN + 1))
+    return "\n".join(lineas[:LINEAS_POR_PAGINA_AFN]), len(lineas) <= LINEAS_POR_PAGINA_AFN
 
 def mostrar_transiciones_afd(afd):
     """Genera un resumen de las transiciones del AFD."""
@@ -55,27 +99,32 @@ def mostrar_transiciones_afd(afd):
 
 def procesar_palabra(afd, palabra, alfabeto):
     """Simula el procesamiento de una palabra en el AFD."""
-    estado_actual = afd.estado_inicial
-
-    if not estado_actual:
+    if afd.estado_inicial is None:
         return "Error: El AFD no tiene un estado inicial."
 
-    # Verificar si la palabra contiene caracteres fuera del alfabeto
-    for simbolo in palabra:
-        if simbolo not in alfabeto:
-            return f"Palabra no aceptada: El carácter '{simbolo}' no está en el alfabeto {list(alfabeto)}"
+    # La simulación se hace sobre la tabla compilada (o el AFD perezoso) en
+    # lugar de los frozensets
+    if not isinstance(afd, (AFDCompilado, AFDPerezoso, AFDDerivadas)):
+        afd = compilar_afd(afd)
+    estado_actual = afd.estado_inicial
+
+    # Dividir la palabra en símbolos del alfabeto (que pueden tener varios caracteres)
+    try:
+        simbolos = dividir_palabra(palabra, alfabeto)
+    except ErrorExpresion as e:
+        return f"Palabra no aceptada: El carácter '{palabra[e.posicion]}' no está en el alfabeto {list(alfabeto)}"
 
     # Procesar cada símbolo de la palabra
     recorrido = [f"Estado inicial: {afd.obtener_nombre_estado(estado_actual)}"]
     
-    for i, simbolo in enumerate(palabra):
-        key = (estado_actual, simbolo)
+    for simbolo in simbolos:
+        siguiente_estado = afd.siguiente(estado_actual, simbolo)
         
-        if key not in afd.transiciones:
+        if siguiente_estado is None:
             recorrido.append(f"No hay transición válida para el símbolo '{simbolo}' desde el estado {afd.obtener_nombre_estado(estado_actual)}")
             return "Palabra no aceptada\n" + "\n".join(recorrido)
             
-        estado_actual = afd.transiciones[key]
+        estado_actual = siguiente_estado
         recorrido.append(f"Símbolo '{simbolo}' -> {afd.obtener_nombre_estado(estado_actual)}")
         
         if estado_actual == afd.estado_trampa:
@@ -83,13 +132,470 @@ def procesar_palabra(afd, palabra, alfabeto):
             return "Palabra no aceptada\n" + "\n".join(recorrido)
 
     # Verificar si el estado final es de aceptación
-    if estado_actual in afd.estados_finales:
+    if afd.es_final(estado_actual):
         recorrido.append(f"Estado final {afd.obtener_nombre_estado(estado_actual)} es de aceptación")
         return "Palabra aceptada\n" + "\n".join(recorrido)
     else:
         recorrido.append(f"Estado final {afd.obtener_nombre_estado(estado_actual)} no es de aceptación")
         return "Palabra no aceptada\n" + "\n".join(recorrido)
 
+def construir_automata(alfabeto, expresion, minimizar=False, motor="afd", construccion="thompson", perfil=None):
+    """Ejecuta el pipeline completo; lanza ErrorExpresion si la expresión no es válida."""
+    if perfil is None:
+        perfil = Perfil(metricas)
+
+    # Validar y analizar la expresión en una sola pasada, y construir el AFN
+    with perfil.etapa("analizar_expresion"):
+        postfijo = a_postfijo(expresion, alfabeto)
+    # Los autómatas van sobre las clases de símbolos que la expresión distingue
+    with perfil.etapa("agrupar_simbolos"):
+        postfijo, clases = agrupar_postfijo(postfijo, alfabeto)
+    perfil.registrar_tamano("clases_simbolos", len(clases))
+
+    # Con derivadas no hace falta un AFN: se deriva la expresión directamente
+    afn = None
+    estados_afn = None
+    transiciones_afn, listado_afn_completo = SIN_AFN, True
+    if motor != "derivadas" and not (motor == "afd" and construccion == "derivadas"):
+        with perfil.etapa("construir_afn"):
+            if construccion in ("glushkov", "posiciones"):
+                # Con la construcción por posiciones se muestra el AFN de Glushkov, sin transiciones ε
+                afn = construir_afn_glushkov(postfijo, set(clases))
+            else:
+                # Este AFN siempre pasa por la construcción por subconjuntos
+                afn = construir_afn_thompson(postfijo, set(clases), con_cerraduras=True)
+        estados_afn = afn.num_estados if isinstance(afn, AFNCompacto) else len(afn.obtener_todos_estados())
+        perfil.registrar_tamano("estados_afn", estados_afn)
+
+        # Para AFNs grandes sólo se guarda la primera página del listado
+        with perfil.etapa("listado_afn"):
+            transiciones_afn, listado_afn_completo = pagina_transiciones_afn(afn)
+
+    # Con los motores perezosos no se construye el AFD completo
+    if motor == "derivadas":
+        with perfil.etapa("normalizar_expresion"):
+            motor_derivadas = AFDDerivadas(postfijo, set(clases), clases=clases)
+        return AutomataCompilado(postfijo, None, None, motor_derivadas,
+                                 transiciones_afn, None, alfabeto=alfabeto)
+    if motor == "perezoso":
+        motor_perezoso = AFDPerezoso(afn, clases=clases)
+        if isinstance(afn, AFNCompacto):
+            afn.cerraduras = None  # Ya están en el motor; el AFN guardado sólo se lista
+        return AutomataCompilado(postfijo, afn, None, motor_perezoso,
+                                 transiciones_afn, None,
+                                 listado_afn_completo=listado_afn_completo, alfabeto=alfabeto)
+
+    # Convertir a AFD; por posiciones o por derivadas se construye directamente desde la expresión
+    if construccion == "posiciones":
+        with perfil.etapa("construir_afd_posiciones"):
+            afd = construir_afd_posiciones(postfijo, set(clases))
+    elif construccion == "derivadas":
+        with perfil.etapa("construir_afd_derivadas"):
+            afd = construir_afd_derivadas(postfijo, set(clases))
+    else:
+        with perfil.etapa("convertir_afn_a_afd"):
+            afd = convertir_afn_a_afd(afn)
+        if isinstance(afn, AFNCompacto):
+            afn.cerraduras = None  # Ya no hacen falta y el AFN queda en el caché
+    afd.clases = clases
+    perfil.registrar_tamano("estados_afd", len(afd.estados))
+    perfil.registrar_tamano("transiciones_afd", len(afd.transiciones))
+    if estados_afn is not None and es_explosion(estados_afn, len(afd.estados)):
+        metricas.incrementar("explosiones")
+        logger.warning("Explosión de estados con la expresión %r sobre %s: AFN %d estados, AFD %d estados",
+                       expresion, sorted(alfabeto), estados_afn, len(afd.estados))
+
+    if minimizar:
+        with perfil.etapa("minimizar_afd"):
+            afd = minimizar_afd(afd)
+        perfil.registrar_tamano("estados_afd_minimo", len(afd.estados))
+    with perfil.etapa("compilar_afd"):
+        afd_compilado = compilar_afd(afd)
+    with perfil.etapa("listado_afd"):
+        transiciones_afd = mostrar_transiciones_afd(afd)
+
+    # La imagen se identifica por el contenido del AFD; se dibuja en segundo plano
+    return AutomataCompilado(postfijo, afn, afd, afd_compilado,
+                             transiciones_afn,
+                             transiciones_afd,
+                             hash_afd(afd_compilado),
+                             listado_afn_completo=listado_afn_completo, alfabeto=alfabeto)
+
+def normalizar_opciones(minimizar, motor, construccion):
+    """Valida las opciones de construcción, usando los valores por defecto si no son válidas."""
+    if motor not in ("afd", "perezoso", "derivadas"):
+        motor = "afd"
+    if construccion not in CONSTRUCCIONES:
+        construccion = "thompson"
+    return bool(minimizar), motor, construccion
+
+def obtener_automata(alfabeto, expresion, minimizar=False, motor="afd", construccion="thompson", perfil=None):
+    """Retorna el id y el autómata, tomándolo del caché o construyéndolo; lanza ErrorExpresion."""
+    # Si el autómata no cabe en el caché el id es None: no serviría para pedirlo después
+    identificador = id_automata(clave_automata(alfabeto, expresion, minimizar, motor, construccion))
+    automata = cache_automatas.obtener(identificador)
+    if automata is None:
+        automata = construir_automata(alfabeto, expresion, minimizar, motor, construccion, perfil)
+        if not cache_automatas.guardar(identificador, automata):
+            identificador = None
+    return identificador, automata
+
+def actualizar_perezoso(identificador, automata):
+    """Vuelve a medir en el caché un motor perezoso que creció; retorna el id, o None si ya no está."""
+    if identificador is None or automata.afd is not None:
+        return identificador
+    return identificador if cache_automatas.actualizar(identificador) else None
+
+def leer_alfabeto(valor):
+    """Acepta el alfabeto como texto separado por comas o como lista de símbolos."""
+    if isinstance(valor, list):
+        return {simbolo.strip() for simbolo in valor if isinstance(simbolo, str) and simbolo.strip()}
+    return procesar_alfabeto(str(valor))
+
+def recorrer_palabra(afd, simbolos):
+    """Retorna los nombres de los estados visitados por la palabra y si es aceptada."""
+    estado = afd.estado_inicial
+    recorrido = [afd.obtener_nombre_estado(estado)]
+    for simbolo in simbolos:
+        estado = afd.siguiente(estado, simbolo)
+        recorrido.append(afd.obtener_nombre_estado(estado))
+        if estado == afd.estado_trampa:
+            break
+    return recorrido, afd.es_final(estado)
+
+def evaluar_palabras(automata, palabras, con_recorrido=False):
+    """Evalúa las palabras en el autómata y retorna un diccionario de resultados por palabra."""
+    afd = automata.afd_compilado
+    resultados = []
+    pendientes = []  # (posición en resultados, símbolos) de las palabras a evaluar juntas
+
+    for palabra in palabras:
+        resultado = {"palabra": palabra}
+        try:
+            simbolos = dividir_palabra(palabra, automata.alfabeto)
+        except ErrorExpresion as e:
+            resultado["aceptada"] = False
+            resultado["error"] = f"El carácter '{palabra[e.posicion]}' no está en el alfabeto"
+        else:
+            if con_recorrido:
+                resultado["recorrido"], resultado["aceptada"] = recorrer_palabra(afd, simbolos)
+            else:
+                pendientes.append((len(resultados), simbolos))
+        resultados.append(resultado)
+
+    # Sin recorrido, las palabras se evalúan de una vez; con NumPy, todas a la
+    # par sobre la tabla del AFD (el perezoso crece con ellas, así que va por su cuenta)
+    lote = [simbolos for _, simbolos in pendientes]
+    aceptadas = evaluar_muchos(afd, lote) if isinstance(afd, AFDCompilado) else afd.match_many(lote)
+    for (i, _), aceptada in zip(pendientes, aceptadas):
+        resultados[i]["aceptada"] = aceptada
+    return resultados
+
+def estadisticas_automata(automata):
+    """Resume el tamaño del AFN y del AFD de un autómata."""
+    afn = automata.afn
+    afd = automata.afd_compilado
+    estadisticas = {
+        "simbolos": len(automata.alfabeto),
+        "clases_simbolos": len(afd.alfabeto),
+        "estados_afn": None if afn is None else
+                       afn.num_estados if isinstance(afn, AFNCompacto) else len(afn.obtener_todos_estados()),
+        "estados_afd": afd.num_estados,
+        "perezoso": automata.afd is None,
+    }
+    if automata.afd is not None:
+        estadisticas["estados_finales"] = len(afd.estados_finales)
+    return estadisticas
+
+def no_modificado(etag):
+    """Respuesta 304 para un listado que el cliente ya tiene."""
+    respuesta = Response(status=304)
+    respuesta.set_etag(etag)
+    return respuesta
+
+def svg_automata(automata):
+    """Retorna el SVG del AFD, generándolo la primera vez, o None si es demasiado grande."""
+    if automata.svg is None and len(automata.afd.estados) <= MAX_ESTADOS_SVG:
+        with Perfil(metricas).etapa("afd_a_svg"):
+            automata.svg = afd_a_svg(automata.afd)
+    return automata.svg
+
+def url_imagen(clave):
+    """URL pública de la imagen de un AFD."""
+    ruta = os.path.relpath(renderizador.ruta(clave), "static").replace(os.sep, "/")
+    return url_for("static", filename=ruta)
+
+@app.route("/afd/<clave>/estado")
+def estado_imagen(clave):
+    """Permite a la página consultar si la imagen del AFD ya está lista."""
+    estado = renderizador.estado(clave)
+    respuesta = {"estado": estado}
+    if estado == "listo":
+        respuesta["url"] = url_imagen(clave)
+    elif estado == "error":
+        respuesta["error"] = renderizador.errores.get(clave, "")
+    return jsonify(respuesta)
+
+@app.route("/afn/transiciones")
+def transiciones_afn():
+    """Envía el listado del AFN como texto, completo o por páginas, sin armarlo en memoria."""
+    alfabeto = procesar_alfabeto(request.args.get("alfabeto", ""))
+    expresion = request.args.get("expresion", "").strip()
+    desde = request.args.get("desde", 0, type=int)
+    cantidad = request.args.get("cantidad", None, type=int)
+
+    # El listado depende sólo de la expresión y el alfabeto: si el cliente ya
+    # tiene esta página no hace falta construir nada
+    identificador = id_automata(clave_automata(alfabeto, expresion, False, "afd", "thompson"))
+    etag = f"{identificador}-afn-{desde}-{cantidad}"
+    if request.if_none_match.contains(etag):
+        return no_modificado(etag)
+
+    # El AFN no depende de las opciones del AFD; se reutiliza si está en el caché
+    automata = cache_automatas.obtener(identificador)
+    if automata is not None and automata.afn is not None:
+        afn = automata.afn
+    else:
+        try:
+            postfijo, clases = agrupar_postfijo(a_postfijo(expresion, alfabeto), alfabeto)
+            # Para listarlo no hacen falta las cerraduras ni las subexpresiones compartidas
+            afn = construir_afn_compacto_postfijo(postfijo, set(clases))
+        except ErrorExpresion as e:
+            return Response(f"Expresión regular no válida: {e}\n", status=400, mimetype="text/plain")
+
+    hasta = None if cantidad is None else desde + cantidad
+    lineas = islice(lineas_transiciones_afn(afn), desde, hasta)
+    respuesta = Response(stream_with_context(linea + "\n" for linea in lineas),
+                         mimetype="text/plain")
+    respuesta.set_etag(etag)
+    return respuesta
+
+@app.route("/metrics")
+def exportar_metricas():
+    """Métricas del servidor en el formato de texto de Prometheus."""
+    return Response(metricas.exportar(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/api/automatas/<identificador>/diagrama.<formato>")
+def api_diagrama(identificador, formato):
+    """Envía el diagrama del AFD como DOT de Graphviz o como SVG, con ETag."""
+    tipos = {"dot": "text/vnd.graphviz", "svg": "image/svg+xml"}
+    if formato not in tipos:
+        return jsonify({"error": "El formato debe ser 'dot' o 'svg'"}), 404
+
+    etag = f"{identificador}-{formato}"
+    if request.if_none_match.contains(etag):
+        return no_modificado(etag)
+
+    automata = cache_automatas.obtener(identificador)
+    if automata is None:
+        return jsonify({"error": "Autómata desconocido; vuelva a compilarlo con /api/evaluar"}), 404
+    if automata.afd is None:
+        return jsonify({"error": "Con el motor perezoso no hay un AFD completo que dibujar"}), 409
+
+    # El SVG se comparte con la página y tiene el mismo límite de estados: un
+    # AFD enorme no se dibuja en el hilo de la petición
+    if formato == "dot":
+        texto = afd_a_dot(automata.afd)
+    else:
+        texto = svg_automata(automata)
+        if texto is None:
+            return jsonify({"error": f"El AFD tiene más de {MAX_ESTADOS_SVG} estados; pida el diagrama en formato dot"}), 413
+    respuesta = Response(texto, mimetype=tipos[formato])
+    respuesta.set_etag(etag)
+    return respuesta
+
+@app.route("/api/evaluar", methods=["POST"])
+def api_evaluar():
+    """Evalúa una lista de palabras y responde en JSON; el autómata se compila sólo si hace falta."""
+    datos = request.get_json(silent=True)
+    if not isinstance(datos, dict):
+        return jsonify({"error": "Se esperaba un objeto JSON"}), 400
+
+    palabras = datos.get("palabras", [])
+    if not isinstance(palabras, list) or not all(isinstance(palabra, str) for palabra in palabras):
+        return jsonify({"error": "'palabras' debe ser una lista de cadenas"}), 400
+    if len(palabras) > MAX_PALABRAS_API:
+        return jsonify({"error": f"Se admiten a lo sumo {MAX_PALABRAS_API} palabras por petición"}), 413
+
+    perfil = Perfil(metricas)
+
+    # Con el id de una respuesta anterior no hace falta volver a enviar la expresión
+    identificador = datos.get("id")
+    automata = cache_automatas.obtener(identificador) if isinstance(identificador, str) else None
+    if automata is None:
+        if "alfabeto" not in datos or "expresion" not in datos:
+            return jsonify({"error": "Autómata desconocido; envíe el alfabeto y la expresión"}), 404
+        alfabeto = leer_alfabeto(datos["alfabeto"])
+        if not alfabeto:
+            return jsonify({"error": "El alfabeto no puede estar vacío"}), 400
+        opciones = normalizar_opciones(datos.get("minimizar", False), datos.get("motor", "afd"),
+                                       datos.get("construccion", "thompson"))
+        try:
+            identificador, automata = obtener_automata(alfabeto, str(datos["expresion"]).strip(), *opciones,
+                                                       perfil=perfil)
+        except ErrorExpresion as e:
+            return jsonify({"error": f"Expresión regular no válida: {e.mensaje}",
+                            "posicion": e.posicion}), 400
+
+    # Las estadísticas van después de evaluar: el AFD perezoso crece con las palabras
+    with perfil.etapa("evaluar_palabras"):
+        resultados = evaluar_palabras(automata, palabras, bool(datos.get("recorrido", False)))
+    identificador = actualizar_perezoso(identificador, automata)
+    respuesta = {
+        "id": identificador,
+        "estadisticas": estadisticas_automata(automata),
+        "resultados": resultados,
+    }
+    if datos.get("perfil"):
+        volcar_perfil(perfil, datos.get("expresion", identificador))
+        respuesta["perfil"] = perfil.como_dict()
+    return jsonify(respuesta)
+
+@app.route("/api/buscar", methods=["POST"])
+def api_buscar():
+    """Busca las coincidencias de una expresión dentro de un texto y responde sus intervalos."""
+    datos = request.get_json(silent=True)
+    if not isinstance(datos, dict):
+        return jsonify({"error": "Se esperaba un objeto JSON"}), 400
+    texto = datos.get("texto")
+    if not isinstance(texto, str):
+        return jsonify({"error": "'texto' debe ser una cadena"}), 400
+
+    # La búsqueda necesita la tabla completa, así que siempre se usa el motor AFD
+    identificador = datos.get("id")
+    automata = cache_automatas.obtener(identificador) if isinstance(identificador, str) else None
+    if automata is None or not isinstance(automata.afd_compilado, AFDCompilado):
+        if "alfabeto" not in datos or "expresion" not in datos:
+            return jsonify({"error": "Autómata desconocido; envíe el alfabeto y la expresión"}), 404
+        alfabeto = leer_alfabeto(datos["alfabeto"])
+        if not alfabeto:
+            return jsonify({"error": "El alfabeto no puede estar vacío"}), 400
+        minimizar, _, construccion = normalizar_opciones(datos.get("minimizar", False), "afd",
+                                                         datos.get("construccion", "thompson"))
+        try:
+            identificador, automata = obtener_automata(alfabeto, str(datos["expresion"]).strip(), minimizar,
+                                                       "afd", construccion)
+        except ErrorExpresion as e:
+            return jsonify({"error": f"Expresión regular no válida: {e.mensaje}",
+                            "posicion": e.posicion}), 400
+
+    if automata.buscador is None:
+        automata.buscador = Buscador(automata.afd_compilado)
+    coincidencias = []
+    truncado = False
+    for inicio, fin in automata.buscador.buscar(texto, bool(datos.get("solapadas", False))):
+        if len(coincidencias) >= MAX_COINCIDENCIAS_API:
+            truncado = True
+            break
+        coincidencias.append({"inicio": inicio, "fin": fin, "texto": texto[inicio:fin]})
+    return jsonify({
+        "id": identificador,
+        "literales": list(automata.buscador.literales),
+        "coincidencias": coincidencias,
+        "truncado": truncado,
+    })
+
+@app.route("/api/clasificar", methods=["POST"])
+def api_clasificar():
+    """Clasifica palabras contra varias expresiones compiladas en un solo AFD."""
+    datos = request.get_json(silent=True)
+    if not isinstance(datos, dict):
+        return jsonify({"error": "Se esperaba un objeto JSON"}), 400
+
+    palabras = datos.get("palabras", [])
+    if not isinstance(palabras, list) or not all(isinstance(palabra, str) for palabra in palabras):
+        return jsonify({"error": "'palabras' debe ser una lista de cadenas"}), 400
+    if len(palabras) > MAX_PALABRAS_API:
+        return jsonify({"error": f"Se admiten a lo sumo {MAX_PALABRAS_API} palabras por petición"}), 413
+
+    identificador = datos.get("id")
+    clasificador = cache_clasificadores.obtener(identificador) if isinstance(identificador, str) else None
+    if clasificador is None:
+        expresiones = datos.get("expresiones")
+        if "alfabeto" not in datos or expresiones is None:
+            return jsonify({"error": "Clasificador desconocido; envíe el alfabeto y las expresiones"}), 404
+        if not isinstance(expresiones, list) or not expresiones:
+            return jsonify({"error": "'expresiones' debe ser una lista no vacía de cadenas"}), 400
+        alfabeto = leer_alfabeto(datos["alfabeto"])
+        if not alfabeto:
+            return jsonify({"error": "El alfabeto no puede estar vacío"}), 400
+        expresiones = [str(expresion).strip() for expresion in expresiones]
+        minimizar = bool(datos.get("minimizar", False))
+
+        # El orden de las expresiones es su prioridad, así que forma parte del id
+        identificador = id_automata(("multipatron", tuple(sorted(alfabeto)), tuple(expresiones), minimizar))
+        clasificador = cache_clasificadores.obtener(identificador)
+        if clasificador is None:
+            perfil = Perfil(metricas)
+            try:
+                with perfil.etapa("construir_clasificador"):
+                    clasificador = construir_clasificador(expresiones, alfabeto, minimizar)
+            except ErrorExpresion as e:
+                return jsonify({"error": f"Expresión regular no válida: {e.mensaje}",
+                                "posicion": e.posicion}), 400
+            perfil.registrar_tamano("estados_afd", clasificador.afd.num_estados)
+            if not cache_clasificadores.guardar(identificador, clasificador):
+                identificador = None  # No cabe en el caché: el id no serviría para pedirlo después
+
+    primero = bool(datos.get("primero", False))
+    resultados = []
+    pendientes = []  # (posición en resultados, símbolos) de las palabras a clasificar juntas
+    for palabra in palabras:
+        resultado = {"palabra": palabra}
+        try:
+            pendientes.append((len(resultados), dividir_palabra(palabra, clasificador.alfabeto)))
+        except ErrorExpresion as e:
+            resultado["error"] = f"El carácter '{palabra[e.posicion]}' no está en el alfabeto"
+            resultado["patron" if primero else "patrones"] = None if primero else []
+        resultados.append(resultado)
+
+    clasificaciones = clasificador.clasificar_muchos([simbolos for _, simbolos in pendientes], primero)
+    for (i, _), clasificacion in zip(pendientes, clasificaciones):
+        if primero:
+            resultados[i]["patron"] = clasificacion
+        else:
+            resultados[i]["patrones"] = list(clasificacion)
+
+    return jsonify({
+        "id": identificador,
+        "patrones": clasificador.patrones,
+        "estados": clasificador.afd.num_estados,
+        "resultados": resultados,
+    })
+
+@app.route("/api/automatas/<identificador>/transiciones/<tipo>")
+def api_transiciones(identificador, tipo):
+    """Envía el listado de transiciones del AFN o del AFD de un autómata, con ETag."""
+    if tipo not in ("afn", "afd"):
+        return jsonify({"error": "El tipo debe ser 'afn' o 'afd'"}), 404
+    desde = request.args.get("desde", 0, type=int)
+    cantidad = request.args.get("cantidad", None, type=int)
+
+    # El id depende sólo del contenido, así que el ETag sigue valiendo aunque
+    # el autómata ya no esté en el caché
+    etag = f"{identificador}-{tipo}-{desde}-{cantidad}"
+    if request.if_none_match.contains(etag):
+        return no_modificado(etag)
+
+    automata = cache_automatas.obtener(identificador)
+    if automata is None:
+        return jsonify({"error": "Autómata desconocido; vuelva a compilarlo con /api/evaluar"}), 404
+
+    hasta = None if cantidad is None else desde + cantidad
+    if tipo == "afn":
+        if automata.afn is None:
+            return jsonify({"error": "Con derivadas no se construye un AFN"}), 409
+        lineas = islice(lineas_transiciones_afn(automata.afn), desde, hasta)
+        respuesta = Response(stream_with_context(linea + "\n" for linea in lineas),
+                             mimetype="text/plain")
+    else:
+        if automata.transiciones_afd is None:
+            return jsonify({"error": "Con el motor perezoso no hay listado del AFD"}), 409
+        lineas = islice(automata.transiciones_afd.split("\n"), desde, hasta)
+        respuesta = Response("".join(linea + "\n" for linea in lineas), mimetype="text/plain")
+    respuesta.set_etag(etag)
+    return respuesta
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     if request.method == "POST":
@@ -100,36 +606,80 @@ def index():
                 return render_template("index.html", 
                                     error="El alfabeto no puede estar vacío")
 
-            expresion = request.form["expresion"]
+            expresion = request.form["expresion"].strip()
             palabra = request.form["palabra"]
+            minimizar = "minimizar" in request.form
+            minimizar, motor, construccion = normalizar_opciones(
+                minimizar, request.form.get("motor", "afd"), request.form.get("construccion", "thompson"))
 
-            # Validar la expresión regular
-            if not validar_expresion_regular(expresion, alfabeto):
+            perfil = Perfil(metricas)
+
+            # Reutilizar el autómata si ya se compiló esta expresión
+            try:
+                identificador, automata = obtener_automata(alfabeto, expresion, minimizar, motor, construccion,
+                                                           perfil)
+            except ErrorExpresion as e:
                 return render_template("index.html", 
-                                    error="La expresión regular contiene símbolos no válidos")
+                                    error=f"Expresión regular no válida: {e}",
+                                    alfabeto=request.form["alfabeto"],
+                                    expresion=expresion,
+                                    palabra=palabra)
 
-            # Convertir a postfijo y construir AFN
-            postfijo = a_postfijo(expresion)
-            afn = construir_afn_postfijo(postfijo, alfabeto)
-            
-            # Convertir a AFD
-            afd = convertir_afn_a_afd(afn)
-            
-            # Generar imagen del AFD
-            dibujar_afd(afd)
+            # El SVG se genera en el momento; el PNG se encola y, si la imagen
+            # ya existe, no se vuelve a generar
+            diagrama = request.form.get("diagrama", "svg")
+            svg_afd = None
+            if automata.afd is not None:
+                if diagrama == "svg":
+                    svg_afd = svg_automata(automata)
+                if svg_afd is None:
+                    renderizador.solicitar(automata.afd, automata.hash_afd)
             
             # Procesar la palabra
-            resultado_palabra = procesar_palabra(afd, palabra, alfabeto)
+            with perfil.etapa("procesar_palabra"):
+                resultado_palabra = procesar_palabra(automata.afd_compilado, palabra, alfabeto)
+            actualizar_perezoso(identificador, automata)
+
+            # El perfil sólo se muestra si se pidió; en las métricas se registra siempre
+            texto_perfil = volcar_perfil(perfil, expresion) if "perfil" in request.form else None
+
+            resultado_afn = "AFN creado exitosamente" if automata.afn is not None else "Sin AFN"
+            if automata.afd is None:
+                motor_perezoso = "Derivadas de Brzozowski" if motor == "derivadas" else "AFD perezoso"
+                return render_template("index.html",
+                                    resultado_afn=resultado_afn,
+                                    transiciones_afn=automata.transiciones_afn,
+                                    listado_afn_completo=automata.listado_afn_completo,
+                                    resultado_afd=f"{motor_perezoso}: los estados se construyen al procesar palabras",
+                                    transiciones_afd=f"Estados materializados: {automata.afd_compilado.num_estados}",
+                                    resultado_palabra=resultado_palabra,
+                                    alfabeto=request.form["alfabeto"],
+                                    expresion=expresion,
+                                    palabra=palabra,
+                                    minimizar=minimizar,
+                                    motor=motor,
+                                    construccion=construccion,
+                                    perfil=texto_perfil)
 
             return render_template("index.html",
-                                resultado_afn="AFN creado exitosamente",
-                                transiciones_afn=mostrar_transiciones_afn(afn),
-                                resultado_afd="AFD creado exitosamente",
-                                transiciones_afd=mostrar_transiciones_afd(afd),
+                                resultado_afn=resultado_afn,
+                                transiciones_afn=automata.transiciones_afn,
+                                listado_afn_completo=automata.listado_afn_completo,
+                                resultado_afd="AFD mínimo creado exitosamente" if minimizar else "AFD creado exitosamente",
+                                transiciones_afd=automata.transiciones_afd,
+                                svg_afd=svg_afd,
+                                diagrama=diagrama,
+                                clave_imagen=None if svg_afd else automata.hash_afd,
+                                imagen_lista=renderizador.estado(automata.hash_afd) == "listo",
+                                url_imagen=url_imagen(automata.hash_afd),
                                 resultado_palabra=resultado_palabra,
                                 alfabeto=request.form["alfabeto"],
                                 expresion=expresion,
-                                palabra=palabra)
+                                palabra=palabra,
+                                minimizar=minimizar,
+                                motor=motor,
+                                construccion=construccion,
+                                perfil=texto_perfil)
 
         except Exception as e:
             return render_template("index.html", 
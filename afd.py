@@ -1,6 +1,6 @@
-import matplotlib.pyplot as plt
-import networkx as nx
 import os
+from array import array
+from afn import AFNCompacto, numerar_estados
 
 class AFD:
     def __init__(self):
@@ -11,6 +11,7 @@ class AFD:
         self.estado_trampa = frozenset()
         self._nombres_estados = {}
         self._contador_estados = 0
+        self.clases = None  # etiqueta -> símbolos, si las transiciones van por clases de símbolos
 
     def obtener_nombre_estado(self, estado):
         """Obtiene un nombre consistente para un estado."""
@@ -39,6 +40,166 @@ class AFD:
         for simbolo in alfabeto:
             self.transiciones[(self.estado_trampa, simbolo)] = self.estado_trampa
 
+class AFDCompilado:
+    """AFD con estados renumerados a enteros y transiciones en una tabla plana."""
+
+    def __init__(self, alfabeto, tabla, estado_inicial, estado_trampa, finales, nombres, clases=None):
+        self.alfabeto = alfabeto  # Símbolos (o etiquetas de clase) ordenados; su posición es la columna
+        self.clases = clases  # etiqueta -> símbolos de la clase, o None si cada columna es un símbolo
+        if clases is None:
+            self.indice_simbolo = {simbolo: i for i, simbolo in enumerate(alfabeto)}
+        else:
+            self.indice_simbolo = {simbolo: i for i, etiqueta in enumerate(alfabeto)
+                                   for simbolo in clases[etiqueta]}
+        self.num_simbolos = len(alfabeto)
+        self.tabla = tabla  # tabla[estado * num_simbolos + indice] -> siguiente estado
+        self.estado_inicial = estado_inicial
+        self.estado_trampa = estado_trampa
+        self.finales = finales  # finales[estado] == 1 si es de aceptación
+        self.nombres = nombres
+        self.origen = None  # (ruta, clave) si la tabla está mapeada desde un paquete
+
+    def __getstate__(self):
+        # Una tabla mapeada desde un paquete se vuelve a mapear en el otro
+        # proceso en lugar de copiarse
+        if self.origen is not None:
+            return self.origen
+        # Sólo viajan los datos; el índice de símbolos se reconstruye al cargar
+        return (self.alfabeto, self.tabla, self.estado_inicial, self.estado_trampa,
+                self.finales, self.nombres, self.clases)
+
+    def __setstate__(self, estado):
+        if len(estado) == 2:
+            from serializacion import cargar_paquete
+            self.__dict__.update(cargar_paquete(estado[0]).obtener(estado[1]).__dict__)
+            return
+        self.__init__(*estado)
+
+    @property
+    def num_estados(self):
+        return len(self.nombres)
+
+    @property
+    def estados_finales(self):
+        return {estado for estado, final in enumerate(self.finales) if final}
+
+    def obtener_nombre_estado(self, estado):
+        """Obtiene el nombre del estado original del AFD."""
+        return self.nombres[estado]
+
+    def simbolos_columna(self, columna):
+        """Retorna los símbolos que llevan por una columna de la tabla."""
+        etiqueta = self.alfabeto[columna]
+        return (etiqueta,) if self.clases is None else self.clases[etiqueta]
+
+    def es_final(self, estado):
+        return self.finales[estado] == 1
+
+    def siguiente(self, estado, simbolo):
+        """Retorna el estado destino, o None si el símbolo no está en el alfabeto."""
+        indice = self.indice_simbolo.get(simbolo)
+        if indice is None:
+            return None
+        return self.tabla[estado * self.num_simbolos + indice]
+
+    def avanzar(self, estado, texto):
+        """Consume el texto desde un estado y retorna el estado alcanzado."""
+        tabla = self.tabla
+        indice_simbolo = self.indice_simbolo
+        k = self.num_simbolos
+        trampa = self.estado_trampa
+
+        for simbolo in texto:
+            if estado == trampa:
+                break
+            indice = indice_simbolo.get(simbolo)
+            if indice is None:
+                return trampa
+            estado = tabla[estado * k + indice]
+        return estado
+
+    def match(self, palabra):
+        """Indica si la palabra es aceptada, sin construir el recorrido."""
+        tabla = self.tabla
+        indice_simbolo = self.indice_simbolo
+        k = self.num_simbolos
+        trampa = self.estado_trampa
+        estado = self.estado_inicial
+
+        for simbolo in palabra:
+            indice = indice_simbolo.get(simbolo)
+            if indice is None:
+                return False
+            estado = tabla[estado * k + indice]
+            if estado == trampa:
+                return False
+        return self.finales[estado] == 1
+
+    def match_many(self, palabras):
+        """Evalúa una colección de palabras y retorna una lista de booleanos."""
+        # Se repite el ciclo de match() para no pagar una llamada por palabra
+        tabla = self.tabla
+        indice_simbolo = self.indice_simbolo
+        k = self.num_simbolos
+        trampa = self.estado_trampa
+        inicial = self.estado_inicial
+        finales = self.finales
+        resultados = []
+
+        for palabra in palabras:
+            estado = inicial
+            for simbolo in palabra:
+                indice = indice_simbolo.get(simbolo)
+                if indice is None:
+                    estado = trampa
+                    break
+                estado = tabla[estado * k + indice]
+                if estado == trampa:
+                    break
+            resultados.append(estado != trampa and finales[estado] == 1)
+        return resultados
+
+def ordenar_estados(afd):
+    """Lista los estados con el inicial primero y el resto en orden de descubrimiento."""
+    return [afd.estado_inicial] + [e for e in afd.estados if e != afd.estado_inicial]
+
+def compilar_afd(afd):
+    """Compila un AFD en una tabla de transiciones indexada por enteros."""
+    # El número de cada estado es su posición en ordenar_estados()
+    estados = ordenar_estados(afd)
+    indices = {estado: i for i, estado in enumerate(estados)}
+    nombres = [afd.obtener_nombre_estado(estado) for estado in estados]
+
+    # Si el AFD no está completo se agrega un estado trampa para las transiciones faltantes
+    if afd.estado_trampa in indices:
+        trampa = indices[afd.estado_trampa]
+    else:
+        trampa = len(estados)
+        nombres.append("qT")
+
+    simbolos = sorted({simbolo for (_, simbolo) in afd.transiciones})
+    columnas = {simbolo: i for i, simbolo in enumerate(simbolos)}
+    k = len(simbolos)
+    tabla = array("i", [trampa]) * (len(nombres) * k)
+    for (origen, simbolo), destino in afd.transiciones.items():
+        tabla[indices[origen] * k + columnas[simbolo]] = indices[destino]
+
+    finales = bytearray(len(nombres))
+    for estado in afd.estados_finales:
+        finales[indices[estado]] = 1
+
+    return AFDCompilado(simbolos, tabla, 0, trampa, finales, nombres, afd.clases)
+
+def imprimir_afd(afd):
+    """Imprime las transiciones del AFD con nombres legibles para los estados."""
+    print("Transiciones del AFD:")
+    for (estado, simbolo), siguiente_estado in sorted(afd.transiciones.items(),
+                                                      key=lambda x: (afd.obtener_nombre_estado(x[0][0]), x[0][1])):
+        print(f"  {afd.obtener_nombre_estado(estado)} --{simbolo}--> {afd.obtener_nombre_estado(siguiente_estado)}")
+    print(f"Estado inicial: {afd.obtener_nombre_estado(afd.estado_inicial)}")
+    estados_finales = sorted(afd.obtener_nombre_estado(estado) for estado in afd.estados_finales)
+    print(f"Estados finales: {', '.join(estados_finales)}")
+
 def epsilon_closure(estado_afn):
     """Calcula la cerradura epsilon de un estado AFN."""
     cerradura = {estado_afn}
@@ -54,58 +215,163 @@ def epsilon_closure(estado_afn):
     
     return cerradura
 
+def cerraduras_epsilon(estados, indices):
+    """Calcula la cerradura epsilon de cada estado numerado como máscara de bits."""
+    cerraduras = []
+    for estado in estados:
+        mascara = 1 << indices[estado]
+        pila = [estado]
+        while pila:
+            actual = pila.pop()
+            for siguiente in actual.epsilon:
+                bit = 1 << indices[siguiente]
+                if not mascara & bit:
+                    mascara |= bit
+                    pila.append(siguiente)
+        cerraduras.append(mascara)
+    return cerraduras
+
+def preparar_afn(afn, simbolos):
+    """Precalcula cerraduras, movimientos y estados finales del AFN como máscaras."""
+    if isinstance(afn, AFNCompacto):
+        return preparar_afn_compacto(afn, simbolos)
+
+    # Numerar los estados del AFN y precalcular sus cerraduras epsilon una sola vez
+    estados_afn, indices = numerar_estados(afn)
+    cerraduras = cerraduras_epsilon(estados_afn, indices)
+
+    mascara_finales = 0
+    for estado_afn in estados_afn:
+        if estado_afn.es_final:
+            mascara_finales |= 1 << indices[estado_afn]
+
+    # mover[simbolo][q]: cerradura de los destinos de q con el símbolo
+    # con_simbolo[simbolo]: máscara de los estados que tienen transición con el símbolo
+    mover = {simbolo: {} for simbolo in simbolos}
+    con_simbolo = dict.fromkeys(simbolos, 0)
+    for estado_afn in estados_afn:
+        q = indices[estado_afn]
+        for simbolo, destinos in estado_afn.transiciones.items():
+            if simbolo not in mover:
+                continue
+            destino_mascara = 0
+            for destino in destinos:
+                destino_mascara |= cerraduras[indices[destino]]
+            mover[simbolo][q] = destino_mascara
+            con_simbolo[simbolo] |= 1 << q
+
+    mascara_inicial = cerraduras[indices[afn.inicio]]
+    return estados_afn, mascara_inicial, mascara_finales, mover, con_simbolo
+
+def preparar_afn_compacto(afn, simbolos):
+    """Versión de preparar_afn que lee directamente los arreglos del AFNCompacto."""
+    epsilon1 = afn.epsilon1
+    epsilon2 = afn.epsilon2
+
+    # construir_afn_subexpresion las deja calculadas a partir del árbol
+    cerraduras = afn.cerraduras
+    if cerraduras is None:
+        cerraduras = []
+        for q in range(afn.num_estados):
+            mascara = 1 << q
+            pila = [q]
+            while pila:
+                actual = pila.pop()
+                for siguiente in (epsilon1[actual], epsilon2[actual]):
+                    if siguiente != -1 and not mascara >> siguiente & 1:
+                        mascara |= 1 << siguiente
+                        pila.append(siguiente)
+            cerraduras.append(mascara)
+
+    mover = {simbolo: {} for simbolo in simbolos}
+    con_simbolo = dict.fromkeys(simbolos, 0)
+    for q, indice in enumerate(afn.simbolo):
+        if indice == -1:
+            continue
+        simbolo = afn.simbolos[indice]
+        if simbolo not in mover:
+            continue
+        mover[simbolo][q] = cerraduras[afn.destino[q]]
+        con_simbolo[simbolo] |= 1 << q
+
+    # Los estados del AFD quedan como frozensets de números de estado
+    return range(afn.num_estados), cerraduras[afn.inicio], 1 << afn.fin, mover, con_simbolo
+
 def convertir_afn_a_afd(afn):
     """Convierte un AFN en un AFD utilizando el algoritmo de subconjuntos."""
     afd = AFD()
+    simbolos = sorted(list(afn.alfabeto))
+    estados_afn, mascara_inicial, mascara_finales, mover, con_simbolo = preparar_afn(afn, simbolos)
 
-    # Calcular la cerradura epsilon del estado inicial del AFN
-    estado_inicial_afn_closure = epsilon_closure(afn.inicio)
-    estado_inicial_afd_frozenset = frozenset(estado_inicial_afn_closure)
+    def a_frozenset(mascara):
+        """Convierte una máscara de estados del AFN en el estado del AFD."""
+        miembros = []
+        while mascara:
+            bajo = mascara & -mascara
+            miembros.append(estados_afn[bajo.bit_length() - 1])
+            mascara ^= bajo
+        return frozenset(miembros)
+
+    estado_inicial_afd_frozenset = a_frozenset(mascara_inicial)
 
     afd.estado_inicial = estado_inicial_afd_frozenset
     afd.estados.append(estado_inicial_afd_frozenset)
 
-    pendientes = [estado_inicial_afd_frozenset]
-    estados_procesados = {estado_inicial_afd_frozenset}
+    pendientes = [mascara_inicial]
+    estados_procesados = {mascara_inicial: estado_inicial_afd_frozenset}
+    cache_mover = {}  # (estados relevantes, símbolo) -> máscara destino
 
     while pendientes:
-        estado_actual_frozenset = pendientes.pop()
+        mascara_actual = pendientes.pop()
+        estado_actual_frozenset = estados_procesados[mascara_actual]
 
         # Verificar si el estado actual contiene algún estado final del AFN
-        if any(estado.es_final for estado in estado_actual_frozenset):
+        if mascara_actual & mascara_finales:
             afd.estados_finales.add(estado_actual_frozenset)
 
         # Procesar cada símbolo del alfabeto
-        for simbolo in sorted(list(afn.alfabeto)):
-            siguiente_estados_afn = set()
-
-            # Obtener todos los estados alcanzables con el símbolo actual
-            for estado_afn in estado_actual_frozenset:
-                if simbolo in estado_afn.transiciones:
-                    siguiente_estados_afn.update(estado_afn.transiciones[simbolo])
-
-            if siguiente_estados_afn:
-                # Calcular la cerradura epsilon para cada estado alcanzado
-                siguiente_estado_closure_afn = set()
-                for estado_afn in siguiente_estados_afn:
-                    siguiente_estado_closure_afn.update(epsilon_closure(estado_afn))
-
-                siguiente_estado_afd_frozenset = frozenset(siguiente_estado_closure_afn)
-
-                if siguiente_estado_afd_frozenset not in estados_procesados:
-                    afd.estados.append(siguiente_estado_afd_frozenset)
-                    pendientes.append(siguiente_estado_afd_frozenset)
-                    estados_procesados.add(siguiente_estado_afd_frozenset)
-
-                afd.transiciones[(estado_actual_frozenset, simbolo)] = siguiente_estado_afd_frozenset
+        for simbolo in simbolos:
+            relevantes = mascara_actual & con_simbolo[simbolo]
+            if not relevantes:
+                continue
+
+            # Distintos estados del AFD comparten el resultado si coinciden en los relevantes
+            clave = (relevantes, simbolo)
+            siguiente_mascara = cache_mover.get(clave)
+            if siguiente_mascara is None:
+                siguiente_mascara = 0
+                mover_simbolo = mover[simbolo]
+                while relevantes:
+                    bajo = relevantes & -relevantes
+                    siguiente_mascara |= mover_simbolo[bajo.bit_length() - 1]
+                    relevantes ^= bajo
+                cache_mover[clave] = siguiente_mascara
+
+            siguiente_estado_afd_frozenset = estados_procesados.get(siguiente_mascara)
+            if siguiente_estado_afd_frozenset is None:
+                siguiente_estado_afd_frozenset = a_frozenset(siguiente_mascara)
+                afd.estados.append(siguiente_estado_afd_frozenset)
+                pendientes.append(siguiente_mascara)
+                estados_procesados[siguiente_mascara] = siguiente_estado_afd_frozenset
+
+            afd.transiciones[(estado_actual_frozenset, simbolo)] = siguiente_estado_afd_frozenset
 
     # Agregar el estado trampa y sus transiciones
     afd.agregar_estado_trampa(afn.alfabeto)
 
     return afd
 
-def dibujar_afd(afd):
+def dibujar_afd(afd, ruta="static/afd.png"):
     """Dibuja el AFD usando matplotlib y networkx."""
+    # Se importan al dibujar: cargarlos cuesta segundos y la mayoría de los
+    # usos del módulo nunca dibujan
+    import matplotlib
+    import networkx as nx
+    from matplotlib.figure import Figure
+
+    # Backend sin ventana: las imágenes se generan en hilos del servidor
+    matplotlib.use("Agg")
+
     G = nx.DiGraph()
 
     # Asignar nombres a los estados
@@ -133,7 +399,11 @@ def dibujar_afd(afd):
         G.add_edge(nombre_origen, nombre_destino, label=simbolo)
 
     pos = nx.spring_layout(G, k=1, iterations=50)
-    plt.figure(figsize=(12, 8))
+
+    # Se usa una Figure propia en lugar del estado global de pyplot para poder
+    # dibujar desde hilos en segundo plano
+    figura = Figure(figsize=(12, 8))
+    ax = figura.add_subplot()
 
     # Dibujar nodos
     node_colors = []
@@ -155,6 +425,7 @@ def dibujar_afd(afd):
             final_node_borders.append(node)
 
     nx.draw(G, pos, 
+            ax=ax,
             nodelist=node_list,
             node_color=node_colors,
             node_size=3000,
@@ -166,6 +437,7 @@ def dibujar_afd(afd):
 
     # Dibujar estados finales con doble círculo
     nx.draw_networkx_nodes(G, pos,
+                          ax=ax,
                           nodelist=final_node_borders,
                           node_size=3500,
                           node_color="none",
@@ -174,12 +446,15 @@ def dibujar_afd(afd):
 
     # Dibujar etiquetas de las aristas
     edge_labels = nx.get_edge_attributes(G, "label")
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, font_color="red")
-
-    # Guardar la imagen
-    if not os.path.exists("static"):
-        os.makedirs("static")
-    plt.savefig("static/afd.png")
-    plt.close()
-
-    return "static/afd.png"
\ No newline at end of file
+    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, font_color="red", ax=ax)
+
+    # Guardar la imagen en un archivo temporal y moverla, para que nunca se
+    # sirva un PNG a medio escribir
+    directorio = os.path.dirname(ruta)
+    if directorio and not os.path.exists(directorio):
+        os.makedirs(directorio, exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.{id(figura)}.tmp"
+    figura.savefig(temporal, format="png")
+    os.replace(temporal, ruta)
+
+    return ruta
\ No newline at end of file
@@ -0,0 +1,103 @@
+import threading
+from afd import preparar_afn
+
+class AFDPerezoso:
+    """AFD que se determiniza sólo en los estados que alcanzan las palabras procesadas."""
+
+    # Cada estado es la máscara de bits de los estados del AFN que contiene;
+    # la máscara 0 (conjunto vacío) hace de estado trampa.
+
+    def __init__(self, afn, max_estados=4096, clases=None):
+        self.alfabeto = sorted(list(afn.alfabeto))
+        # Si el AFN va por clases de símbolos, cada símbolo se traduce a su etiqueta
+        self.clases = clases
+        self.clase_de = None
+        if clases is not None:
+            self.clase_de = {simbolo: etiqueta for etiqueta, simbolos in clases.items() for simbolo in simbolos}
+        (self.estados_afn, self.estado_inicial, self.mascara_finales,
+         self.mover, self.con_simbolo) = preparar_afn(afn, self.alfabeto)
+        self.estado_trampa = 0
+        self.max_estados = max_estados
+        self.transiciones = {}  # estado materializado -> {simbolo: estado}
+        self._nombres = {self.estado_inicial: "q0", self.estado_trampa: "qT"}
+        self.pasos_sin_cache = 0  # Pasos resueltos como simulación pura del AFN
+        self._lock = threading.Lock()  # El autómata se comparte entre los hilos del servidor
+
+    @property
+    def num_estados(self):
+        """Cantidad de estados del AFD materializados hasta ahora."""
+        return len(self.transiciones)
+
+    def mover_mascara(self, mascara, simbolo):
+        """Calcula el conjunto de estados del AFN alcanzado con un símbolo."""
+        relevantes = mascara & self.con_simbolo[simbolo]
+        mover_simbolo = self.mover[simbolo]
+        destino = 0
+        while relevantes:
+            bajo = relevantes & -relevantes
+            destino |= mover_simbolo[bajo.bit_length() - 1]
+            relevantes ^= bajo
+        return destino
+
+    def siguiente(self, estado, simbolo):
+        """Retorna el estado destino, o None si el símbolo no está en el alfabeto."""
+        if self.clase_de is not None:
+            simbolo = self.clase_de.get(simbolo)
+        if simbolo not in self.con_simbolo:
+            return None
+
+        fila = self.transiciones.get(estado)
+        if fila is not None:
+            destino = fila.get(simbolo)
+            if destino is not None:
+                return destino
+
+        destino = self.mover_mascara(estado, simbolo)
+        with self._lock:
+            fila = self.transiciones.get(estado)
+            if fila is None:
+                if len(self.transiciones) >= self.max_estados:
+                    # Caché lleno: se sigue como simulación del AFN sin guardar nada
+                    self.pasos_sin_cache += 1
+                    return destino
+                fila = self.transiciones[estado] = {}
+            fila[simbolo] = destino
+        return destino
+
+    def es_final(self, estado):
+        return bool(estado & self.mascara_finales)
+
+    def obtener_nombre_estado(self, estado):
+        """Obtiene un nombre para el estado, o el conjunto del AFN si no se materializó."""
+        nombre = self._nombres.get(estado)
+        if nombre is not None:
+            return nombre
+        with self._lock:
+            nombre = self._nombres.get(estado)
+            if nombre is not None:
+                return nombre
+            if estado in self.transiciones or len(self._nombres) < self.max_estados:
+                nombre = f"q{len(self._nombres) - 1}"
+                self._nombres[estado] = nombre
+                return nombre
+
+        miembros = []
+        while estado:
+            bajo = estado & -estado
+            miembros.append(str(bajo.bit_length() - 1))
+            estado ^= bajo
+        return "{" + ", ".join(miembros) + "}"
+
+    def match(self, palabra):
+        """Indica si la palabra es aceptada, sin construir el recorrido."""
+        siguiente = self.siguiente
+        estado = self.estado_inicial
+        for simbolo in palabra:
+            estado = siguiente(estado, simbolo)
+            if not estado:  # None (símbolo inválido) o el estado trampa
+                return False
+        return bool(estado & self.mascara_finales)
+
+    def match_many(self, palabras):
+        """Evalúa una colección de palabras y retorna una lista de booleanos."""
+        return [self.match(palabra) for palabra in palabras]
@@ -1,3 +1,6 @@
+from array import array
+from collections import deque
+
 class Estado:
     def __init__(self):
         self.transiciones = {}  # Transiciones por símbolo
@@ -53,4 +56,122 @@ class AFN:
 
     def __repr__(self):
         """Representación en cadena del AFN"""
-        return f"AFN(inicio={self.inicio}, fin={self.fin}, alfabeto={self.alfabeto})"
\ No newline at end of file
+        return f"AFN(inicio={self.inicio}, fin={self.fin}, alfabeto={self.alfabeto})"
+class AFNCompacto:
+    """AFN con estados enteros y transiciones en arreglos paralelos."""
+
+    # En la construcción de Thompson cada estado tiene a lo sumo una transición
+    # por símbolo y dos transiciones epsilon, así que bastan columnas fijas.
+    __slots__ = ("alfabeto", "simbolos", "indice_simbolo", "simbolo", "destino",
+                 "epsilon1", "epsilon2", "inicio", "fin", "cerraduras")
+
+    def __init__(self, alfabeto):
+        self.alfabeto = alfabeto
+        self.simbolos = []  # Símbolos usados; simbolo[q] guarda su posición
+        self.indice_simbolo = {}
+        self.simbolo = array("i")  # -1 si el estado no tiene transición por símbolo
+        self.destino = array("i")
+        self.epsilon1 = array("i")  # -1 si no hay transición epsilon
+        self.epsilon2 = array("i")
+        self.inicio = -1
+        self.fin = -1
+        self.cerraduras = None  # Cerraduras epsilon ya calculadas como máscaras, si se conocen
+
+    @property
+    def num_estados(self):
+        return len(self.simbolo)
+
+    def nuevo_estado(self):
+        """Agrega un estado sin transiciones y retorna su número."""
+        self.simbolo.append(-1)
+        self.destino.append(-1)
+        self.epsilon1.append(-1)
+        self.epsilon2.append(-1)
+        return len(self.simbolo) - 1
+
+    def agregar_transicion(self, origen, simbolo, destino):
+        """Agrega la transición por símbolo de un estado."""
+        if self.simbolo[origen] != -1:
+            raise ValueError(f"El estado {origen} ya tiene una transición por símbolo")
+        if simbolo not in self.indice_simbolo:
+            self.indice_simbolo[simbolo] = len(self.simbolos)
+            self.simbolos.append(simbolo)
+        self.simbolo[origen] = self.indice_simbolo[simbolo]
+        self.destino[origen] = destino
+
+    def agregar_epsilon(self, origen, destino):
+        """Agrega una transición epsilon a un estado."""
+        if self.epsilon1[origen] == -1:
+            self.epsilon1[origen] = destino
+        elif self.epsilon2[origen] == -1:
+            self.epsilon2[origen] = destino
+        else:
+            raise ValueError(f"El estado {origen} ya tiene dos transiciones epsilon")
+
+    def __repr__(self):
+        """Representación en cadena del AFN compacto"""
+        return f"AFNCompacto(estados={self.num_estados}, inicio={self.inicio}, fin={self.fin}, alfabeto={self.alfabeto})"
+
+class RecorridoAFN:
+    """Recorrido iterativo (en anchura) de un AFN o AFNCompacto que numera los estados al descubrirlos."""
+
+    def __init__(self, afn):
+        self.afn = afn
+        self.indices = {}  # estado -> número
+
+    def sucesores(self, estado):
+        """Genera las transiciones de un estado como pares (símbolo, destino); None es epsilon."""
+        afn = self.afn
+        if isinstance(afn, AFNCompacto):
+            if afn.simbolo[estado] != -1:
+                yield afn.simbolos[afn.simbolo[estado]], afn.destino[estado]
+            for destino in (afn.epsilon1[estado], afn.epsilon2[estado]):
+                if destino != -1:
+                    yield None, destino
+        else:
+            for simbolo, destinos in sorted(estado.transiciones.items()):
+                for destino in destinos:
+                    yield simbolo, destino
+            for destino in estado.epsilon:
+                yield None, destino
+
+    def __iter__(self):
+        """Genera (número, estado, [(símbolo, número destino), ...]) en orden de número."""
+        indices = self.indices
+        indices.clear()
+        indices[self.afn.inicio] = 0
+        cola = deque([self.afn.inicio])
+
+        while cola:
+            estado = cola.popleft()
+            aristas = []
+            for simbolo, destino in self.sucesores(estado):
+                numero = indices.get(destino)
+                if numero is None:
+                    numero = indices[destino] = len(indices)
+                    cola.append(destino)
+                aristas.append((simbolo, numero))
+            yield indices[estado], estado, aristas
+
+def numerar_estados(afn):
+    """Retorna los estados alcanzables en orden de recorrido y sus números."""
+    recorrido = RecorridoAFN(afn)
+    estados = [estado for _, estado, _ in recorrido]
+    return estados, recorrido.indices
+
+def lineas_transiciones_afn(afn):
+    """Genera el listado de transiciones del AFN línea por línea, con estados q0, q1, ..."""
+    recorrido = RecorridoAFN(afn)
+    finales = []
+    for numero, estado, aristas in recorrido:
+        for simbolo, destino in aristas:
+            yield f"q{numero} --{'ε' if simbolo is None else simbolo}--> q{destino}"
+        if estado == afn.fin or getattr(estado, "es_final", False):
+            finales.append(f"q{numero}")
+
+    yield ""
+    yield f"Estado inicial: q{recorrido.indices[afn.inicio]}"
+    if len(finales) == 1:
+        yield f"Estado final: {finales[0]}"
+    elif finales:
+        yield f"Estados finales: {', '.join(finales)}"
@@ -1,27 +1,13 @@
+from expresion_regular import ErrorExpresion, analizar_expresion, leer_caracter, rango_caracteres
+
 def validar_expresion_regular(expresion, alfabeto):
     """Valida que una expresión regular use solo símbolos válidos del alfabeto y operadores permitidos."""
-    operadores = {"*", "|", ".", "(", ")"}
-    
-    for c in expresion:
-        if c not in alfabeto and c not in operadores:
-            print(f"Carácter no válido en la expresión regular: {c}")
-            return False
-    
-    # Validación básica de paréntesis
-    parentesis = 0
-    for c in expresion:
-        if c == "(":
-            parentesis += 1
-        elif c == ")":
-            parentesis -= 1
-        if parentesis < 0:
-            print("Error: Paréntesis mal balanceados")
-            return False
-    
-    if parentesis != 0:
-        print("Error: Paréntesis mal balanceados")
+    # El análisis revisa símbolos, operadores y paréntesis en una sola pasada;
+    # quien necesite el motivo y la posición puede capturar ErrorExpresion
+    try:
+        analizar_expresion(expresion, alfabeto)
+    except ErrorExpresion:
         return False
-    
     return True
 
 def procesar_alfabeto(alfabeto_str):
@@ -30,6 +16,24 @@ def procesar_alfabeto(alfabeto_str):
     alfabeto_str = alfabeto_str.strip("{}").replace(" ", "")
     
     # Dividir por comas y crear conjunto
+    alfabeto = set()
     if alfabeto_str:
-        return set(simbolo.strip() for simbolo in alfabeto_str.split(","))
-    return set()
\ No newline at end of file
+        for simbolo in alfabeto_str.split(","):
+            alfabeto.update(expandir_simbolo(simbolo.strip()))
+    return alfabeto
+
+def expandir_simbolo(texto):
+    """Expande un elemento del alfabeto: un rango x-y de caracteres, un escape o un símbolo literal."""
+    # Los extremos de un rango son un carácter o un escape (\xHH, \uHHHH); de
+    # un rango se omiten los operadores, que no pueden ser símbolos
+    try:
+        desde, i = leer_caracter(texto, 0) if texto else (None, 0)
+        if i == len(texto) and len(texto) > 1:
+            return [desde]
+        if desde is not None and texto.startswith("-", i) and i + 1 < len(texto):
+            hasta, fin = leer_caracter(texto, i + 1)
+            if fin == len(texto) and desde <= hasta:
+                return rango_caracteres(desde, hasta)
+    except ErrorExpresion:
+        pass
+    return [texto]
\ No newline at end of file
@@ -0,0 +1,230 @@
+from array import array
+from collections import deque
+from afd import AFDCompilado, compilar_afd
+from clases import nombrar_clases
+
+# Aceptación de un par (p, q) del producto según la operación
+OPERACIONES = {
+    "interseccion": lambda x, y: x and y,
+    "union": lambda x, y: x or y,
+    "diferencia": lambda x, y: x and not y,
+    "diferencia_simetrica": lambda x, y: x != y,
+}
+
+def _compilar(afd):
+    return afd if isinstance(afd, AFDCompilado) else compilar_afd(afd)
+
+def _alfabeto_comun(*compilados, extra=()):
+    """Clases de símbolos que ninguno de los autómatas distingue; retorna (etiquetas ordenadas, clases)."""
+    # Cada autómata reparte sus símbolos en columnas (o clases); dos símbolos
+    # siguen juntos si caen en la misma columna de todos los autómatas
+    grupos = {}
+    for simbolo in set(extra).union(*(compilado.indice_simbolo for compilado in compilados)):
+        firma = tuple(compilado.indice_simbolo.get(simbolo) for compilado in compilados)
+        grupos.setdefault(firma, []).append(simbolo)
+    clases = nombrar_clases(grupos.values())
+    return sorted(clases), clases
+
+def _tabla_comun(compilado, alfabeto, clases):
+    """Retorna la tabla del autómata como lista, con una columna por clase del alfabeto común."""
+    # Los símbolos que el autómata no conoce llevan al estado trampa
+    k = compilado.num_simbolos
+    columnas = [compilado.indice_simbolo.get(clases[etiqueta][0]) for etiqueta in alfabeto]
+    if columnas == list(range(k)):
+        return compilado.tabla.tolist()
+    trampa = compilado.estado_trampa
+    if not k:
+        return [trampa] * (compilado.num_estados * len(alfabeto))
+    tabla = compilado.tabla.tolist()
+    resultado = []
+    for base in range(0, compilado.num_estados * k, k):
+        resultado.extend(trampa if columna is None else tabla[base + columna] for columna in columnas)
+    return resultado
+
+def _representantes(alfabeto, clases):
+    """Un símbolo de cada clase, para armar palabras de ejemplo."""
+    return [clases[etiqueta][0] for etiqueta in alfabeto]
+
+def _reconstruir(padres, nodo, representantes):
+    """Arma la palabra que lleva hasta nodo siguiendo los padres de la búsqueda en anchura."""
+    simbolos = []
+    while padres[nodo] is not None:
+        nodo, simbolo = padres[nodo]
+        simbolos.append(representantes[simbolo])
+    return "".join(reversed(simbolos))
+
+def producto(afd1, afd2, operacion="interseccion"):
+    """Construye el AFD producto de dos AFDs con la operación dada, sólo con los pares alcanzables."""
+    if operacion not in OPERACIONES:
+        raise ValueError(f"Operación desconocida: {operacion}")
+    aceptar = OPERACIONES[operacion]
+    a, b = _compilar(afd1), _compilar(afd2)
+    alfabeto, clases = _alfabeto_comun(a, b)
+    k = len(alfabeto)
+    tabla_a, tabla_b = _tabla_comun(a, alfabeto, clases), _tabla_comun(b, alfabeto, clases)
+    finales_a, finales_b = a.finales, b.finales
+    nb = b.num_estados
+
+    # Cada par (p, q) se identifica con el entero p * nb + q
+    inicial = a.estado_inicial * nb + b.estado_inicial
+    indices = {inicial: 0}
+    pares = [inicial]
+    tabla = array("i")
+    finales = bytearray()
+
+    i = 0
+    while i < len(pares):
+        p, q = divmod(pares[i], nb)
+        finales.append(1 if aceptar(finales_a[p] == 1, finales_b[q] == 1) else 0)
+        base_a, base_b = p * k, q * k
+        for simbolo in range(k):
+            par = tabla_a[base_a + simbolo] * nb + tabla_b[base_b + simbolo]
+            destino = indices.get(par)
+            if destino is None:
+                destino = indices[par] = len(pares)
+                pares.append(par)
+            tabla.append(destino)
+        i += 1
+
+    # Ninguna operación acepta el par de trampas, así que sirve de estado trampa
+    nombres = [f"({a.nombres[p]}, {b.nombres[q]})" for p, q in (divmod(par, nb) for par in pares)]
+    trampa = indices.get(a.estado_trampa * nb + b.estado_trampa)
+    if trampa is None:
+        trampa = len(pares)
+        tabla.extend([trampa] * k)
+        finales.append(0)
+        nombres.append("qT")
+    return AFDCompilado(alfabeto, tabla, 0, trampa, finales, nombres, clases)
+
+def interseccion(afd1, afd2):
+    """AFD que acepta las palabras aceptadas por ambos."""
+    return producto(afd1, afd2, "interseccion")
+
+def union(afd1, afd2):
+    """AFD que acepta las palabras aceptadas por alguno de los dos."""
+    return producto(afd1, afd2, "union")
+
+def diferencia(afd1, afd2):
+    """AFD que acepta las palabras del primero que el segundo rechaza."""
+    return producto(afd1, afd2, "diferencia")
+
+def complemento(afd, alfabeto=None):
+    """AFD que acepta las palabras sobre el alfabeto (por defecto, el del AFD) que el AFD rechaza."""
+    compilado = _compilar(afd)
+    alfabeto, clases = _alfabeto_comun(compilado, extra=alfabeto or ())
+    k = len(alfabeto)
+    n = compilado.num_estados
+
+    # La trampa original pasa a aceptar todo, así que se agrega otra para los
+    # símbolos fuera del alfabeto
+    tabla = array("i", _tabla_comun(compilado, alfabeto, clases))
+    tabla.extend([n] * k)
+    finales = bytearray(0 if final else 1 for final in compilado.finales)
+    finales.append(0)
+    nombres = list(compilado.nombres) + ["qT'"]
+    return AFDCompilado(alfabeto, tabla, compilado.estado_inicial, n, finales, nombres, clases)
+
+def palabra_mas_corta(afd):
+    """Retorna la palabra aceptada más corta, o None si el lenguaje es vacío."""
+    compilado = _compilar(afd)
+    k = compilado.num_simbolos
+    tabla = compilado.tabla
+    finales = compilado.finales
+    trampa = compilado.estado_trampa
+
+    padres = {compilado.estado_inicial: None}
+    cola = deque([compilado.estado_inicial])
+    while cola:
+        estado = cola.popleft()
+        if finales[estado] == 1:
+            return _reconstruir(padres, estado, [compilado.simbolos_columna(c)[0] for c in range(k)])
+        for simbolo in range(k):
+            destino = tabla[estado * k + simbolo]
+            if destino != trampa and destino not in padres:
+                padres[destino] = (estado, simbolo)
+                cola.append(destino)
+    return None
+
+def es_vacio(afd):
+    """Indica si el AFD no acepta ninguna palabra."""
+    return palabra_mas_corta(afd) is None
+
+def equivalentes(afd1, afd2):
+    """Compara dos AFDs con Hopcroft-Karp; retorna (son_equivalentes, contraejemplo más corto o None)."""
+    a, b = _compilar(afd1), _compilar(afd2)
+    alfabeto, clases = _alfabeto_comun(a, b)
+    k = len(alfabeto)
+    tabla_a, tabla_b = _tabla_comun(a, alfabeto, clases), _tabla_comun(b, alfabeto, clases)
+    finales_a, finales_b = a.finales, b.finales
+    na = a.num_estados
+
+    # Unión-búsqueda sobre los estados de ambos; los de b van desplazados en na.
+    # Cada unión supone que dos estados son equivalentes, así que se hacen a lo
+    # sumo na + nb - 1 y el producto nunca se recorre completo.
+    representante = list(range(na + b.num_estados))
+
+    def buscar(x):
+        raiz = x
+        while representante[raiz] != raiz:
+            raiz = representante[raiz]
+        while representante[x] != raiz:
+            representante[x], x = raiz, representante[x]
+        return raiz
+
+    # La búsqueda en anchura garantiza que el primer par distinto que aparece
+    # da el contraejemplo más corto
+    inicial = (a.estado_inicial, b.estado_inicial)
+    padres = {inicial: None}
+    if finales_a[inicial[0]] != finales_b[inicial[1]]:
+        return False, ""
+    representante[buscar(inicial[0])] = buscar(na + inicial[1])
+    cola = deque([inicial])
+
+    while cola:
+        p, q = par = cola.popleft()
+        base_a, base_b = p * k, q * k
+        for simbolo in range(k):
+            p2, q2 = tabla_a[base_a + simbolo], tabla_b[base_b + simbolo]
+            raiz_a, raiz_b = buscar(p2), buscar(na + q2)
+            if raiz_a == raiz_b:
+                continue
+            siguiente = (p2, q2)
+            padres[siguiente] = (par, simbolo)
+            if finales_a[p2] != finales_b[q2]:
+                return False, _reconstruir(padres, siguiente, _representantes(alfabeto, clases))
+            representante[raiz_a] = raiz_b
+            cola.append(siguiente)
+    return True, None
+
+def incluido(afd1, afd2):
+    """Indica si el lenguaje del primero está contenido en el del segundo; retorna (incluido, contraejemplo)."""
+    # Se recorre el producto sin construirlo, buscando un par que a acepte y b no
+    a, b = _compilar(afd1), _compilar(afd2)
+    alfabeto, clases = _alfabeto_comun(a, b)
+    k = len(alfabeto)
+    tabla_a, tabla_b = _tabla_comun(a, alfabeto, clases), _tabla_comun(b, alfabeto, clases)
+    finales_a, finales_b = a.finales, b.finales
+    trampa_a = a.estado_trampa
+
+    inicial = (a.estado_inicial, b.estado_inicial)
+    padres = {inicial: None}
+    cola = deque([inicial])
+    while cola:
+        p, q = par = cola.popleft()
+        if finales_a[p] == 1 and finales_b[q] != 1:
+            return False, _reconstruir(padres, par, _representantes(alfabeto, clases))
+        base_a, base_b = p * k, q * k
+        for simbolo in range(k):
+            p2 = tabla_a[base_a + simbolo]
+            if p2 == trampa_a:  # Desde la trampa de a no se acepta nada más
+                continue
+            siguiente = (p2, tabla_b[base_b + simbolo])
+            if siguiente not in padres:
+                padres[siguiente] = (par, simbolo)
+                cola.append(siguiente)
+    return True, None
+
+def disjuntos(afd1, afd2):
+    """Indica si ninguna palabra es aceptada por ambos; retorna (disjuntos, palabra común más corta)."""
+    palabra = palabra_mas_corta(interseccion(afd1, afd2))
+    return palabra is None, palabra
@@ -0,0 +1,287 @@
+# benchmark.py
+import argparse
+import datetime
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from expresion_regular import a_postfijo
+from clases import agrupar_postfijo
+from thompson import construir_afn_postfijo
+from glushkov import Posiciones, construir_afn_glushkov, construir_afd_posiciones
+from derivadas import AFDDerivadas, construir_afd_derivadas
+from afd import convertir_afn_a_afd, compilar_afd
+from minimizacion import minimizar_afd
+from diagramas import afd_a_svg
+from vectorizado import HAY_NUMPY, obtener_simulador
+
+VERSION_FORMATO = 1
+
+
+# Familias de expresiones: cada una recibe un tamaño y retorna (alfabeto, expresión)
+
+def familia_anidamiento(n):
+    """Estrellas y uniones anidadas n niveles: ((((a|b)*c)|a)*...)."""
+    expresion = "a"
+    for i in range(n):
+        expresion = f"({expresion}|b)*c" if i % 2 == 0 else f"({expresion}c|a)*"
+    return {"a", "b", "c"}, expresion
+
+
+def familia_union_amplia(n):
+    """Unión de n palabras distintas de longitud 4 sobre {a, b, c, d}."""
+    simbolos = "abcd"
+    palabras = []
+    for i in range(n):
+        palabra = ""
+        for _ in range(4):
+            palabra += simbolos[i % 4]
+            i //= 4
+        palabras.append(palabra)
+    return set(simbolos), "(" + "|".join(palabras) + ")"
+
+
+def familia_concatenacion_larga(n):
+    """Concatenación de n símbolos con una estrella cada diez."""
+    partes = []
+    for i in range(n):
+        simbolo = "abc"[i % 3]
+        partes.append(f"{simbolo}*" if i % 10 == 9 else simbolo)
+    return {"a", "b", "c"}, "".join(partes)
+
+
+def familia_explosion(n):
+    """(a|b)*a(a|b){n}: el AFD mínimo tiene 2^(n+1) estados."""
+    return {"a", "b"}, "(a|b)*a" + "(a|b)" * n
+
+
+def familia_alfabeto_grande(n):
+    """Alfabeto de n símbolos: (s1|...|sn)*s1(s2|s3)*."""
+    simbolos = [chr(0x4E00 + i) for i in range(n)]
+    union = "|".join(simbolos)
+    return set(simbolos), f"({union})*{simbolos[0]}({simbolos[1 % n]}|{simbolos[2 % n]})*"
+
+
+def familia_clases(n):
+    """Alfabeto de n símbolos escrito con clases: [s1-sn]*s1[s2-sn]*."""
+    simbolos = [chr(0x4E00 + i) for i in range(n)]
+    return set(simbolos), f"[{simbolos[0]}-{simbolos[-1]}]*{simbolos[0]}[{simbolos[1 % n]}-{simbolos[-1]}]*"
+
+
+FAMILIAS = {
+    "anidamiento": (familia_anidamiento, [4, 8, 16, 32]),
+    "union_amplia": (familia_union_amplia, [16, 64, 256]),
+    "concatenacion_larga": (familia_concatenacion_larga, [50, 200, 800]),
+    "explosion": (familia_explosion, [4, 8, 10]),
+    "alfabeto_grande": (familia_alfabeto_grande, [16, 64, 256]),
+    "clases": (familia_clases, [16, 256, 4096]),
+}
+
+
+def generar_palabras(alfabeto, cantidad, longitud_maxima, semilla):
+    """Genera palabras aleatorias reproducibles sobre el alfabeto."""
+    generador = random.Random(semilla)
+    simbolos = sorted(alfabeto)
+    return ["".join(generador.choice(simbolos) for _ in range(generador.randint(0, longitud_maxima)))
+            for _ in range(cantidad)]
+
+
+def medir(funcion, repeticiones):
+    """Mide una etapa: mediana y mínimo del tiempo, y memoria pico en una corrida aparte."""
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    # tracemalloc hace más lenta la ejecución, así que no se mezcla con los tiempos
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return resultado, {
+        "segundos": statistics.median(tiempos),
+        "segundos_min": min(tiempos),
+        "memoria_pico": pico,
+    }
+
+
+def ejecutar_caso(familia, n, args):
+    """Ejecuta todas las etapas del pipeline para un caso y retorna sus métricas."""
+    generador, _ = FAMILIAS[familia]
+    alfabeto, expresion = generador(n)
+    etapas = {}
+
+    original, etapas["a_postfijo"] = medir(lambda: a_postfijo(expresion, alfabeto), args.repeticiones)
+    (postfijo, clases), etapas["agrupar_simbolos"] = medir(lambda: agrupar_postfijo(original, alfabeto),
+                                                           args.repeticiones)
+    if args.construccion == "posiciones":
+        # El AFD se construye directamente; el tamaño del AFN es el del autómata de posiciones
+        afd, etapas["construir_afd_posiciones"] = medir(
+            lambda: construir_afd_posiciones(postfijo, set(clases)), args.repeticiones)
+        estados_afn = Posiciones(postfijo).num_posiciones
+    elif args.construccion == "derivadas":
+        # Sin AFN; como tamaño se cuenta el de las posiciones, que es el de la expresión
+        afd, etapas["construir_afd_derivadas"] = medir(
+            lambda: construir_afd_derivadas(postfijo, set(clases)), args.repeticiones)
+        estados_afn = Posiciones(postfijo).num_posiciones
+    else:
+        if args.construccion == "glushkov":
+            afn, etapas["construir_afn_glushkov"] = medir(
+                lambda: construir_afn_glushkov(postfijo, set(clases)), args.repeticiones)
+        else:
+            afn, etapas["construir_afn_postfijo"] = medir(
+                lambda: construir_afn_postfijo(postfijo, set(clases), compacto=args.compacto), args.repeticiones)
+        afd, etapas["convertir_afn_a_afd"] = medir(lambda: convertir_afn_a_afd(afn), args.repeticiones)
+        estados_afn = afn.num_estados if args.construccion == "thompson" and args.compacto \
+            else len(afn.obtener_todos_estados())
+    afd.clases = clases
+    minimo, etapas["minimizar_afd"] = medir(lambda: minimizar_afd(afd), args.repeticiones)
+    compilado, etapas["compilar_afd"] = medir(lambda: compilar_afd(afd), args.repeticiones)
+
+    palabras = generar_palabras(alfabeto, args.palabras, args.longitud, args.semilla)
+    aceptadas, etapas["simulacion"] = medir(lambda: compilado.match_many(palabras), args.repeticiones)
+    etapas["simulacion"]["palabras"] = len(palabras)
+    if HAY_NUMPY:
+        simulador = obtener_simulador(compilado)
+        aceptadas_numpy, etapas["simulacion_numpy"] = medir(lambda: simulador.match_many(palabras),
+                                                            args.repeticiones)
+        if aceptadas_numpy != aceptadas:
+            raise AssertionError(f"{familia} n={n}: la simulación con NumPy no coincide con match_many")
+
+    # Con derivadas se evalúa desde la expresión, sin construir nada antes
+    aceptadas_derivadas, etapas["simulacion_derivadas"] = medir(
+        lambda: AFDDerivadas(postfijo, set(clases), clases=clases).match_many(palabras), args.repeticiones)
+    if aceptadas_derivadas != aceptadas:
+        raise AssertionError(f"{familia} n={n}: la simulación con derivadas no coincide con match_many")
+
+    if len(afd.estados) <= args.max_estados_dibujo:
+        _, etapas["afd_a_svg"] = medir(lambda: afd_a_svg(afd), args.repeticiones)
+        if args.dibujar:
+            from afd import dibujar_afd
+            _, etapas["dibujar_afd"] = medir(lambda: dibujar_afd(afd, args.ruta_dibujo), 1)
+
+    return {
+        "familia": familia,
+        "n": n,
+        "longitud_expresion": len(expresion),
+        "simbolos_alfabeto": len(alfabeto),
+        "clases_simbolos": len(clases),
+        "construccion": args.construccion,
+        "estados_afn": estados_afn,
+        "estados_afd": len(afd.estados),
+        "transiciones_afd": len(afd.transiciones),
+        "estados_afd_minimo": len(minimo.estados),
+        "palabras_aceptadas": sum(aceptadas),
+        "etapas": etapas,
+    }
+
+
+def comparar(actual, anterior, umbral, minimo_segundos=0.0):
+    """Compara dos corridas y retorna las etapas que empeoraron más que el umbral."""
+    previos = {(caso["familia"], caso["n"]): caso for caso in anterior["casos"]}
+    regresiones = []
+    lineas = []
+    for caso in actual["casos"]:
+        previo = previos.get((caso["familia"], caso["n"]))
+        if previo is None:
+            continue
+        for etapa, medida in caso["etapas"].items():
+            medida_previa = previo["etapas"].get(etapa)
+            if not medida_previa or not medida_previa["segundos"]:
+                continue
+            # Las etapas muy rápidas son ruido de medición
+            if max(medida["segundos"], medida_previa["segundos"]) < minimo_segundos:
+                continue
+            razon = medida["segundos"] / medida_previa["segundos"]
+            marca = ""
+            if razon > umbral:
+                marca = "  <-- regresión"
+                regresiones.append((caso["familia"], caso["n"], etapa, razon))
+            lineas.append(f"{caso['familia']:<20} n={caso['n']:<5} {etapa:<24} x{razon:6.2f}{marca}")
+    return regresiones, "\n".join(lineas)
+
+
+def imprimir_tabla(resultados):
+    """Imprime un resumen de los tiempos por caso y etapa."""
+    etapas = ["a_postfijo", "agrupar_simbolos", "construir_afn_postfijo", "construir_afn_glushkov", "convertir_afn_a_afd",
+              "construir_afd_posiciones", "construir_afd_derivadas", "minimizar_afd", "compilar_afd", "simulacion",
+              "simulacion_numpy", "simulacion_derivadas",
+              "afd_a_svg", "dibujar_afd"]
+    encabezado = f"{'familia':<20} {'n':>5} {'AFN':>7} {'AFD':>7} {'mín':>7} " + \
+        " ".join(f"{etapa.replace('construir_', '')[:12]:>12}" for etapa in etapas)
+    print(encabezado)
+    for caso in resultados["casos"]:
+        tiempos = []
+        for etapa in etapas:
+            medida = caso["etapas"].get(etapa)
+            tiempos.append(f"{medida['segundos'] * 1000:10.2f}ms" if medida else f"{'-':>12}")
+        print(f"{caso['familia']:<20} {caso['n']:>5} {caso['estados_afn']:>7} {caso['estados_afd']:>7} "
+              f"{caso['estados_afd_minimo']:>7} " + " ".join(tiempos))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline expresión → AFN → AFD → palabras.")
+    parser.add_argument("--familias", nargs="+", choices=sorted(FAMILIAS), default=sorted(FAMILIAS),
+                        help="Familias de expresiones a medir")
+    parser.add_argument("--tamanos", nargs="+", type=int,
+                        help="Tamaños a usar en lugar de los predeterminados de cada familia")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Corridas por etapa")
+    parser.add_argument("--palabras", type=int, default=10000, help="Palabras para la simulación")
+    parser.add_argument("--longitud", type=int, default=32, help="Longitud máxima de las palabras")
+    parser.add_argument("--semilla", type=int, default=1234, help="Semilla de las palabras aleatorias")
+    parser.add_argument("--clasico", dest="compacto", action="store_false",
+                        help="Usa el AFN de objetos Estado en lugar del AFNCompacto")
+    parser.add_argument("--construccion", choices=["thompson", "glushkov", "posiciones", "derivadas"], default="thompson",
+                        help="Construcción del AFD a medir")
+    parser.add_argument("--dibujar", action="store_true", help="Incluye dibujar_afd (requiere matplotlib)")
+    parser.add_argument("--max-estados-dibujo", type=int, default=40,
+                        help="Sólo se dibujan los AFDs con a lo sumo estos estados")
+    parser.add_argument("--ruta-dibujo", default="bench_afd.png", help="Archivo temporal para dibujar_afd")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--umbral", type=float, default=1.25,
+                        help="Razón de tiempo a partir de la cual se marca una regresión")
+    parser.add_argument("--minimo-segundos", type=float, default=0.001,
+                        help="No se comparan las etapas que tardan menos que esto")
+    args = parser.parse_args(argv)
+
+    resultados = {
+        "version": VERSION_FORMATO,
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "parametros": {clave: valor for clave, valor in vars(args).items()
+                       if clave not in ("salida", "comparar")},
+        "casos": [],
+    }
+
+    for familia in args.familias:
+        for n in args.tamanos or FAMILIAS[familia][1]:
+            resultados["casos"].append(ejecutar_caso(familia, n, args))
+
+    imprimir_tabla(resultados)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            anterior = json.load(archivo)
+        regresiones, detalle = comparar(resultados, anterior, args.umbral, args.minimo_segundos)
+        print()
+        print(detalle)
+        if regresiones:
+            print(f"\n{len(regresiones)} etapas empeoraron más de x{args.umbral}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
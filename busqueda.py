@@ -0,0 +1,224 @@
+from afd import AFDCompilado, compilar_afd
+from expresion_regular import LectorSimbolos
+
+MAX_LITERALES = 8  # Con más literales iniciales se prueba posición por posición
+MAX_ESTADOS_REVERSO = 4096  # Estados del AFD inverso que se memorizan; los demás se recalculan
+LECTURAS_POR_CARACTER = 8  # Lectura que se tolera por carácter del texto antes de dejar los literales
+
+def _prefijo_unico(compilado, estado):
+    """Sigue el camino forzado desde un estado: retorna (símbolos, estado) hasta que hay opciones."""
+    k = compilado.num_simbolos
+    tabla = compilado.tabla
+    trampa = compilado.estado_trampa
+    simbolos = []
+    visitados = set()
+    while compilado.finales[estado] != 1 and estado not in visitados:
+        visitados.add(estado)
+        salidas = [(columna, tabla[estado * k + columna]) for columna in range(k)
+                   if tabla[estado * k + columna] != trampa]
+        # Una columna de una clase con varios símbolos ya es una opción
+        if len(salidas) != 1 or len(compilado.simbolos_columna(salidas[0][0])) != 1:
+            break
+        columna, estado = salidas[0]
+        simbolos.append(compilado.simbolos_columna(columna)[0])
+    return simbolos, estado
+
+def literales_iniciales(compilado):
+    """Retorna literales tales que toda coincidencia empieza con alguno, o () si no se pueden usar."""
+    # Si se acepta la palabra vacía hay coincidencia en cualquier posición
+    inicial = compilado.estado_inicial
+    if compilado.finales[inicial] == 1:
+        return ()
+
+    # Un solo camino forzado desde el inicial da un único prefijo obligatorio
+    simbolos, _ = _prefijo_unico(compilado, inicial)
+    if simbolos:
+        return ("".join(simbolos),)
+
+    # Si no, cada símbolo que sale del inicial abre su propio camino forzado
+    k = compilado.num_simbolos
+    literales = []
+    for columna in range(k):
+        destino = compilado.tabla[inicial * k + columna]
+        if destino == compilado.estado_trampa:
+            continue
+        simbolos = compilado.simbolos_columna(columna)
+        if len(literales) + len(simbolos) > MAX_LITERALES:
+            return ()
+        resto = "".join(_prefijo_unico(compilado, destino)[0])
+        literales.extend(simbolo + resto for simbolo in simbolos)
+
+    # Si todo símbolo sale del inicial y ningún literal lo sigue un camino
+    # forzado, cualquier posición es candidata y el filtro no descarta nada
+    if len(literales) == len(compilado.indice_simbolo) and all(len(literal) == 1 for literal in literales):
+        return ()
+    return tuple(literales)
+
+class Buscador:
+    """Busca coincidencias de un AFD dentro de un texto más largo."""
+
+    def __init__(self, afd):
+        self.afd = afd if isinstance(afd, AFDCompilado) else compilar_afd(afd)
+        self.literales = literales_iniciales(self.afd)
+        # Con símbolos de varios caracteres hay que leer el texto símbolo por símbolo
+        self.lector = None
+        if any(len(simbolo) != 1 for simbolo in self.afd.indice_simbolo):
+            self.lector = LectorSimbolos(self.afd.indice_simbolo)
+        else:
+            self._preparar_reverso()
+
+    def _preparar_reverso(self):
+        """Prepara el AFD inverso, con Σ* delante, que marca dónde empiezan las coincidencias."""
+        # Un estado del inverso es la máscara de los estados del AFD desde los
+        # que lo leído (de derecha a izquierda) tiene un prefijo aceptado; una
+        # coincidencia empieza en una posición si la máscara incluye al inicial
+        afd = self.afd
+        k = afd.num_simbolos
+        tabla = afd.tabla
+        trampa = afd.estado_trampa
+        self._predecesores = [[0] * afd.num_estados for _ in range(k)]  # [columna][destino] -> máscara
+        for estado in range(afd.num_estados):
+            if estado == trampa:
+                continue
+            bit = 1 << estado
+            for columna in range(k):
+                destino = tabla[estado * k + columna]
+                if destino != trampa:
+                    self._predecesores[columna][destino] |= bit
+        self._mascara_finales = sum(1 << estado for estado in range(afd.num_estados) if afd.finales[estado] == 1)
+        self._bit_inicial = 1 << afd.estado_inicial
+        self._reverso = {}  # máscara -> [máscara destino por columna, o None si aún no se calculó]
+
+    def _retroceder(self, mascara, columna):
+        """Calcula el estado del AFD inverso al leer un símbolo hacia la izquierda."""
+        predecesores = self._predecesores[columna]
+        destino = self._mascara_finales
+        while mascara:
+            bajo = mascara & -mascara
+            destino |= predecesores[bajo.bit_length() - 1]
+            mascara ^= bajo
+        return destino
+
+    def _inicios(self, texto, desde):
+        """Marca, en una pasada de derecha a izquierda, las posiciones desde las que empieza una coincidencia."""
+        indice_simbolo = self.afd.indice_simbolo
+        reverso = self._reverso
+        finales = self._mascara_finales
+        bit_inicial = self._bit_inicial
+        marcas = bytearray(len(texto) - desde + 1)  # marcas[i] corresponde a texto[desde + i]
+
+        mascara = finales
+        if mascara & bit_inicial:
+            marcas[-1] = 1
+        for i in range(len(texto) - 1, desde - 1, -1):
+            columna = indice_simbolo.get(texto[i])
+            if columna is None:
+                mascara = finales  # Ninguna coincidencia cruza un carácter fuera del alfabeto
+            else:
+                fila = reverso.get(mascara)
+                destino = None if fila is None else fila[columna]
+                if destino is None:
+                    destino = self._retroceder(mascara, columna)
+                    if fila is None and len(reverso) < MAX_ESTADOS_REVERSO:
+                        fila = reverso[mascara] = [None] * len(self._predecesores)
+                    if fila is not None:
+                        fila[columna] = destino
+                mascara = destino
+            if mascara & bit_inicial:
+                marcas[i - desde] = 1
+        return marcas
+
+    def _candidatos(self, texto, desde):
+        """Itera en orden las posiciones desde las que puede empezar una coincidencia."""
+        if not self.literales:
+            yield from range(desde, len(texto) + 1)
+            return
+
+        # Próxima aparición de cada literal; sólo se vuelve a buscar la que quedó atrás
+        proximas = {literal: texto.find(literal, desde) for literal in self.literales}
+        posicion = desde
+        while True:
+            for literal, proxima in proximas.items():
+                if proxima != -1 and proxima < posicion:
+                    proximas[literal] = texto.find(literal, posicion)
+            encontradas = [proxima for proxima in proximas.values() if proxima != -1]
+            if not encontradas:
+                return
+            posicion = min(encontradas)
+            yield posicion
+            posicion += 1
+
+    def coincidencia_mas_larga(self, texto, inicio):
+        """Retorna el fin de la coincidencia más larga que empieza en inicio, o -1 si no hay."""
+        return self._mas_larga(texto, inicio)[0]
+
+    def _mas_larga(self, texto, inicio):
+        """Retorna (fin de la coincidencia más larga o -1, posición donde se dejó de leer)."""
+        afd = self.afd
+        tabla = afd.tabla
+        indice_simbolo = afd.indice_simbolo
+        k = afd.num_simbolos
+        trampa = afd.estado_trampa
+        finales = afd.finales
+        estado = afd.estado_inicial
+        fin = inicio if finales[estado] == 1 else -1
+
+        # Se avanza hasta la trampa o el final del texto, recordando la última aceptación
+        j = inicio
+        if self.lector is None:
+            for j in range(inicio, len(texto)):
+                indice = indice_simbolo.get(texto[j])
+                if indice is None:
+                    break
+                estado = tabla[estado * k + indice]
+                if estado == trampa:
+                    break
+                if finales[estado] == 1:
+                    fin = j + 1
+        else:
+            while j < len(texto):
+                simbolo = self.lector.leer(texto, j)
+                if simbolo is None:
+                    break
+                estado = tabla[estado * k + indice_simbolo[simbolo]]
+                if estado == trampa:
+                    break
+                j += len(simbolo)
+                if finales[estado] == 1:
+                    fin = j
+        return fin, j
+
+    def buscar(self, texto, solapadas=False, desde=0):
+        """Itera los intervalos (inicio, fin) de las coincidencias más a la izquierda y más largas."""
+        # Sin solapamiento, la búsqueda sigue donde terminó la última coincidencia;
+        # con solapamiento, cada posición da su coincidencia más larga
+        siguiente = desde
+        if self.literales or self.lector is not None:
+            # Los literales llevan directo a los candidatos; si entre todos leen
+            # demasiado texto, lo que falta se resuelve con el AFD inverso
+            presupuesto = LECTURAS_POR_CARACTER * (len(texto) - desde + 1)
+            for inicio in self._candidatos(texto, desde):
+                if inicio < siguiente:
+                    continue
+                fin, leido = self._mas_larga(texto, inicio)
+                if fin != -1:
+                    yield inicio, fin
+                siguiente = fin if fin > inicio and not solapadas else inicio + 1
+                presupuesto -= leido - inicio + 1
+                if presupuesto < 0 and self.lector is None:
+                    break
+            else:
+                return
+
+        # Las posiciones sin coincidencia se descartan en una sola pasada, así
+        # que el AFD sólo se avanza desde donde seguro empieza una
+        marcas = self._inicios(texto, siguiente)
+        inicio = marcas.find(1)
+        while inicio != -1:
+            fin = self.coincidencia_mas_larga(texto, siguiente + inicio)
+            yield siguiente + inicio, fin
+            inicio = marcas.find(1, fin - siguiente if fin > siguiente + inicio and not solapadas else inicio + 1)
+
+    def primera(self, texto, desde=0):
+        """Retorna la primera coincidencia (inicio, fin), o None si no hay ninguna."""
+        return next(self.buscar(texto, desde=desde), None)
@@ -0,0 +1,161 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from afn import AFNCompacto
+from derivadas import AFDDerivadas
+
+# Costos aproximados, medidos con tracemalloc: cada transición del AFD, cada
+# estado del AFN dentro de los frozensets del AFD y cada objeto Estado.
+BYTES_POR_TRANSICION_AFD = 100
+BYTES_POR_MIEMBRO_AFD = 90
+BYTES_POR_ESTADO_AFN = 300
+BYTES_POR_ENTRADA_DERIVADAS = 250  # Nodo, derivada o concatenación guardados en una TablaDerivadas
+
+class AutomataCompilado:
+    """Resultado del pipeline completo para un alfabeto y una expresión."""
+
+    def __init__(self, postfijo, afn, afd, afd_compilado, transiciones_afn, transiciones_afd, hash_afd=None,
+                 listado_afn_completo=True, alfabeto=None):
+        self.alfabeto = alfabeto
+        self.postfijo = postfijo
+        self.afn = afn
+        self.afd = afd
+        self.afd_compilado = afd_compilado  # AFDCompilado, o AFDPerezoso/AFDDerivadas si afd es None
+        self.transiciones_afn = transiciones_afn
+        self.listado_afn_completo = listado_afn_completo  # False si transiciones_afn es sólo la primera página
+        self.transiciones_afd = transiciones_afd
+        self.hash_afd = hash_afd  # Identifica la imagen del AFD en el renderizador
+        self.svg = None  # Diagrama SVG del AFD, generado la primera vez que se muestra
+        self.buscador = None  # Buscador de subcadenas, creado en la primera búsqueda
+
+def clave_automata(alfabeto, expresion, *opciones):
+    """Normaliza el alfabeto y la expresión para usarlos como clave del caché."""
+    return (tuple(sorted(alfabeto)), expresion.strip()) + opciones
+
+def id_automata(clave):
+    """Identificador estable de una clave del caché, igual en todos los procesos del servidor."""
+    return hashlib.sha256(repr(clave).encode("utf-8")).hexdigest()[:20]
+
+def estimar_bytes(automata):
+    """Estima la memoria que ocupa un AutomataCompilado."""
+    total = sys.getsizeof(automata.postfijo)
+    total += sys.getsizeof(automata.transiciones_afn) + sys.getsizeof(automata.transiciones_afd)
+
+    afn = automata.afn
+    if isinstance(afn, AFNCompacto):
+        total += afn.num_estados * 4 * afn.simbolo.itemsize
+        if afn.cerraduras is not None:
+            # Cada máscara es tan ancha como el número de su estado
+            total += sys.getsizeof(afn.cerraduras) + sum(sys.getsizeof(mascara) for mascara in afn.cerraduras)
+    elif afn is not None:  # Con derivadas no hay AFN
+        total += len(afn.obtener_todos_estados()) * BYTES_POR_ESTADO_AFN
+
+    afd = automata.afd
+    compilado = automata.afd_compilado
+    if afd is None:
+        # Los motores perezosos crecen con el uso: se cuentan las transiciones
+        # ya materializadas y CacheAutomatas.actualizar vuelve a medirlos. La
+        # copia de las filas se hace de una vez, sin soltar el GIL, por si otro
+        # hilo agrega estados mientras tanto.
+        filas = list(compilado.transiciones.values())
+        total += (len(filas) + sum(len(fila) for fila in filas)) * BYTES_POR_TRANSICION_AFD
+        if isinstance(compilado, AFDDerivadas):
+            # Las expresiones y sus memorias siguen creciendo aunque el AFD se llene
+            total += compilado.expresiones.entradas() * BYTES_POR_ENTRADA_DERIVADAS
+        return total
+
+    total += len(afd.transiciones) * BYTES_POR_TRANSICION_AFD
+    # Los estados del AFD por derivadas son expresiones, no conjuntos de estados del AFN
+    total += sum(len(estado) if isinstance(estado, frozenset) else 1 for estado in afd.estados) * BYTES_POR_MIEMBRO_AFD
+
+    total += len(compilado.tabla) * compilado.tabla.itemsize + len(compilado.finales)
+    total += sum(sys.getsizeof(nombre) for nombre in compilado.nombres)
+    return total
+
+class CacheAutomatas:
+    """Caché LRU de autómatas compilados, acotado por entradas y por bytes."""
+
+    def __init__(self, max_entradas=128, max_bytes=64 * 1024 * 1024, medir=estimar_bytes):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.medir = medir
+        self._entradas = OrderedDict()  # clave -> (valor, bytes); el más reciente al final
+        self._lock = threading.Lock()
+        self.bytes_usados = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave):
+        """Retorna el valor guardado para la clave, o None si no está."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def guardar(self, clave, valor):
+        """Guarda un valor y desaloja los menos usados si se exceden los límites."""
+        tamano = self.medir(valor)
+        if tamano > self.max_bytes:
+            return False
+
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self.bytes_usados -= anterior[1]
+
+            self._entradas[clave] = (valor, tamano)
+            self.bytes_usados += tamano
+            self._desalojar()
+        return True
+
+    def actualizar(self, clave):
+        """Vuelve a medir un valor que creció después de guardarlo; retorna False si ya no está."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+        if entrada is None:
+            return False
+        tamano = self.medir(entrada[0])
+
+        with self._lock:
+            if self._entradas.get(clave) is not entrada:
+                return clave in self._entradas  # Otro hilo lo reemplazó o lo desalojó
+            self.bytes_usados += tamano - entrada[1]
+            if tamano > self.max_bytes:
+                del self._entradas[clave]
+                self.bytes_usados -= tamano
+                self.desalojos += 1
+                return False
+            self._entradas[clave] = (entrada[0], tamano)
+            self._entradas.move_to_end(clave)
+            self._desalojar()
+        return True
+
+    def _desalojar(self):
+        """Desaloja los menos usados mientras se excedan los límites; se llama con el lock tomado."""
+        while len(self._entradas) > self.max_entradas or self.bytes_usados > self.max_bytes:
+            _, (_, tamano_desalojado) = self._entradas.popitem(last=False)
+            self.bytes_usados -= tamano_desalojado
+            self.desalojos += 1
+
+    def estadisticas(self):
+        """Retorna los contadores del caché."""
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self.bytes_usados,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+            }
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, clave):
+        return clave in self._entradas
@@ -0,0 +1,101 @@
+from expresion_regular import ConjuntoSimbolos
+
+def _escapar(caracter):
+    """Muestra un carácter no imprimible como escape \\xHH, \\uHHHH o \\UHHHHHHHH."""
+    if caracter.isprintable():
+        return caracter
+    punto = ord(caracter)
+    if punto < 0x100:
+        return f"\\x{punto:02x}"
+    if punto < 0x10000:
+        return f"\\u{punto:04x}"
+    return f"\\U{punto:08x}"
+
+def etiqueta_clase(simbolos):
+    """Nombre de una clase de símbolos: el símbolo si es uno solo, o [...] con rangos de caracteres."""
+    if len(simbolos) == 1:
+        return "".join(_escapar(c) for c in next(iter(simbolos)))
+
+    # Los caracteres consecutivos se juntan en rangos x-y; los símbolos de
+    # varios caracteres van al final separados por comas
+    puntos = sorted(ord(simbolo) for simbolo in simbolos if len(simbolo) == 1)
+    partes = []
+    i = 0
+    while i < len(puntos):
+        j = i
+        while j + 1 < len(puntos) and puntos[j + 1] == puntos[j] + 1:
+            j += 1
+        if j - i >= 2:
+            partes.append(f"{_escapar(chr(puntos[i]))}-{_escapar(chr(puntos[j]))}")
+        else:
+            partes.extend(_escapar(chr(punto)) for punto in puntos[i:j + 1])
+        i = j + 1
+    largos = sorted(simbolo for simbolo in simbolos if len(simbolo) != 1)
+    texto = "".join(partes)
+    if largos:
+        texto = ",".join(([texto] if texto else []) + ["".join(_escapar(c) for c in s) for s in largos])
+    return f"[{texto}]"
+
+def nombrar_clases(grupos):
+    """Da una etiqueta única a cada grupo de símbolos; retorna etiqueta -> tupla de símbolos."""
+    clases = {}
+    for simbolos in sorted((sorted(grupo) for grupo in grupos), key=lambda simbolos: simbolos[0]):
+        etiqueta = etiqueta_clase(simbolos)
+        if etiqueta in clases:
+            etiqueta = f"{etiqueta}#{len(clases)}"
+        clases[etiqueta] = tuple(simbolos)
+    return clases
+
+def agrupar_simbolos(postfijos, alfabeto=None):
+    """Reescribe expresiones postfijas sobre clases de símbolos; retorna (postfijos, clases)."""
+    # Dos símbolos son equivalentes si aparecen en exactamente las mismas hojas
+    # de las expresiones (un símbolo suelto o una clase [...]): ningún autómata
+    # construido con ellas los distingue, así que basta una columna por clase.
+    # Los símbolos del alfabeto que ninguna hoja usa forman una clase más, que
+    # sólo lleva a la trampa. clases: etiqueta -> tupla de símbolos de la clase.
+    postfijos = [list(postfijo) for postfijo in postfijos]
+    hojas = {}  # conjunto de símbolos de una hoja -> número
+    for postfijo in postfijos:
+        for c in postfijo:
+            if c not in ("*", ".", "|"):
+                hojas.setdefault(c if isinstance(c, ConjuntoSimbolos) else frozenset((c,)), len(hojas))
+
+    firmas = {}  # símbolo -> hojas que lo contienen
+    for hoja, numero in hojas.items():
+        for simbolo in hoja:
+            firmas.setdefault(simbolo, []).append(numero)
+    grupos = {}
+    for simbolo, firma in firmas.items():
+        grupos.setdefault(tuple(firma), []).append(simbolo)
+    miembros = list(grupos.values())
+    if alfabeto is not None:
+        resto = [simbolo for simbolo in alfabeto if simbolo and simbolo not in firmas]
+        if resto:
+            miembros.append(resto)
+
+    clases = nombrar_clases(miembros)
+    clase_de = {simbolo: etiqueta for etiqueta, simbolos in clases.items() for simbolo in simbolos}
+
+    # Cada hoja se vuelve la unión de las clases que cubre
+    uniones = {}
+    reescritos = []
+    for postfijo in postfijos:
+        nuevo = []
+        for c in postfijo:
+            if c in ("*", ".", "|"):
+                nuevo.append(c)
+            elif not isinstance(c, ConjuntoSimbolos):
+                nuevo.append(clase_de[c])
+            else:
+                union = uniones.get(c)
+                if union is None:
+                    etiquetas = sorted({clase_de[simbolo] for simbolo in c})
+                    union = uniones[c] = etiquetas[:1] + [x for e in etiquetas[1:] for x in (e, "|")]
+                nuevo.extend(union)
+        reescritos.append(nuevo)
+    return reescritos, clases
+
+def agrupar_postfijo(postfijo, alfabeto=None):
+    """Reescribe una expresión postfija sobre clases de símbolos; retorna (postfijo, clases)."""
+    (postfijo,), clases = agrupar_simbolos([postfijo], alfabeto)
+    return postfijo, clases
@@ -0,0 +1,59 @@
+from expresion_regular import a_postfijo
+from glushkov import construir_afn_glushkov, construir_afd_posiciones
+from afd import convertir_afn_a_afd, compilar_afd
+from clases import agrupar_postfijo
+from derivadas import construir_afd_derivadas
+from minimizacion import minimizar_afd
+from subexpresiones import TablaSubexpresiones, construir_afn_subexpresion
+from thompson import construir_afn_compacto_postfijo
+
+# Construcciones disponibles para pasar de la expresión al AFD
+CONSTRUCCIONES = ("thompson", "glushkov", "posiciones", "derivadas")
+
+# Con más estados de Thompson que esto, si no se piden las cerraduras, el AFN
+# se arma directamente: las máscaras de las subexpresiones crecen con el
+# cuadrado del tamaño. Con cerraduras conviene igual pasar por el árbol, que
+# las calcula mucho más rápido que recorrer el AFN desde cada estado.
+MAX_ESTADOS_SUBEXPRESIONES = 10000
+
+# Subexpresiones compartidas por todas las compilaciones del proceso: al editar
+# una expresión sólo se crean las subexpresiones que cambiaron
+tabla_subexpresiones = TablaSubexpresiones()
+
+def estados_thompson(postfijo):
+    """Cantidad de estados del AFN de Thompson de una expresión en notación postfija."""
+    # Cada símbolo, unión y estrella agrega dos estados; la concatenación ninguno
+    return 2 * sum(1 for c in postfijo if c != ".")
+
+def construir_afn_thompson(postfijo, alfabeto, con_cerraduras=False):
+    """Construye el AFNCompacto de Thompson pasando por las subexpresiones compartidas."""
+    # con_cerraduras deja calculadas las cerraduras epsilon para la
+    # construcción por subconjuntos
+    if not con_cerraduras and estados_thompson(postfijo) > MAX_ESTADOS_SUBEXPRESIONES:
+        return construir_afn_compacto_postfijo(postfijo, alfabeto)
+    return construir_afn_subexpresion(tabla_subexpresiones.desde_postfijo(postfijo), alfabeto, con_cerraduras)
+
+def construir_afd(postfijo, alfabeto, construccion="thompson"):
+    """Construye el AFD de una expresión en notación postfija con la construcción elegida."""
+    # La construcción va sobre las clases de símbolos que la expresión distingue,
+    # no sobre cada símbolo del alfabeto
+    postfijo, clases = agrupar_postfijo(postfijo, alfabeto)
+    if construccion == "thompson":
+        afd = convertir_afn_a_afd(construir_afn_thompson(postfijo, set(clases), con_cerraduras=True))
+    elif construccion == "glushkov":
+        afd = convertir_afn_a_afd(construir_afn_glushkov(postfijo, set(clases)))
+    elif construccion == "posiciones":
+        afd = construir_afd_posiciones(postfijo, set(clases))
+    elif construccion == "derivadas":
+        afd = construir_afd_derivadas(postfijo, set(clases))
+    else:
+        raise ValueError(f"Construcción desconocida: {construccion}")
+    afd.clases = clases
+    return afd
+
+def compilar_expresion(expresion, alfabeto, minimizar=False, construccion="thompson"):
+    """Construye el AFD compilado de una expresión regular; lanza ErrorExpresion si no es válida."""
+    afd = construir_afd(a_postfijo(expresion, alfabeto), alfabeto, construccion)
+    if minimizar:
+        afd = minimizar_afd(afd)
+    return compilar_afd(afd)
@@ -0,0 +1,350 @@
+import threading
+from collections import deque
+from afd import AFD
+
+MAX_MEMORIA_DERIVADAS = 1 << 18  # Derivadas y concatenaciones memorizadas una vez lleno el AFD
+
+class ExpresionNormal:
+    """Expresión normalizada y única dentro de su tabla; sus derivadas también lo son."""
+    __slots__ = ("tipo", "simbolo", "hijos", "id", "anulable")
+
+    def __init__(self, tipo, simbolo, hijos, identificador):
+        self.tipo = tipo  # "vacio", "epsilon", "simbolo", ".", "|" o "*"
+        self.simbolo = simbolo
+        self.hijos = hijos
+        self.id = identificador
+        if tipo == "epsilon" or tipo == "*":
+            self.anulable = True
+        elif tipo == ".":
+            self.anulable = hijos[0].anulable and hijos[1].anulable
+        elif tipo == "|":
+            self.anulable = any(hijo.anulable for hijo in hijos)
+        else:
+            self.anulable = False
+
+    def __repr__(self):
+        if self.tipo == "simbolo":
+            return f"ExpresionNormal({self.simbolo!r})"
+        return f"ExpresionNormal({self.tipo!r}, id={self.id})"
+
+class TablaDerivadas:
+    """Construye expresiones normalizadas y memoriza sus derivadas por símbolo."""
+
+    # Los constructores simplifican al crear (∅ absorbe la concatenación, ε es
+    # su neutro, la concatenación se asocia a la derecha, la unión se aplana,
+    # se ordena y no repite opciones, (r*)* = r*), así que dos derivadas
+    # equivalentes por esas reglas son el mismo objeto y la cantidad de
+    # derivadas distintas de una expresión es finita. Al derivar, además, una
+    # unión se reparte sobre lo que sigue (ver concatenar_derivada).
+    def __init__(self):
+        self._nodos = {}  # (tipo, símbolo, ids de hijos) -> ExpresionNormal
+        self.por_id = []  # por_id[id] -> ExpresionNormal
+        self._derivadas = {}  # (id, símbolo) -> derivada
+        self._concatenaciones = {}  # (id de a, id de b) -> a.b, con a una concatenación
+        self._lock = threading.RLock()  # La tabla se comparte entre los hilos del servidor
+        self.vacio = self._nodo("vacio")  # El lenguaje vacío tiene el id 0
+        self.epsilon = self._nodo("epsilon")
+
+    def __len__(self):
+        return len(self.por_id)
+
+    def entradas(self):
+        """Cantidad de nodos, derivadas y concatenaciones guardados en la tabla."""
+        return len(self._nodos) + len(self._derivadas) + len(self._concatenaciones)
+
+    def acotar_memorias(self, maximo):
+        """Vacía las derivadas y concatenaciones memorizadas si pasan de maximo; los nodos se conservan."""
+        # Los nodos no se pueden olvidar: sus ids son los estados del AFD
+        if len(self._derivadas) + len(self._concatenaciones) > maximo:
+            with self._lock:
+                self._derivadas.clear()
+                self._concatenaciones.clear()
+
+    def _nodo(self, tipo, simbolo=None, hijos=()):
+        clave = (tipo, simbolo, tuple(hijo.id for hijo in hijos))
+        nodo = self._nodos.get(clave)
+        if nodo is None:
+            with self._lock:
+                nodo = self._nodos.get(clave)
+                if nodo is None:
+                    nodo = self._nodos[clave] = ExpresionNormal(tipo, simbolo, hijos, len(self.por_id))
+                    self.por_id.append(nodo)
+        return nodo
+
+    def simbolo(self, simbolo):
+        return self._nodo("simbolo", simbolo)
+
+    def concatenar(self, a, b):
+        """Concatenación simplificada de dos expresiones."""
+        if a is self.vacio or b is self.vacio:
+            return self.vacio
+        if a is self.epsilon:
+            return b
+        if b is self.epsilon:
+            return a
+
+        # a.b se arma reemplazando el último factor de la cadena a; cada sufijo
+        # de a seguido de b se memoriza, así que las derivadas que comparten
+        # sufijo no rehacen la cadena entera
+        memoria = self._concatenaciones
+        sufijos = []
+        actual = a
+        with self._lock:
+            while actual.tipo == "." and (actual.id, b.id) not in memoria:
+                sufijos.append(actual)
+                actual = actual.hijos[1]
+            if actual.tipo == ".":
+                resultado = memoria[(actual.id, b.id)]
+            else:
+                resultado = self._nodo(".", hijos=(actual, b))
+            for sufijo in reversed(sufijos):
+                resultado = memoria[(sufijo.id, b.id)] = self._nodo(".", hijos=(sufijo.hijos[0], resultado))
+        return resultado
+
+    def concatenar_factores(self, factores, final):
+        """Concatena los factores delante de final, asociando a la derecha."""
+        # Los factores que ya son concatenaciones se abren para que la cadena
+        # quede siempre a.(b.(c...))
+        abiertos = []
+        for factor in factores:
+            while factor.tipo == ".":
+                abiertos.append(factor.hijos[0])
+                factor = factor.hijos[1]
+            abiertos.append(factor)
+        resultado = final
+        for factor in reversed(abiertos):
+            if factor is self.vacio or resultado is self.vacio:
+                return self.vacio
+            if factor is not self.epsilon:
+                resultado = factor if resultado is self.epsilon else self._nodo(".", hijos=(factor, resultado))
+        return resultado
+
+    def concatenar_derivada(self, derivada, resto):
+        """Concatena una derivada con lo que falta, repartiendo si la derivada es una unión."""
+        # (x|y)s = xs|ys: así las derivadas son uniones de términos "algo por un
+        # sufijo de la expresión", que se comparten, y (ε|x)s y s|xs resultan
+        # el mismo estado. Sólo se reparte aquí, no al leer la expresión, donde
+        # (a|b)(a|b)... crecería exponencialmente.
+        if derivada.tipo == "|":
+            return self.unir([self.concatenar(opcion, resto) for opcion in derivada.hijos])
+        return self.concatenar(derivada, resto)
+
+    def unir(self, opciones):
+        """Unión simplificada: sin ∅, sin repetidos y en un orden fijo."""
+        unicas = {}
+        pendientes = list(opciones)
+        while pendientes:
+            opcion = pendientes.pop()
+            if opcion.tipo == "|":
+                pendientes.extend(opcion.hijos)
+            elif opcion is not self.vacio:
+                unicas[opcion.id] = opcion
+        # ε sobra si otra opción ya acepta la palabra vacía
+        if self.epsilon.id in unicas and any(o.anulable for o in unicas.values() if o is not self.epsilon):
+            del unicas[self.epsilon.id]
+        if not unicas:
+            return self.vacio
+        if len(unicas) == 1:
+            return next(iter(unicas.values()))
+        return self._nodo("|", hijos=tuple(unicas[i] for i in sorted(unicas)))
+
+    def estrella(self, a):
+        """Estrella simplificada: ∅* = ε* = ε, (r*)* = r* y (ε|r)* = r*."""
+        if a is self.vacio or a is self.epsilon:
+            return self.epsilon
+        if a.tipo == "*":
+            return a
+        if a.tipo == "|" and a.hijos[0] is self.epsilon:  # ε tiene el id más bajo después de ∅
+            a = self.unir(a.hijos[1:])
+        return self._nodo("*", hijos=(a,))
+
+    def desde_postfijo(self, postfijo):
+        """Construye la expresión normalizada de una expresión en notación postfija."""
+        # Las concatenaciones se juntan en listas y se arman una sola vez, para
+        # no reasociar la cadena entera con cada símbolo
+        pila = []
+
+        def armar(elemento):
+            if isinstance(elemento, list):
+                return self.concatenar_factores(elemento[:-1], elemento[-1])
+            return elemento
+
+        for c in postfijo:
+            if c not in {"*", ".", "|"}:  # Si es un símbolo del alfabeto
+                pila.append(self.simbolo(c))
+            elif c == "*":
+                pila.append(self.estrella(armar(pila.pop())))
+            elif c == ".":
+                b = pila.pop()
+                a = pila.pop()
+                factores = a if isinstance(a, list) else [a]
+                factores.extend(b if isinstance(b, list) else [b])
+                pila.append(factores)
+            else:
+                b = armar(pila.pop())
+                a = armar(pila.pop())
+                pila.append(self.unir((a, b)))
+        return armar(pila[0])
+
+    def _necesarias(self, nodo):
+        """Subexpresiones cuya derivada hace falta para derivar nodo."""
+        if nodo.tipo == ".":
+            return nodo.hijos if nodo.hijos[0].anulable else nodo.hijos[:1]
+        if nodo.tipo == "|" or nodo.tipo == "*":
+            return nodo.hijos
+        return ()
+
+    def derivar(self, expresion, simbolo):
+        """Retorna la derivada de la expresión respecto al símbolo, memorizada."""
+        memoria = self._derivadas
+        resultado = memoria.get((expresion.id, simbolo))
+        if resultado is not None:
+            return resultado
+
+        # Una sola derivación a la vez: los hilos que comparten el autómata no
+        # deben ver a medias la memoria ni numerar dos veces el mismo nodo
+        with self._lock:
+            # Recorrido en postorden con pila explícita: las subexpresiones se
+            # derivan antes que quien las usa, y lo ya derivado no se repite
+            pila = [expresion]
+            while pila:
+                nodo = pila[-1]
+                if (nodo.id, simbolo) in memoria:
+                    pila.pop()
+                    continue
+                faltan = [hijo for hijo in self._necesarias(nodo) if (hijo.id, simbolo) not in memoria]
+                if faltan:
+                    pila.extend(faltan)
+                    continue
+                pila.pop()
+
+                if nodo.tipo == "simbolo":
+                    derivada = self.epsilon if nodo.simbolo == simbolo else self.vacio
+                elif nodo.tipo == ".":
+                    # d(rs) = d(r)s | d(s) si r acepta la palabra vacía
+                    r, s = nodo.hijos
+                    derivada = self.concatenar_derivada(memoria[(r.id, simbolo)], s)
+                    if r.anulable:
+                        derivada = self.unir((derivada, memoria[(s.id, simbolo)]))
+                elif nodo.tipo == "|":
+                    derivada = self.unir([memoria[(hijo.id, simbolo)] for hijo in nodo.hijos])
+                elif nodo.tipo == "*":
+                    # d(r*) = d(r)r*
+                    derivada = self.concatenar_derivada(memoria[(nodo.hijos[0].id, simbolo)], nodo)
+                else:  # ∅ y ε
+                    derivada = self.vacio
+                memoria[(nodo.id, simbolo)] = derivada
+            return memoria[(expresion.id, simbolo)]
+
+class AFDDerivadas:
+    """Reconoce palabras derivando la expresión símbolo a símbolo, sin construir un AFN."""
+
+    # Cada estado es el id de una derivada de la expresión; el id 0 (∅) hace
+    # de estado trampa. Las transiciones se memorizan a medida que las palabras
+    # las recorren, así que el AFD crece sólo hasta donde lo piden las entradas.
+
+    def __init__(self, postfijo, alfabeto, max_estados=4096, clases=None):
+        self.alfabeto = sorted(alfabeto)
+        self._simbolos = set(self.alfabeto)
+        # Si la expresión va por clases de símbolos, cada símbolo se traduce a su etiqueta
+        self.clases = clases
+        self.clase_de = None
+        if clases is not None:
+            self.clase_de = {simbolo: etiqueta for etiqueta, simbolos in clases.items() for simbolo in simbolos}
+        self.expresiones = TablaDerivadas()
+        self.estado_inicial = self.expresiones.desde_postfijo(postfijo).id
+        self.estado_trampa = self.expresiones.vacio.id
+        self.max_estados = max_estados
+        self.transiciones = {}  # estado materializado -> {simbolo: estado}
+        self._nombres = {self.estado_inicial: "q0", self.estado_trampa: "qT"}
+        self.pasos_sin_cache = 0  # Pasos resueltos derivando sin guardar la transición
+        self._lock = threading.Lock()  # El autómata se comparte entre los hilos del servidor
+
+    @property
+    def num_estados(self):
+        """Cantidad de estados del AFD materializados hasta ahora."""
+        return len(self.transiciones)
+
+    def siguiente(self, estado, simbolo):
+        """Retorna el estado destino, o None si el símbolo no está en el alfabeto."""
+        if self.clase_de is not None:
+            simbolo = self.clase_de.get(simbolo)
+        if simbolo not in self._simbolos:
+            return None
+
+        fila = self.transiciones.get(estado)
+        if fila is not None:
+            destino = fila.get(simbolo)
+            if destino is not None:
+                return destino
+
+        expresiones = self.expresiones
+        destino = expresiones.derivar(expresiones.por_id[estado], simbolo).id
+        with self._lock:
+            fila = self.transiciones.get(estado)
+            if fila is None:
+                if len(self.transiciones) >= self.max_estados:
+                    # Con el AFD lleno las memorias de la tabla seguirían creciendo
+                    # sin límite; se vacían cuando pasan el tope
+                    self.pasos_sin_cache += 1
+                    expresiones.acotar_memorias(MAX_MEMORIA_DERIVADAS)
+                    return destino
+                fila = self.transiciones[estado] = {}
+            fila[simbolo] = destino
+        return destino
+
+    def es_final(self, estado):
+        return self.expresiones.por_id[estado].anulable
+
+    def obtener_nombre_estado(self, estado):
+        """Obtiene un nombre para el estado en el orden en que se alcanzó."""
+        nombre = self._nombres.get(estado)
+        if nombre is None:
+            with self._lock:
+                nombre = self._nombres.get(estado)
+                if nombre is None:
+                    nombre = self._nombres[estado] = f"q{len(self._nombres) - 1}"
+        return nombre
+
+    def match(self, palabra):
+        """Indica si la palabra es aceptada, sin construir el recorrido."""
+        siguiente = self.siguiente
+        estado = self.estado_inicial
+        for simbolo in palabra:
+            estado = siguiente(estado, simbolo)
+            if not estado:  # None (símbolo inválido) o el estado trampa
+                return False
+        return self.es_final(estado)
+
+    def match_many(self, palabras):
+        """Evalúa una colección de palabras y retorna una lista de booleanos."""
+        return [self.match(palabra) for palabra in palabras]
+
+def construir_afd_derivadas(postfijo, alfabeto):
+    """Construye el AFD de una expresión en notación postfija con derivadas de Brzozowski."""
+    # Cada estado es una derivada distinta; con las simplificaciones el AFD
+    # suele quedar cerca del mínimo
+    expresiones = TablaDerivadas()
+    simbolos = sorted(alfabeto)
+    inicial = expresiones.desde_postfijo(postfijo)
+
+    afd = AFD()
+    afd.estado_inicial = inicial
+    afd.estado_trampa = expresiones.vacio
+    afd.estados.append(inicial)
+    vistos = {inicial}
+    cola = deque([inicial])
+    while cola:
+        estado = cola.popleft()
+        if estado.anulable:
+            afd.estados_finales.add(estado)
+        for simbolo in simbolos:
+            destino = expresiones.derivar(estado, simbolo)
+            afd.transiciones[(estado, simbolo)] = destino
+            if destino not in vistos:
+                vistos.add(destino)
+                afd.estados.append(destino)
+                cola.append(destino)
+
+    afd.agregar_estado_trampa(simbolos)
+    return afd
@@ -0,0 +1,146 @@
+import math
+from collections import deque
+from html import escape
+
+# Medidas del SVG, en píxeles
+RADIO = 22
+SEPARACION_COLUMNAS = 140
+SEPARACION_FILAS = 90
+MARGEN = 70
+
+def aristas_agrupadas(afd):
+    """Agrupa las transiciones del AFD por par de estados: (origen, destino) -> [símbolos]."""
+    aristas = {}
+    for (origen, simbolo), destino in afd.transiciones.items():
+        aristas.setdefault((origen, destino), []).append(simbolo)
+    for simbolos in aristas.values():
+        simbolos.sort()
+    return aristas
+
+def estados_en_orden(afd):
+    """Ordena los estados en anchura desde el inicial, con el estado trampa al final."""
+    vecinos = {}
+    for (origen, _), destino in sorted(afd.transiciones.items(), key=lambda x: x[0][1]):
+        vecinos.setdefault(origen, []).append(destino)
+
+    niveles = {afd.estado_inicial: 0}
+    cola = deque([afd.estado_inicial])
+    while cola:
+        estado = cola.popleft()
+        for destino in vecinos.get(estado, []):
+            if destino not in niveles and destino != afd.estado_trampa:
+                niveles[destino] = niveles[estado] + 1
+                cola.append(destino)
+
+    # Los estados no alcanzables quedan en la última columna
+    ultimo = max(niveles.values()) + 1
+    for estado in afd.estados:
+        if estado not in niveles and estado != afd.estado_trampa:
+            niveles[estado] = ultimo
+    if afd.estado_trampa in afd.estados:
+        niveles[afd.estado_trampa] = max(niveles.values()) + 1
+    return niveles
+
+def _texto_dot(texto):
+    return '"' + str(texto).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def afd_a_dot(afd):
+    """Genera la descripción del AFD en el lenguaje DOT de Graphviz."""
+    lineas = ["digraph AFD {", "    rankdir=LR;", "    node [shape=circle];",
+              "    inicio [shape=point];"]
+
+    for estado in afd.estados:
+        atributos = []
+        if estado in afd.estados_finales:
+            atributos.append("shape=doublecircle")
+        if estado == afd.estado_inicial:
+            atributos.append("style=filled, fillcolor=lightgreen")
+        elif estado == afd.estado_trampa:
+            atributos.append("style=filled, fillcolor=lightgray")
+        elif estado in afd.estados_finales:
+            atributos.append("style=filled, fillcolor=lightblue")
+        nombre = _texto_dot(afd.obtener_nombre_estado(estado))
+        lineas.append(f"    {nombre} [{', '.join(atributos)}];" if atributos else f"    {nombre};")
+
+    lineas.append(f"    inicio -> {_texto_dot(afd.obtener_nombre_estado(afd.estado_inicial))};")
+    for (origen, destino), simbolos in aristas_agrupadas(afd).items():
+        lineas.append(f"    {_texto_dot(afd.obtener_nombre_estado(origen))} -> "
+                      f"{_texto_dot(afd.obtener_nombre_estado(destino))} "
+                      f"[label={_texto_dot(', '.join(simbolos))}];")
+    lineas.append("}")
+    return "\n".join(lineas) + "\n"
+
+def afd_a_svg(afd):
+    """Dibuja el AFD como SVG con los estados en columnas por distancia al inicial."""
+    # Sin simulación física: cada estado va en la columna de su distancia al
+    # inicial, en el orden en que se descubrió
+    niveles = estados_en_orden(afd)
+    filas = {}
+    posiciones = {}
+    for estado, nivel in niveles.items():
+        fila = filas.get(nivel, 0)
+        filas[nivel] = fila + 1
+        posiciones[estado] = (MARGEN + nivel * SEPARACION_COLUMNAS, MARGEN + fila * SEPARACION_FILAS)
+
+    ancho = MARGEN * 2 + max(niveles.values()) * SEPARACION_COLUMNAS
+    alto = MARGEN * 2 + (max(filas.values()) - 1) * SEPARACION_FILAS
+    partes = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" class="diagrama-afd" width="{ancho}" height="{alto}" '
+        f'viewBox="0 0 {ancho} {alto}" font-family="sans-serif" font-size="13">',
+        '<defs><marker id="flecha" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="7" markerHeight="7" '
+        'orient="auto-start-reverse"><path d="M0,0 L10,5 L0,10 z" fill="black"/></marker></defs>',
+    ]
+
+    # Aristas: las de ida y vuelta entre dos estados se curvan hacia lados opuestos
+    for (origen, destino), simbolos in aristas_agrupadas(afd).items():
+        etiqueta = escape(", ".join(simbolos))
+        x1, y1 = posiciones[origen]
+        if origen == destino:
+            partes.append(f'<path d="M{x1 - 9},{y1 - RADIO + 3} C{x1 - 32},{y1 - RADIO - 45} '
+                          f'{x1 + 32},{y1 - RADIO - 45} {x1 + 9},{y1 - RADIO + 3}" fill="none" '
+                          f'stroke="black" marker-end="url(#flecha)"/>')
+            partes.append(f'<text x="{x1}" y="{y1 - RADIO - 38}" text-anchor="middle" fill="red">{etiqueta}</text>')
+            continue
+
+        x2, y2 = posiciones[destino]
+        distancia = math.hypot(x2 - x1, y2 - y1)
+        curvatura = 15 + 0.15 * distancia
+        cx = (x1 + x2) / 2 + (y2 - y1) / distancia * curvatura
+        cy = (y1 + y2) / 2 - (x2 - x1) / distancia * curvatura
+
+        # Los extremos quedan en el borde de cada círculo, en dirección al punto de control
+        def borde(x, y):
+            d = math.hypot(cx - x, cy - y) or 1
+            return x + (cx - x) / d * RADIO, y + (cy - y) / d * RADIO
+
+        sx, sy = borde(x1, y1)
+        ex, ey = borde(x2, y2)
+        partes.append(f'<path d="M{sx:.1f},{sy:.1f} Q{cx:.1f},{cy:.1f} {ex:.1f},{ey:.1f}" fill="none" '
+                      f'stroke="black" marker-end="url(#flecha)"/>')
+        mx = 0.25 * sx + 0.5 * cx + 0.25 * ex
+        my = 0.25 * sy + 0.5 * cy + 0.25 * ey
+        partes.append(f'<text x="{mx:.1f}" y="{my - 4:.1f}" text-anchor="middle" fill="red">{etiqueta}</text>')
+
+    # Flecha de entrada al estado inicial
+    x, y = posiciones[afd.estado_inicial]
+    partes.append(f'<line x1="{x - RADIO - 35}" y1="{y}" x2="{x - RADIO}" y2="{y}" stroke="black" '
+                  f'marker-end="url(#flecha)"/>')
+
+    # Estados, con los mismos colores que dibujar_afd
+    for estado, (x, y) in posiciones.items():
+        if estado == afd.estado_inicial:
+            color = "lightgreen"
+        elif estado == afd.estado_trampa:
+            color = "lightgray"
+        elif estado in afd.estados_finales:
+            color = "lightblue"
+        else:
+            color = "white"
+        partes.append(f'<circle cx="{x}" cy="{y}" r="{RADIO}" fill="{color}" stroke="black"/>')
+        if estado in afd.estados_finales:
+            partes.append(f'<circle cx="{x}" cy="{y}" r="{RADIO - 4}" fill="none" stroke="black"/>')
+        partes.append(f'<text x="{x}" y="{y + 5}" text-anchor="middle" font-weight="bold">'
+                      f'{escape(afd.obtener_nombre_estado(estado))}</text>')
+
+    partes.append("</svg>")
+    return "\n".join(partes) + "\n"
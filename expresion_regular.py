@@ -1,49 +1,257 @@
-def insertar_concatenacion(expresion):
-    """Inserta el operador de concatenación (.) explícitamente en la expresión regular."""
-    resultado = []
-    for i in range(len(expresion)):
-        resultado.append(expresion[i])
-        if i + 1 < len(expresion):
-            actual = expresion[i]
-            siguiente = expresion[i + 1]
-            # Insertar '.' si es necesario
-            if (actual.isalnum() or actual == "*" or actual == ")") and \
-               (siguiente.isalnum() or siguiente == "("):
-                resultado.append(".")
-    return "".join(resultado)
-
-def a_postfijo(expresion):
-    """Convierte una expresión regular a notación postfija usando el algoritmo Shunting-yard."""
-    # Primero insertamos la concatenación explícita
-    expresion = insertar_concatenacion(expresion)
-    
-    precedencia = {"*": 3, ".": 2, "|": 1}
-    salida = []
-    pila = []
-
-    for c in expresion:
-        if c.isalnum():  # Si es un símbolo del alfabeto
-            salida.append(c)
-        elif c == "(":
-            pila.append(c)
+import re
+
+OPERADORES = {"*", "|", ".", "(", ")", "[", "]"}
+PRECEDENCIA = {"*": 3, ".": 2, "|": 1}
+ESCAPE = re.compile(r"\\(?:x([0-9a-fA-F]{2})|u([0-9a-fA-F]{4})|U([0-9a-fA-F]{8}))")  # \xHH, \uHHHH, \UHHHHHHHH
+
+class ErrorExpresion(ValueError):
+    """Error de sintaxis en una expresión regular, con la posición donde se detectó."""
+
+    def __init__(self, mensaje, posicion=None, patron=None):
+        self.mensaje = mensaje
+        self.posicion = posicion
+        self.patron = patron  # Índice de la expresión que falló, si venía en una lista
+        if posicion is None:
+            super().__init__(mensaje)
+        else:
+            super().__init__(f"{mensaje} (posición {posicion})")
+
+    def senalar(self, expresion):
+        """Muestra la expresión con una marca debajo de la posición del error."""
+        if self.posicion is None:
+            return expresion
+        return f"{expresion}\n{' ' * self.posicion}^"
+
+class Nodo:
+    """Nodo del árbol sintáctico: un símbolo o un operador (".", "|", "*") con sus operandos."""
+    __slots__ = ("tipo", "hijos", "simbolo", "posicion")
+
+    def __init__(self, tipo, hijos=(), simbolo=None, posicion=None):
+        self.tipo = tipo  # "simbolo", ".", "|" o "*"
+        self.hijos = hijos
+        self.simbolo = simbolo
+        self.posicion = posicion
+
+    def __repr__(self):
+        """Representación en cadena del nodo."""
+        if self.tipo == "simbolo":
+            return f"Nodo({self.simbolo!r})"
+        return f"Nodo({self.tipo!r}, {len(self.hijos)} hijos)"
+
+class ConjuntoSimbolos(frozenset):
+    """Símbolos de una clase [...] de la expresión; en el postfijo ocupa el lugar de un símbolo."""
+
+    def __repr__(self):
+        return f"ConjuntoSimbolos({sorted(self)!r})"
+
+class LectorSimbolos:
+    """Reconoce símbolos del alfabeto en un texto, prefiriendo el más largo."""
+
+    def __init__(self, alfabeto=None):
+        self.alfabeto = None
+        if alfabeto is not None:
+            self.alfabeto = {simbolo for simbolo in alfabeto if simbolo}
+            for simbolo in self.alfabeto:
+                if any(c in OPERADORES for c in simbolo):
+                    raise ErrorExpresion(f"El símbolo '{simbolo}' del alfabeto contiene operadores")
+            self.longitudes = sorted({len(simbolo) for simbolo in self.alfabeto}, reverse=True)
+
+    def leer(self, texto, i):
+        """Retorna el símbolo que empieza en la posición i, o None si no hay ninguno."""
+        if self.alfabeto is None:
+            # Sin alfabeto, cada carácter alfanumérico es un símbolo
+            return texto[i] if texto[i].isalnum() else None
+        for longitud in self.longitudes:
+            candidato = texto[i:i + longitud]
+            if len(candidato) == longitud and candidato in self.alfabeto:
+                return candidato
+        return None
+
+    def contiene(self, simbolo):
+        """Indica si el símbolo se puede usar en la expresión."""
+        if self.alfabeto is None:
+            return simbolo.isalnum()
+        return simbolo in self.alfabeto
+
+def leer_caracter(texto, i):
+    """Lee un carácter o un escape \\xHH, \\uHHHH o \\UHHHHHHHH; retorna (carácter, posición siguiente)."""
+    escape = ESCAPE.match(texto, i)
+    if escape is None:
+        return texto[i], i + 1
+    punto = int(next(grupo for grupo in escape.groups() if grupo is not None), 16)
+    if punto > 0x10FFFF:
+        raise ErrorExpresion(f"Punto de código fuera de rango: '{escape.group()}'", i)
+    return chr(punto), escape.end()
+
+def rango_caracteres(desde, hasta):
+    """Retorna los caracteres de desde a hasta, ambos incluidos, salvo los operadores."""
+    return [chr(punto) for punto in range(ord(desde), ord(hasta) + 1) if chr(punto) not in OPERADORES]
+
+def leer_clase(expresion, i, lector, alfabeto=None):
+    """Lee la clase [...] que empieza en la posición i; retorna (ConjuntoSimbolos, posición siguiente)."""
+    # Dentro de los corchetes "x-y" es un rango de caracteres (se toman los que
+    # están en el alfabeto) y un "^" inicial niega la clase respecto al alfabeto
+    inicio = i
+    i += 1
+    negada = expresion.startswith("^", i)
+    if negada:
+        if alfabeto is None:
+            raise ErrorExpresion("Una clase negada necesita el alfabeto", i)
+        i += 1
+
+    simbolos = set()
+    while i < len(expresion) and expresion[i] != "]":
+        desde, siguiente = leer_caracter(expresion, i)
+        if expresion.startswith("-", siguiente) and siguiente + 1 < len(expresion) and expresion[siguiente + 1] != "]":
+            hasta, fin = leer_caracter(expresion, siguiente + 1)
+            if hasta < desde:
+                raise ErrorExpresion(f"Rango invertido en la clase: '{expresion[i:fin]}'", i)
+            simbolos.update(c for c in rango_caracteres(desde, hasta) if lector.contiene(c))
+            i = fin
+            continue
+
+        # Un escape es un carácter suelto; si no, se lee el símbolo más largo del alfabeto
+        simbolo = desde if expresion[i] == "\\" and siguiente > i + 1 else lector.leer(expresion, i)
+        if simbolo is None or not lector.contiene(simbolo):
+            raise ErrorExpresion(f"Carácter no válido en la clase: '{expresion[i]}'", i)
+        simbolos.add(simbolo)
+        i = siguiente if siguiente > i + 1 else i + len(simbolo)
+
+    if i >= len(expresion):
+        raise ErrorExpresion("Corchete sin cerrar", inicio)
+    if negada:
+        simbolos = {simbolo for simbolo in alfabeto if simbolo and simbolo not in simbolos}
+    if not simbolos:
+        raise ErrorExpresion("La clase no contiene símbolos del alfabeto", inicio)
+    return ConjuntoSimbolos(simbolos), i + 1
+
+def dividir_palabra(palabra, alfabeto):
+    """Divide una palabra en símbolos del alfabeto; lanza ErrorExpresion si no se puede."""
+    if all(len(simbolo) <= 1 for simbolo in alfabeto):
+        for i, c in enumerate(palabra):
+            if c not in alfabeto:
+                raise ErrorExpresion(f"El carácter '{c}' no está en el alfabeto", i)
+        return palabra
+
+    lector = LectorSimbolos(alfabeto)
+    simbolos = []
+    i = 0
+    while i < len(palabra):
+        simbolo = lector.leer(palabra, i)
+        if simbolo is None:
+            raise ErrorExpresion(f"El carácter '{palabra[i]}' no está en el alfabeto", i)
+        simbolos.append(simbolo)
+        i += len(simbolo)
+    return simbolos
+
+def dividir_palabras(palabras, alfabeto):
+    """Divide cada palabra en símbolos del alfabeto; las que no se pueden dividir quedan como están."""
+    # Una palabra que no se puede dividir tiene un carácter que no empieza
+    # ningún símbolo, así que recorrida carácter por carácter se rechaza igual
+    if all(len(simbolo) <= 1 for simbolo in alfabeto):
+        return palabras
+    lector = LectorSimbolos(alfabeto)
+    divididas = []
+    for palabra in palabras:
+        simbolos = []
+        i = 0
+        while i < len(palabra):
+            simbolo = lector.leer(palabra, i)
+            if simbolo is None:
+                simbolos = palabra
+                break
+            simbolos.append(simbolo)
+            i += len(simbolo)
+        divididas.append(simbolos)
+    return divididas
+
+def analizar_expresion(expresion, alfabeto=None):
+    """Valida y analiza la expresión en una sola pasada; retorna (árbol, postfijo)."""
+    # Es el algoritmo Shunting-yard, pero cada operador que sale de la pila se
+    # aplica también a la pila de nodos, así que el árbol y la lista postfija
+    # se construyen a la vez y sin recursión. La concatenación implícita se
+    # agrega al leer un operando justo después de otro.
+    lector = LectorSimbolos(alfabeto)
+    nodos = []
+    postfijo = []
+    pila = []  # Operadores pendientes como (operador, posición)
+
+    def aplicar(operador, posicion):
+        postfijo.append(operador)
+        if operador == "*":
+            nodos.append(Nodo("*", (nodos.pop(),), posicion=posicion))
+        else:
+            derecho = nodos.pop()
+            izquierdo = nodos.pop()
+            nodos.append(Nodo(operador, (izquierdo, derecho), posicion=posicion))
+
+    def empujar_binario(operador, posicion):
+        while pila and pila[-1][0] != "(" and PRECEDENCIA[pila[-1][0]] >= PRECEDENCIA[operador]:
+            aplicar(*pila.pop())
+        pila.append((operador, posicion))
+
+    anterior_operando = False  # Si lo último leído puede ser el operando izquierdo de algo
+    i = 0
+    while i < len(expresion):
+        c = expresion[i]
+        if c == "(":
+            if anterior_operando:
+                empujar_binario(".", i)
+            pila.append(("(", i))
+            anterior_operando = False
         elif c == ")":
-            while pila and pila[-1] != "(":
-                salida.append(pila.pop())
-            if pila:  # Eliminar el paréntesis de apertura
-                pila.pop()
-            else:
-                raise ValueError("Paréntesis no balanceados")
-        else:  # Operadores
-            while pila and pila[-1] != "(" and \
-                  pila[-1] in precedencia and \
-                  precedencia[pila[-1]] >= precedencia[c]:
-                salida.append(pila.pop())
-            pila.append(c)
-
-    # Vaciar la pila
+            if not anterior_operando:
+                raise ErrorExpresion("Falta un operando antes de ')'", i)
+            while pila and pila[-1][0] != "(":
+                aplicar(*pila.pop())
+            if not pila:
+                raise ErrorExpresion("Paréntesis de cierre sin apertura", i)
+            pila.pop()
+        elif c == "*":
+            if not anterior_operando:
+                raise ErrorExpresion("'*' no tiene operando", i)
+            # Es el operador de mayor precedencia y es posfijo: se aplica en seguida
+            aplicar("*", i)
+        elif c == "[":
+            conjunto, fin = leer_clase(expresion, i, lector, alfabeto)
+            if anterior_operando:
+                empujar_binario(".", i)
+            postfijo.append(conjunto)
+            nodos.append(Nodo("simbolo", simbolo=conjunto, posicion=i))
+            anterior_operando = True
+            i = fin
+            continue
+        elif c == "|" or c == ".":
+            if not anterior_operando:
+                raise ErrorExpresion(f"Falta un operando antes de '{c}'", i)
+            empujar_binario(c, i)
+            anterior_operando = False
+        else:
+            simbolo = lector.leer(expresion, i)
+            if simbolo is None:
+                raise ErrorExpresion(f"Carácter no válido en la expresión regular: '{c}'", i)
+            if anterior_operando:
+                empujar_binario(".", i)
+            postfijo.append(simbolo)
+            nodos.append(Nodo("simbolo", simbolo=simbolo, posicion=i))
+            anterior_operando = True
+            i += len(simbolo)
+            continue
+        i += 1
+
+    if not expresion:
+        raise ErrorExpresion("La expresión regular está vacía", 0)
+    if not anterior_operando:
+        raise ErrorExpresion("La expresión termina sin operando", len(expresion))
+
     while pila:
-        if pila[-1] == "(":
-            raise ValueError("Paréntesis no balanceados")
-        salida.append(pila.pop())
+        operador, posicion = pila.pop()
+        if operador == "(":
+            raise ErrorExpresion("Paréntesis sin cerrar", posicion)
+        aplicar(operador, posicion)
+
+    return nodos[0], postfijo
 
-    return "".join(salida)
\ No newline at end of file
+def a_postfijo(expresion, alfabeto=None):
+    """Convierte una expresión regular a notación postfija (lista de símbolos y operadores)."""
+    return analizar_expresion(expresion, alfabeto)[1]
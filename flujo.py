@@ -0,0 +1,183 @@
+import codecs
+import io
+import mmap
+import os
+import time
+from expresion_regular import LectorSimbolos
+
+TAMANO_BLOQUE = 1 << 20  # Caracteres (o bytes con mmap) por bloque
+
+class ResultadoFlujo:
+    """Conteos y rendimiento de una evaluación sobre un flujo de texto."""
+
+    def __init__(self):
+        self.lineas = 0
+        self.aceptadas = 0
+        self.caracteres = 0
+        self.segundos = 0.0
+        self.aceptada = None  # Resultado en modo de flujo completo
+
+    @property
+    def rechazadas(self):
+        return self.lineas - self.aceptadas
+
+    @property
+    def caracteres_por_segundo(self):
+        return self.caracteres / self.segundos if self.segundos else 0.0
+
+    @property
+    def lineas_por_segundo(self):
+        return self.lineas / self.segundos if self.segundos else 0.0
+
+    def resumen(self):
+        """Genera un resumen legible de los resultados."""
+        lineas = []
+        if self.aceptada is None:
+            lineas.append(f"Líneas: {self.lineas}")
+            lineas.append(f"Aceptadas: {self.aceptadas}")
+            lineas.append(f"Rechazadas: {self.rechazadas}")
+        else:
+            lineas.append("Flujo aceptado" if self.aceptada else "Flujo no aceptado")
+        lineas.append(f"Caracteres: {self.caracteres}")
+        lineas.append(f"Tiempo: {self.segundos:.3f} s")
+        lineas.append(f"Rendimiento: {self.caracteres_por_segundo / 1e6:.2f} M caracteres/s"
+                      + (f", {self.lineas_por_segundo:.0f} líneas/s" if self.aceptada is None else ""))
+        return "\n".join(lineas)
+
+def leer_bloques(archivo, tamano_bloque=TAMANO_BLOQUE):
+    """Lee un archivo de texto abierto en bloques de tamaño fijo."""
+    while True:
+        bloque = archivo.read(tamano_bloque)
+        if not bloque:
+            return
+        yield bloque
+
+def leer_bloques_mmap(ruta, tamano_bloque=TAMANO_BLOQUE, codificacion="utf-8"):
+    """Lee un archivo mapeado en memoria y lo decodifica por bloques."""
+    # Los caracteres multibyte y los "\r\n" pueden quedar partidos entre
+    # bloques; los decodificadores incrementales se encargan de unirlos.
+    decodificador = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(codificacion)(), translate=True)
+
+    with open(ruta, "rb") as archivo:
+        if os.fstat(archivo.fileno()).st_size == 0:
+            return
+        with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            for inicio in range(0, len(mapa), tamano_bloque):
+                texto = decodificador.decode(mapa[inicio:inicio + tamano_bloque])
+                if texto:
+                    yield texto
+
+    resto = decodificador.decode(b"", final=True)
+    if resto:
+        yield resto
+
+class LectorFlujo:
+    """Avanza un AFD con símbolos de varios caracteres, que pueden quedar partidos entre bloques."""
+
+    def __init__(self, compilado):
+        self.compilado = compilado
+        self.lector = LectorSimbolos(compilado.indice_simbolo)
+        self.largo = self.lector.longitudes[0]
+        self.pendiente = ""  # Comienzo de un símbolo que sigue en el próximo bloque
+
+    def _leer(self, estado, texto, limite):
+        if estado == self.compilado.estado_trampa:
+            return estado, ""
+        simbolos = []
+        i = 0
+        while i < limite:
+            simbolo = self.lector.leer(texto, i)
+            if simbolo is None:
+                return self.compilado.estado_trampa, ""
+            simbolos.append(simbolo)
+            i += len(simbolo)
+        return self.compilado.avanzar(estado, simbolos), texto[i:]
+
+    def avanzar(self, estado, texto):
+        """Consume el texto salvo un posible símbolo partido al final; retorna el estado alcanzado."""
+        # Sólo se leen las posiciones que tienen delante el largo del símbolo
+        # más largo; el resto espera al próximo bloque
+        texto = self.pendiente + texto
+        estado, self.pendiente = self._leer(estado, texto, len(texto) - self.largo + 1)
+        return estado
+
+    def terminar(self, estado):
+        """Consume lo pendiente al terminar la palabra y retorna el estado final."""
+        estado, _ = self._leer(estado, self.pendiente, len(self.pendiente))
+        self.pendiente = ""
+        return estado
+
+def lector_flujo(compilado):
+    """Retorna un LectorFlujo si el alfabeto tiene símbolos de varios caracteres, o None."""
+    if all(len(simbolo) == 1 for simbolo in compilado.indice_simbolo):
+        return None
+    return LectorFlujo(compilado)
+
+def evaluar_lineas(compilado, bloques, al_aceptar=None):
+    """Evalúa cada línea del flujo como una palabra independiente."""
+    resultado = ResultadoFlujo()
+    finales = compilado.finales
+    inicial = compilado.estado_inicial
+    lector = lector_flujo(compilado)
+    avanzar = compilado.avanzar if lector is None else lector.avanzar
+    terminar = None if lector is None else lector.terminar
+
+    # El estado se conserva entre bloques, así que una línea partida entre dos
+    # bloques (o más larga que un bloque) no se guarda nunca completa en memoria
+    estado = inicial
+    en_linea = False
+    inicio = time.perf_counter()
+
+    for bloque in bloques:
+        resultado.caracteres += len(bloque)
+        partes = bloque.split("\n")
+
+        for parte in partes[:-1]:
+            estado = avanzar(estado, parte)
+            if terminar is not None:
+                estado = terminar(estado)
+            resultado.lineas += 1
+            if finales[estado]:
+                resultado.aceptadas += 1
+                if al_aceptar is not None:
+                    al_aceptar(resultado.lineas)
+            estado = inicial
+
+        ultima = partes[-1]
+        estado = avanzar(estado, ultima)
+        en_linea = bool(ultima) if len(partes) > 1 else (en_linea or bool(ultima))
+
+    # Última línea sin salto de línea final
+    if en_linea:
+        if terminar is not None:
+            estado = terminar(estado)
+        resultado.lineas += 1
+        if finales[estado]:
+            resultado.aceptadas += 1
+            if al_aceptar is not None:
+                al_aceptar(resultado.lineas)
+
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+def evaluar_flujo(compilado, bloques):
+    """Evalúa todo el flujo como una sola palabra."""
+    resultado = ResultadoFlujo()
+    estado = compilado.estado_inicial
+    lector = lector_flujo(compilado)
+    avanzar = compilado.avanzar if lector is None else lector.avanzar
+    inicio = time.perf_counter()
+
+    for bloque in bloques:
+        resultado.caracteres += len(bloque)
+        estado = avanzar(estado, bloque)
+        if estado == compilado.estado_trampa:
+            # Ya no puede aceptarse: no hace falta leer el resto
+            break
+    if lector is not None:
+        estado = lector.terminar(estado)
+
+    resultado.aceptada = compilado.es_final(estado)
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
@@ -0,0 +1,136 @@
+from afn import Estado, AFN
+from afd import AFD
+
+class Posiciones:
+    """Funciones anulable, primeros, últimos y siguientes de una expresión en notación postfija."""
+
+    # Cada aparición de un símbolo en la expresión es una posición, numeradas
+    # desde 1; la posición 0 representa el inicio. Los conjuntos de posiciones
+    # se guardan como máscaras de bits.
+    def __init__(self, postfijo):
+        self.simbolos = [None]  # simbolos[p]: símbolo de la posición p
+        self.siguientes = [0]  # siguientes[p]: posiciones que pueden seguir a p
+        pila = []  # (anulable, primeros, últimos) de cada subexpresión
+
+        for c in postfijo:
+            if c not in {"*", ".", "|"}:  # Si es un símbolo del alfabeto
+                p = len(self.simbolos)
+                self.simbolos.append(c)
+                self.siguientes.append(0)
+                pila.append((False, 1 << p, 1 << p))
+            elif c == "*":  # Estrella de Kleene
+                anulable, primeros, ultimos = pila.pop()
+                self._enlazar(ultimos, primeros)
+                pila.append((True, primeros, ultimos))
+            elif c == ".":  # Concatenación
+                anulable2, primeros2, ultimos2 = pila.pop()
+                anulable1, primeros1, ultimos1 = pila.pop()
+                self._enlazar(ultimos1, primeros2)
+                pila.append((anulable1 and anulable2,
+                             primeros1 | primeros2 if anulable1 else primeros1,
+                             ultimos1 | ultimos2 if anulable2 else ultimos2))
+            elif c == "|":  # Unión
+                anulable2, primeros2, ultimos2 = pila.pop()
+                anulable1, primeros1, ultimos1 = pila.pop()
+                pila.append((anulable1 or anulable2, primeros1 | primeros2, ultimos1 | ultimos2))
+
+        self.anulable, self.primeros, self.ultimos = pila[0]
+        self.siguientes[0] = self.primeros
+
+        # Se acepta al terminar en una última posición, o sin leer nada si la expresión es anulable
+        self.finales = self.ultimos | (1 if self.anulable else 0)
+
+        # posiciones_simbolo[simbolo]: máscara de las posiciones con ese símbolo
+        self.posiciones_simbolo = {}
+        for p in range(1, len(self.simbolos)):
+            simbolo = self.simbolos[p]
+            self.posiciones_simbolo[simbolo] = self.posiciones_simbolo.get(simbolo, 0) | 1 << p
+
+    def _enlazar(self, ultimos, primeros):
+        """Agrega primeros al conjunto de siguientes de cada posición de ultimos."""
+        while ultimos:
+            bajo = ultimos & -ultimos
+            self.siguientes[bajo.bit_length() - 1] |= primeros
+            ultimos ^= bajo
+
+    @property
+    def num_posiciones(self):
+        return len(self.simbolos)
+
+def construir_afn_glushkov(postfijo, alfabeto):
+    """Construye el AFN de posiciones (Glushkov), que no tiene transiciones epsilon."""
+    posiciones = Posiciones(postfijo)
+    estados = [Estado() for _ in range(posiciones.num_posiciones)]
+
+    # Se entra a la posición q leyendo su símbolo desde cualquier p que q pueda seguir
+    for p, estado in enumerate(estados):
+        siguientes = posiciones.siguientes[p]
+        while siguientes:
+            bajo = siguientes & -siguientes
+            q = bajo.bit_length() - 1
+            estado.transiciones.setdefault(posiciones.simbolos[q], []).append(estados[q])
+            siguientes ^= bajo
+
+    # Puede haber varios estados finales; fin es el primero de ellos
+    finales = [estados[p] for p in range(posiciones.num_posiciones) if posiciones.finales >> p & 1]
+    for estado in finales:
+        estado.es_final = True
+    return AFN(estados[0], finales[0], alfabeto)
+
+def construir_afd_posiciones(postfijo, alfabeto):
+    """Construye el AFD directamente con las funciones siguientes, sin pasar por un AFN."""
+    posiciones = Posiciones(postfijo)
+    siguientes = posiciones.siguientes
+    simbolos = sorted(alfabeto)
+    posiciones_simbolo = [posiciones.posiciones_simbolo.get(simbolo, 0) for simbolo in simbolos]
+
+    def a_frozenset(mascara):
+        """Convierte una máscara de posiciones en el estado del AFD."""
+        miembros = []
+        while mascara:
+            bajo = mascara & -mascara
+            miembros.append(bajo.bit_length() - 1)
+            mascara ^= bajo
+        return frozenset(miembros)
+
+    # Cada estado del AFD es el conjunto de posiciones en que puede estar la lectura
+    afd = AFD()
+    afd.estado_inicial = a_frozenset(1)
+    afd.estados.append(afd.estado_inicial)
+
+    pendientes = [1]
+    estados_procesados = {1: afd.estado_inicial}
+
+    while pendientes:
+        mascara_actual = pendientes.pop()
+        estado_actual = estados_procesados[mascara_actual]
+
+        if mascara_actual & posiciones.finales:
+            afd.estados_finales.add(estado_actual)
+
+        # Las posiciones alcanzables con cualquier símbolo; cada símbolo se queda con las suyas
+        alcanzables = 0
+        resto = mascara_actual
+        while resto:
+            bajo = resto & -resto
+            alcanzables |= siguientes[bajo.bit_length() - 1]
+            resto ^= bajo
+
+        for simbolo, mascara_simbolo in zip(simbolos, posiciones_simbolo):
+            siguiente_mascara = alcanzables & mascara_simbolo
+            if not siguiente_mascara:
+                continue
+
+            siguiente_estado = estados_procesados.get(siguiente_mascara)
+            if siguiente_estado is None:
+                siguiente_estado = a_frozenset(siguiente_mascara)
+                afd.estados.append(siguiente_estado)
+                pendientes.append(siguiente_mascara)
+                estados_procesados[siguiente_mascara] = siguiente_estado
+
+            afd.transiciones[(estado_actual, simbolo)] = siguiente_estado
+
+    # Agregar el estado trampa y sus transiciones
+    afd.agregar_estado_trampa(alfabeto)
+
+    return afd
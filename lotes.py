@@ -0,0 +1,107 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from afd import AFDCompilado, compilar_afd
+from expresion_regular import dividir_palabras
+from vectorizado import evaluar_muchos
+
+TAMANO_FRAGMENTO = 20000  # Palabras por tarea enviada a un proceso
+
+# AFD compilado del proceso trabajador; se recibe una sola vez al iniciar el
+# proceso en lugar de viajar con cada fragmento
+_afd_trabajador = None
+
+def _inicializar_trabajador(compilado):
+    global _afd_trabajador
+    _afd_trabajador = compilado
+
+def _evaluar_fragmento(palabras):
+    return evaluar_muchos(_afd_trabajador, dividir_palabras(palabras, _afd_trabajador.indice_simbolo))
+
+class ResultadoLote:
+    """Resultados combinados de evaluar un lote de palabras."""
+
+    def __init__(self):
+        self.palabras = 0
+        self.aceptadas = 0
+        self.segundos = 0.0
+        self.procesos = 1
+        self.resultados = []  # Un booleano por palabra, en el orden de entrada
+
+    @property
+    def rechazadas(self):
+        return self.palabras - self.aceptadas
+
+    @property
+    def palabras_por_segundo(self):
+        return self.palabras / self.segundos if self.segundos else 0.0
+
+    def resumen(self):
+        """Genera un resumen legible de los resultados."""
+        return "\n".join([
+            f"Palabras: {self.palabras}",
+            f"Aceptadas: {self.aceptadas}",
+            f"Rechazadas: {self.rechazadas}",
+            f"Procesos: {self.procesos}",
+            f"Tiempo: {self.segundos:.3f} s",
+            f"Rendimiento: {self.palabras_por_segundo:.0f} palabras/s",
+        ])
+
+def fragmentar(palabras, tamano_fragmento=TAMANO_FRAGMENTO):
+    """Agrupa un iterable de palabras en listas de tamaño fijo."""
+    fragmento = []
+    for palabra in palabras:
+        fragmento.append(palabra)
+        if len(fragmento) >= tamano_fragmento:
+            yield fragmento
+            fragmento = []
+    if fragmento:
+        yield fragmento
+
+def leer_palabras(archivo):
+    """Itera las palabras de un archivo de texto, una por línea."""
+    for linea in archivo:
+        yield linea.rstrip("\r\n")
+
+def evaluar_lote(afd, palabras, procesos=None, tamano_fragmento=TAMANO_FRAGMENTO,
+                 guardar_resultados=True, al_resultado=None):
+    """Evalúa muchas palabras repartiéndolas entre varios procesos."""
+    compilado = afd if isinstance(afd, AFDCompilado) else compilar_afd(afd)
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+
+    resultado = ResultadoLote()
+    resultado.procesos = procesos
+    inicio = time.perf_counter()
+
+    def combinar(fragmento, aceptadas):
+        resultado.palabras += len(fragmento)
+        resultado.aceptadas += sum(aceptadas)
+        if guardar_resultados:
+            resultado.resultados.extend(aceptadas)
+        if al_resultado is not None:
+            for palabra, aceptada in zip(fragmento, aceptadas):
+                al_resultado(palabra, aceptada)
+
+    if procesos <= 1:
+        for fragmento in fragmentar(palabras, tamano_fragmento):
+            combinar(fragmento, evaluar_muchos(compilado, dividir_palabras(fragmento, compilado.indice_simbolo)))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos,
+                                 initializer=_inicializar_trabajador,
+                                 initargs=(compilado,)) as ejecutor:
+            # Se limita el número de fragmentos en vuelo para que la memoria no
+            # dependa del tamaño de la entrada; los resultados salen en orden
+            en_vuelo = deque()
+            for fragmento in fragmentar(palabras, tamano_fragmento):
+                en_vuelo.append((fragmento, ejecutor.submit(_evaluar_fragmento, fragmento)))
+                if len(en_vuelo) >= 2 * procesos:
+                    fragmento_listo, futuro = en_vuelo.popleft()
+                    combinar(fragmento_listo, futuro.result())
+            while en_vuelo:
+                fragmento_listo, futuro = en_vuelo.popleft()
+                combinar(fragmento_listo, futuro.result())
+
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
@@ -1,67 +1,64 @@
 # main.py
-from alfabeto import seleccionar_alfabeto, validar_expresion_regular
-from expresion_regular import a_postfijo
+import argparse
+import sys
+from alfabeto import procesar_alfabeto
+from afn import RecorridoAFN
+from expresion_regular import ErrorExpresion, a_postfijo, dividir_palabras
+from clases import agrupar_postfijo
 from thompson import construir_afn_postfijo
 from afd import convertir_afn_a_afd, imprimir_afd
+from compilador import CONSTRUCCIONES, compilar_expresion
+from algebra import disjuntos, equivalentes, incluido
+from busqueda import Buscador
+from flujo import TAMANO_BLOQUE, leer_bloques, leer_bloques_mmap, evaluar_lineas, evaluar_flujo
+from lotes import TAMANO_FRAGMENTO, evaluar_lote, fragmentar, leer_palabras
+from multipatron import construir_clasificador
+from serializacion import cargar_paquete, clave_paquete, guardar_paquete
+
+AYUDA_CONSTRUCCION = ("Construcción del AFD: Thompson y subconjuntos, AFN de Glushkov, "
+                      "AFD directo por posiciones o derivadas de Brzozowski")
 
 
 def imprimir_afn(afn):
     """Imprime las transiciones del AFN con nombres legibles para los estados."""
-    visitados = set()
-    nombres_estados = {}  # Diccionario para asignar nombres legibles a los estados
-    contador = 0
-
-    def obtener_nombre_estado(estado):
-        """Asigna un nombre legible a un estado."""
-        nonlocal contador
-        if estado not in nombres_estados:
-            nombres_estados[estado] = f"q{contador}"
-            contador += 1
-        return nombres_estados[estado]
-
-    def recorrer(estado):
-        """Recorre el AFN e imprime las transiciones."""
-        if estado in visitados:
-            return
-        visitados.add(estado)
-        nombre_estado = obtener_nombre_estado(estado)
-        print(f"Estado {nombre_estado}:")
-        for simbolo, destinos in estado.transiciones.items():
-            for destino in destinos:
-                print(
-                    f"  {nombre_estado} --{simbolo}--> {obtener_nombre_estado(destino)}"
-                )
-        for destino in estado.epsilon:
-            print(f"  {nombre_estado} --ε--> {obtener_nombre_estado(destino)}")
-        for simbolo, destinos in estado.transiciones.items():
-            for destino in destinos:
-                recorrer(destino)
-        for destino in estado.epsilon:
-            recorrer(destino)
+    recorrido = RecorridoAFN(afn)
 
+    finales = []
     print("Transiciones del AFN:")
-    recorrer(afn.inicio)
-    print(f"Estado inicial: {obtener_nombre_estado(afn.inicio)}")
-    print(f"Estado final: {obtener_nombre_estado(afn.fin)}")
+    for numero, estado, aristas in recorrido:
+        print(f"Estado q{numero}:")
+        for simbolo, destino in aristas:
+            print(f"  q{numero} --{'ε' if simbolo is None else simbolo}--> q{destino}")
+        if estado.es_final:
+            finales.append(f"q{numero}")
+    print(f"Estado inicial: q{recorrido.indices[afn.inicio]}")
+    print(f"Estados finales: {', '.join(finales)}" if len(finales) > 1 else f"Estado final: {finales[0]}")
+
 
+def modo_interactivo():
+    """Pide el alfabeto y la expresión por consola e imprime los autómatas."""
+    # Solicitar al usuario el alfabeto
+    alfabeto = procesar_alfabeto(input(
+        "Introduce el alfabeto (símbolos o rangos x-y separados por comas): "
+    ))
 
-# Solicitar al usuario el alfabeto
-alfabeto_usuario = input(
-    "Introduce el alfabeto (símbolos separados por comas): "
-).split(",")
-alfabeto = set(alfabeto_usuario)
+    # Solicitar al usuario la expresión regular
+    expresion = input("Introduce la expresión regular: ")
 
-# Solicitar al usuario la expresión regular
-expresion = input("Introduce la expresión regular: ")
+    # Validar la expresión regular y convertirla a notación postfija
+    try:
+        postfijo = a_postfijo(expresion, alfabeto)
+    except ErrorExpresion as e:
+        print(f"La expresión regular no es válida: {e}")
+        print(e.senalar(expresion))
+        return
 
-# Validar la expresión regular
-if validar_expresion_regular(expresion, alfabeto):
-    # Convertir la expresión regular a notación postfija
-    postfijo = a_postfijo(expresion)
+    # Los autómatas van sobre las clases de símbolos que la expresión distingue
+    postfijo, clases = agrupar_postfijo(postfijo, alfabeto)
     print(f"Expresión en notación postfija: {''.join(postfijo)}")
 
-    # Construir el AFN (pasando el alfabeto)
-    afn = construir_afn_postfijo(postfijo, alfabeto)
+    # Construir el AFN (pasando el alfabeto de clases)
+    afn = construir_afn_postfijo(postfijo, set(clases))
     print("AFN creado con éxito.")
 
     # Imprimir las transiciones del AFN
@@ -74,5 +71,322 @@ if validar_expresion_regular(expresion, alfabeto):
     # Imprimir el AFD
     imprimir_afd(afd)
 
-else:
-    print("La expresión regular contiene símbolos no válidos en el alfabeto.")
\ No newline at end of file
+
+def informar_error(e, expresion):
+    """Muestra en stderr por qué la expresión no es válida, señalando la posición."""
+    print(f"Expresión regular no válida: {e}", file=sys.stderr)
+    print(e.senalar(expresion), file=sys.stderr)
+
+
+def obtener_compilado(args):
+    """Toma el AFD del paquete precompilado si se indicó uno y lo contiene; si no, lo compila."""
+    alfabeto = procesar_alfabeto(args.alfabeto)
+    if args.paquete:
+        compilado = cargar_paquete(args.paquete).obtener(clave_paquete(alfabeto, args.expresion))
+        if compilado is not None:
+            return compilado
+        print("La expresión no está en el paquete; se compila.", file=sys.stderr)
+    return compilar_expresion(args.expresion, alfabeto, args.minimizar, args.construccion)
+
+
+def comando_flujo(args):
+    """Evalúa un archivo o la entrada estándar contra una expresión regular."""
+    try:
+        compilado = obtener_compilado(args)
+    except ErrorExpresion as e:
+        informar_error(e, args.expresion)
+        return 2
+
+    if args.archivo == "-":
+        if args.mmap:
+            print("La entrada estándar no se puede mapear en memoria; se lee por bloques.", file=sys.stderr)
+        bloques = leer_bloques(sys.stdin, args.bloque)
+    elif args.mmap:
+        bloques = leer_bloques_mmap(args.archivo, args.bloque, args.codificacion)
+    else:
+        archivo = open(args.archivo, encoding=args.codificacion)
+        bloques = leer_bloques(archivo, args.bloque)
+
+    try:
+        if args.completo:
+            resultado = evaluar_flujo(compilado, bloques)
+        else:
+            al_aceptar = print if args.mostrar else None
+            resultado = evaluar_lineas(compilado, bloques, al_aceptar)
+    finally:
+        if args.archivo != "-" and not args.mmap:
+            archivo.close()
+
+    print(resultado.resumen(), file=sys.stderr if args.mostrar else sys.stdout)
+    if args.completo:
+        return 0 if resultado.aceptada else 1
+    return 0
+
+
+def comando_lotes(args):
+    """Evalúa una lista de palabras repartiéndola entre varios procesos."""
+    try:
+        compilado = obtener_compilado(args)
+    except ErrorExpresion as e:
+        informar_error(e, args.expresion)
+        return 2
+
+    entrada = sys.stdin if args.archivo == "-" else open(args.archivo, encoding=args.codificacion)
+    salida = open(args.salida, "w", encoding="utf-8") if args.salida else None
+    try:
+        al_resultado = None
+        if salida is not None:
+            al_resultado = lambda palabra, aceptada: salida.write(f"{palabra}\t{int(aceptada)}\n")
+        resultado = evaluar_lote(compilado, leer_palabras(entrada), args.procesos, args.fragmento,
+                                 guardar_resultados=False, al_resultado=al_resultado)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if salida is not None:
+            salida.close()
+
+    print(resultado.resumen())
+    return 0
+
+
+def comando_precompilar(args):
+    """Compila las expresiones de un archivo y las guarda en un paquete binario."""
+    alfabeto_comun = procesar_alfabeto(args.alfabeto) if args.alfabeto else None
+    automatas = {}
+    errores = 0
+
+    with open(args.archivo, encoding=args.codificacion) as archivo:
+        for numero, linea in enumerate(archivo, 1):
+            linea = linea.rstrip("\r\n")
+            if not linea.strip() or linea.startswith("#"):
+                continue
+
+            # Cada línea es "alfabeto<TAB>expresión", o sólo la expresión si se dio --alfabeto
+            if "\t" in linea:
+                texto_alfabeto, expresion = linea.split("\t", 1)
+                alfabeto = procesar_alfabeto(texto_alfabeto)
+            elif alfabeto_comun is not None:
+                alfabeto, expresion = alfabeto_comun, linea
+            else:
+                print(f"Línea {numero}: falta el alfabeto (use 'alfabeto<TAB>expresión' o --alfabeto)",
+                      file=sys.stderr)
+                errores += 1
+                continue
+
+            try:
+                compilado = compilar_expresion(expresion, alfabeto, args.minimizar, args.construccion)
+            except ErrorExpresion as e:
+                print(f"Línea {numero}: expresión regular no válida: {e}", file=sys.stderr)
+                errores += 1
+                continue
+            automatas[clave_paquete(alfabeto, expresion)] = compilado
+
+    # Con errores no se escribe un paquete incompleto
+    if errores:
+        print(f"{errores} líneas con errores; no se generó {args.salida}", file=sys.stderr)
+        return 1
+
+    guardar_paquete(args.salida, automatas.items())
+    estados = sum(compilado.num_estados for compilado in automatas.values())
+    print(f"{len(automatas)} autómatas ({estados} estados) guardados en {args.salida}")
+    return 0
+
+
+def leer_patrones(ruta, codificacion="utf-8"):
+    """Lee un archivo de expresiones, una por línea, omitiendo vacías y comentarios."""
+    with open(ruta, encoding=codificacion) as archivo:
+        return [linea.strip() for linea in archivo if linea.strip() and not linea.startswith("#")]
+
+
+def comando_buscar(args):
+    """Busca las coincidencias de una expresión dentro de cada línea de un archivo o de stdin."""
+    try:
+        buscador = Buscador(obtener_compilado(args))
+    except ErrorExpresion as e:
+        informar_error(e, args.expresion)
+        return 2
+    if buscador.literales:
+        print(f"Literales iniciales: {', '.join(repr(literal) for literal in buscador.literales)}",
+              file=sys.stderr)
+
+    total = 0
+    entrada = sys.stdin if args.archivo == "-" else open(args.archivo, encoding=args.codificacion)
+    try:
+        for numero, linea in enumerate(entrada, 1):
+            linea = linea.rstrip("\r\n")
+            for inicio, fin in buscador.buscar(linea, args.solapadas):
+                total += 1
+                if not args.contar:
+                    print(f"{numero}:{inicio}-{fin}\t{linea[inicio:fin]}")
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+
+    print(f"Coincidencias: {total}", file=sys.stderr if not args.contar else sys.stdout)
+    return 0 if total else 1
+
+
+def comando_clasificar(args):
+    """Clasifica cada palabra contra varias expresiones con un solo AFD combinado."""
+    patrones = leer_patrones(args.patrones, args.codificacion)
+    try:
+        clasificador = construir_clasificador(patrones, procesar_alfabeto(args.alfabeto), args.minimizar)
+    except ErrorExpresion as e:
+        informar_error(e, patrones[e.patron])
+        return 2
+
+    conteos = [0] * len(patrones)
+    sin_patron = 0
+    entrada = sys.stdin if args.archivo == "-" else open(args.archivo, encoding=args.codificacion)
+    try:
+        for fragmento in fragmentar(leer_palabras(entrada)):
+            # Como en /api/clasificar, las palabras se dividen en símbolos del alfabeto
+            simbolos = dividir_palabras(fragmento, clasificador.alfabeto)
+            for palabra, resultado in zip(fragmento, clasificador.clasificar_muchos(simbolos, args.primero)):
+                ids = () if resultado is None else (resultado,) if args.primero else resultado
+                for i in ids:
+                    conteos[i] += 1
+                if not ids:
+                    sin_patron += 1
+                print(f"{palabra}\t{','.join(map(str, ids)) or '-'}")
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+
+    # El resumen va a stderr para no mezclarse con la clasificación
+    print(f"AFD combinado: {clasificador.afd.num_estados} estados para {len(patrones)} patrones", file=sys.stderr)
+    for i, patron in enumerate(patrones):
+        print(f"  {i}: {conteos[i]} palabras  {patron}", file=sys.stderr)
+    print(f"  Sin patrón: {sin_patron} palabras", file=sys.stderr)
+    return 0
+
+
+def comando_comparar(args):
+    """Compara los lenguajes de dos expresiones; el código de salida indica si la relación se cumple."""
+    alfabeto = procesar_alfabeto(args.alfabeto)
+    compilados = []
+    for expresion in (args.expresion1, args.expresion2):
+        try:
+            compilados.append(compilar_expresion(expresion, alfabeto, construccion=args.construccion))
+        except ErrorExpresion as e:
+            informar_error(e, expresion)
+            return 2
+    primero, segundo = compilados
+
+    if args.relacion == "equivalentes":
+        cumple, palabra = equivalentes(primero, segundo)
+        if not cumple:
+            cual = "la primera" if primero.match(palabra) else "la segunda"
+            print(f"No son equivalentes: '{palabra}' sólo la acepta {cual}")
+    elif args.relacion == "incluida":
+        cumple, palabra = incluido(primero, segundo)
+        if not cumple:
+            print(f"La primera no está incluida en la segunda: acepta '{palabra}'")
+    else:
+        cumple, palabra = disjuntos(primero, segundo)
+        if not cumple:
+            print(f"No son disjuntas: ambas aceptan '{palabra}'")
+
+    if cumple:
+        print(f"Se cumple: {args.relacion}")
+    return 0 if cumple else 1
+
+
+def crear_parser():
+    """Define los comandos de la línea de comandos."""
+    parser = argparse.ArgumentParser(
+        description="Construcción de autómatas a partir de expresiones regulares. "
+                    "Sin comando, se piden el alfabeto y la expresión por consola.")
+    comandos = parser.add_subparsers(dest="comando")
+
+    flujo = comandos.add_parser("flujo", help="Evalúa un archivo o stdin contra una expresión")
+    flujo.add_argument("alfabeto", help="Símbolos separados por comas, por ejemplo a,b,c")
+    flujo.add_argument("expresion", help="Expresión regular")
+    flujo.add_argument("archivo", nargs="?", default="-", help="Archivo de entrada (- para stdin)")
+    flujo.add_argument("--completo", action="store_true",
+                       help="Evalúa todo el flujo como una sola palabra en lugar de línea por línea")
+    flujo.add_argument("--mmap", action="store_true", help="Mapea el archivo en memoria")
+    flujo.add_argument("--bloque", type=int, default=TAMANO_BLOQUE, help="Tamaño de cada bloque leído")
+    flujo.add_argument("--codificacion", default="utf-8", help="Codificación del archivo")
+    flujo.add_argument("--mostrar", action="store_true",
+                       help="Imprime el número de cada línea aceptada (el resumen va a stderr)")
+    flujo.add_argument("--minimizar", action="store_true", help="Minimiza el AFD antes de evaluar")
+    flujo.add_argument("--construccion", choices=CONSTRUCCIONES, default="thompson",
+                       help=AYUDA_CONSTRUCCION)
+    flujo.add_argument("--paquete", help="Paquete precompilado del que tomar el AFD (ver 'precompilar')")
+    flujo.set_defaults(funcion=comando_flujo)
+
+    lotes = comandos.add_parser("lotes", help="Evalúa una lista de palabras en varios procesos")
+    lotes.add_argument("alfabeto", help="Símbolos separados por comas, por ejemplo a,b,c")
+    lotes.add_argument("expresion", help="Expresión regular")
+    lotes.add_argument("archivo", nargs="?", default="-", help="Archivo con una palabra por línea (- para stdin)")
+    lotes.add_argument("--procesos", type=int, default=None, help="Procesos a usar (por defecto, uno por núcleo)")
+    lotes.add_argument("--fragmento", type=int, default=TAMANO_FRAGMENTO, help="Palabras por tarea")
+    lotes.add_argument("--salida", help="Archivo donde escribir 'palabra<TAB>0|1' por cada palabra")
+    lotes.add_argument("--codificacion", default="utf-8", help="Codificación del archivo")
+    lotes.add_argument("--minimizar", action="store_true", help="Minimiza el AFD antes de evaluar")
+    lotes.add_argument("--construccion", choices=CONSTRUCCIONES, default="thompson",
+                       help=AYUDA_CONSTRUCCION)
+    lotes.add_argument("--paquete", help="Paquete precompilado del que tomar el AFD (ver 'precompilar')")
+    lotes.set_defaults(funcion=comando_lotes)
+
+    buscar = comandos.add_parser("buscar", help="Busca coincidencias de una expresión dentro de cada línea")
+    buscar.add_argument("alfabeto", help="Símbolos separados por comas, por ejemplo a,b,c")
+    buscar.add_argument("expresion", help="Expresión regular")
+    buscar.add_argument("archivo", nargs="?", default="-", help="Archivo de entrada (- para stdin)")
+    buscar.add_argument("--solapadas", action="store_true",
+                        help="Informa la coincidencia más larga desde cada posición, aunque se solapen")
+    buscar.add_argument("--contar", action="store_true", help="Sólo muestra el número de coincidencias")
+    buscar.add_argument("--codificacion", default="utf-8", help="Codificación del archivo")
+    buscar.add_argument("--minimizar", action="store_true", help="Minimiza el AFD antes de buscar")
+    buscar.add_argument("--construccion", choices=CONSTRUCCIONES, default="thompson",
+                        help=AYUDA_CONSTRUCCION)
+    buscar.add_argument("--paquete", help="Paquete precompilado del que tomar el AFD (ver 'precompilar')")
+    buscar.set_defaults(funcion=comando_buscar)
+
+    clasificar = comandos.add_parser("clasificar", help="Clasifica palabras contra varias expresiones a la vez")
+    clasificar.add_argument("alfabeto", help="Símbolos separados por comas, por ejemplo a,b,c")
+    clasificar.add_argument("patrones", help="Archivo con una expresión por línea; su número de línea útil es el id")
+    clasificar.add_argument("archivo", nargs="?", default="-", help="Archivo con una palabra por línea (- para stdin)")
+    clasificar.add_argument("--primero", action="store_true",
+                            help="Sólo el primer patrón que acepta cada palabra, por orden en el archivo")
+    clasificar.add_argument("--codificacion", default="utf-8", help="Codificación de los archivos")
+    clasificar.add_argument("--minimizar", action="store_true", help="Minimiza el AFD combinado")
+    clasificar.set_defaults(funcion=comando_clasificar)
+
+    comparar = comandos.add_parser("comparar", help="Compara los lenguajes de dos expresiones",
+                                   description="Termina con 0 si la relación se cumple, 1 si no "
+                                               "(mostrando la palabra más corta que lo demuestra) y 2 "
+                                               "si alguna expresión no es válida.")
+    comparar.add_argument("alfabeto", help="Símbolos separados por comas, por ejemplo a,b,c")
+    comparar.add_argument("expresion1", help="Primera expresión regular")
+    comparar.add_argument("expresion2", help="Segunda expresión regular")
+    comparar.add_argument("--relacion", choices=["equivalentes", "incluida", "disjuntas"], default="equivalentes",
+                          help="Relación a comprobar; 'incluida' es la primera dentro de la segunda")
+    comparar.add_argument("--construccion", choices=CONSTRUCCIONES, default="thompson",
+                          help=AYUDA_CONSTRUCCION)
+    comparar.set_defaults(funcion=comando_comparar)
+
+    precompilar = comandos.add_parser("precompilar", help="Compila un archivo de expresiones en un paquete binario")
+    precompilar.add_argument("archivo", help="Una expresión por línea, o 'alfabeto<TAB>expresión'")
+    precompilar.add_argument("salida", help="Archivo del paquete a generar")
+    precompilar.add_argument("--alfabeto", help="Alfabeto de las líneas que no indican uno")
+    precompilar.add_argument("--codificacion", default="utf-8", help="Codificación del archivo")
+    precompilar.add_argument("--minimizar", action="store_true", help="Minimiza cada AFD antes de guardarlo")
+    precompilar.add_argument("--construccion", choices=CONSTRUCCIONES, default="thompson",
+                             help=AYUDA_CONSTRUCCION)
+    precompilar.set_defaults(funcion=comando_precompilar)
+
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    if args.comando is None:
+        modo_interactivo()
+        return 0
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
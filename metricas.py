@@ -0,0 +1,154 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Límites de los histogramas
+LIMITES_SEGUNDOS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+LIMITES_TAMANO = (10, 100, 1000, 10000, 100000, 1000000)
+LIMITES_BYTES = (10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7, 10 ** 8, 10 ** 9)
+
+# Un AFD se considera una explosión de estados si supera ambos umbrales
+MINIMO_ESTADOS_EXPLOSION = 1000
+FACTOR_EXPLOSION = 4  # Estados del AFD por cada estado del AFN
+
+def es_explosion(estados_afn, estados_afd):
+    """Indica si la determinización multiplicó desproporcionadamente los estados."""
+    return estados_afd >= MINIMO_ESTADOS_EXPLOSION and estados_afd > FACTOR_EXPLOSION * estados_afn
+
+def _etiquetas(etiquetas):
+    """Formatea las etiquetas de una serie como {clave="valor",...}."""
+    if not etiquetas:
+        return ""
+    partes = []
+    for clave, valor in etiquetas:
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        partes.append(f'{clave}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+class Histograma:
+    """Histograma acumulado al estilo de Prometheus."""
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.cuentas = [0] * len(limites)
+        self.suma = 0
+        self.total = 0
+
+    def observar(self, valor):
+        """Cuenta un valor en cada cubeta cuyo límite no supera."""
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.cuentas[i] += 1
+        self.suma += valor
+        self.total += 1
+
+class Metricas:
+    """Registro de métricas del servidor, exportado en el formato de texto de Prometheus."""
+
+    def __init__(self, prefijo="automatas"):
+        self.prefijo = prefijo
+        self._lock = threading.Lock()
+        self._histogramas = {}  # nombre -> {etiquetas: Histograma}
+        self._contadores = {}  # nombre -> {etiquetas: valor}
+        self._ayuda = {}  # nombre -> descripción
+        self._fuentes = []  # Funciones que dan valores calculados al exportar
+
+    def describir(self, nombre, ayuda):
+        """Registra la descripción de una métrica."""
+        self._ayuda[nombre] = ayuda
+
+    def observar(self, nombre, valor, limites=LIMITES_SEGUNDOS, **etiquetas):
+        """Agrega una observación al histograma de la métrica."""
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            series = self._histogramas.setdefault(nombre, {})
+            histograma = series.get(clave)
+            if histograma is None:
+                histograma = series[clave] = Histograma(limites)
+            histograma.observar(valor)
+
+    def incrementar(self, nombre, cantidad=1, **etiquetas):
+        """Incrementa un contador."""
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            series = self._contadores.setdefault(nombre, {})
+            series[clave] = series.get(clave, 0) + cantidad
+
+    def agregar_fuente(self, fuente):
+        """Registra una función que retorna tuplas (nombre, tipo, valor) a exportar."""
+        self._fuentes.append(fuente)
+
+    def exportar(self):
+        """Genera el texto de todas las métricas para /metrics."""
+        lineas = []
+
+        def encabezado(nombre, tipo):
+            completo = f"{self.prefijo}_{nombre}"
+            if nombre in self._ayuda:
+                lineas.append(f"# HELP {completo} {self._ayuda[nombre]}")
+            lineas.append(f"# TYPE {completo} {tipo}")
+            return completo
+
+        with self._lock:
+            for nombre, series in sorted(self._contadores.items()):
+                completo = encabezado(nombre, "counter")
+                for clave, valor in sorted(series.items()):
+                    lineas.append(f"{completo}_total{_etiquetas(clave)} {valor}")
+
+            for nombre, series in sorted(self._histogramas.items()):
+                completo = encabezado(nombre, "histogram")
+                for clave, histograma in sorted(series.items()):
+                    for limite, cuenta in zip(histograma.limites, histograma.cuentas):
+                        lineas.append(f"{completo}_bucket{_etiquetas(clave + (('le', limite),))} {cuenta}")
+                    lineas.append(f"{completo}_bucket{_etiquetas(clave + (('le', '+Inf'),))} {histograma.total}")
+                    lineas.append(f"{completo}_sum{_etiquetas(clave)} {histograma.suma}")
+                    lineas.append(f"{completo}_count{_etiquetas(clave)} {histograma.total}")
+
+        for fuente in self._fuentes:
+            for nombre, tipo, valor in fuente():
+                completo = encabezado(nombre, tipo)
+                lineas.append(f"{completo}{'_total' if tipo == 'counter' else ''} {valor}")
+
+        return "\n".join(lineas) + "\n"
+
+class Perfil:
+    """Tiempos, memoria y tamaños de cada etapa del pipeline en una petición."""
+
+    def __init__(self, metricas=None):
+        self.metricas = metricas
+        self.etapas = []  # Una entrada por etapa medida, en orden
+        self.tamanos = {}  # estados_afn, estados_afd, transiciones_afd, ...
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Mide el tiempo (y la memoria pico, si tracemalloc está activo) del bloque."""
+        # tracemalloc es global al proceso: con peticiones simultáneas el pico
+        # puede incluir memoria de otros hilos
+        memoria = tracemalloc.is_tracing()
+        if memoria:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            medida = {"etapa": nombre, "segundos": time.perf_counter() - inicio}
+            if memoria:
+                medida["memoria_pico"] = max(tracemalloc.get_traced_memory()[1] - base, 0)
+            self.etapas.append(medida)
+            if self.metricas is not None:
+                self.metricas.observar("etapa_segundos", medida["segundos"], etapa=nombre)
+                if memoria:
+                    self.metricas.observar("etapa_memoria_pico_bytes", medida["memoria_pico"],
+                                           LIMITES_BYTES, etapa=nombre)
+
+    def registrar_tamano(self, nombre, valor):
+        """Guarda el tamaño de un autómata (estados, transiciones) y lo agrega a las métricas."""
+        self.tamanos[nombre] = valor
+        if self.metricas is not None:
+            self.metricas.observar(nombre, valor, LIMITES_TAMANO)
+
+    def como_dict(self):
+        """Retorna el perfil como un diccionario serializable a JSON."""
+        return {"etapas": self.etapas, "tamanos": self.tamanos}
@@ -0,0 +1,125 @@
+from array import array
+from afd import AFD, AFDCompilado, compilar_afd, ordenar_estados
+
+def particion_hopcroft(compilado, clases=None):
+    """Calcula la partición de estados equivalentes con el algoritmo de Hopcroft."""
+    # clases[estado] separa los estados desde el principio; por defecto,
+    # finales y no finales
+    n = compilado.num_estados
+    k = compilado.num_simbolos
+    tabla = compilado.tabla
+
+    # Transiciones inversas: inversas[simbolo][destino] -> estados origen
+    inversas = [[[] for _ in range(n)] for _ in range(k)]
+    for origen in range(n):
+        fila = origen * k
+        for simbolo in range(k):
+            inversas[simbolo][tabla[fila + simbolo]].append(origen)
+
+    if clases is None:
+        clases = [compilado.finales[estado] for estado in range(n)]
+    grupos = {}
+    for estado in range(n):
+        grupos.setdefault(clases[estado], set()).add(estado)
+    bloques = list(grupos.values())
+    bloque_de = [0] * n
+    for i, bloque in enumerate(bloques):
+        for estado in bloque:
+            bloque_de[estado] = i
+
+    # Basta con refinar contra todos los bloques iniciales menos el más grande
+    mayor = max(range(len(bloques)), key=lambda i: len(bloques[i]))
+    pendientes = {(i, simbolo) for i in range(len(bloques)) if i != mayor for simbolo in range(k)}
+
+    while pendientes:
+        divisor, simbolo = pendientes.pop()
+        inversa = inversas[simbolo]
+
+        # Agrupar por bloque los estados que llegan al divisor con el símbolo
+        tocados = {}
+        for destino in bloques[divisor]:
+            for origen in inversa[destino]:
+                tocados.setdefault(bloque_de[origen], set()).add(origen)
+
+        for i, interseccion in tocados.items():
+            bloque = bloques[i]
+            if len(interseccion) == len(bloque):
+                continue
+
+            # El bloque original conserva su índice y el nuevo recibe la intersección
+            bloque -= interseccion
+            nuevo = len(bloques)
+            bloques.append(interseccion)
+            for estado in interseccion:
+                bloque_de[estado] = nuevo
+
+            for c in range(k):
+                if (i, c) in pendientes:
+                    pendientes.add((nuevo, c))
+                elif len(interseccion) <= len(bloque):
+                    pendientes.add((nuevo, c))
+                else:
+                    pendientes.add((i, c))
+
+    return bloques, bloque_de
+
+def minimizar_afd(afd):
+    """Construye el AFD mínimo equivalente fusionando estados indistinguibles."""
+    compilado = compilar_afd(afd)
+    bloques, bloque_de = particion_hopcroft(compilado)
+
+    # Cada estado del AFD mínimo es el conjunto de estados originales que agrupa
+    originales = ordenar_estados(afd)
+    if compilado.estado_trampa == len(originales):
+        originales.append(afd.estado_trampa)
+    nuevos_estados = [frozenset(originales[estado] for estado in bloque) for bloque in bloques]
+
+    minimo = AFD()
+    minimo.clases = afd.clases
+    minimo.estado_inicial = nuevos_estados[bloque_de[compilado.estado_inicial]]
+    minimo.estado_trampa = nuevos_estados[bloque_de[compilado.estado_trampa]]
+
+    # Se conserva el orden de descubrimiento para que los nombres sigan siendo estables
+    agregados = set()
+    for estado in range(compilado.num_estados):
+        nuevo = nuevos_estados[bloque_de[estado]]
+        if nuevo not in agregados:
+            agregados.add(nuevo)
+            minimo.estados.append(nuevo)
+        if compilado.finales[estado]:
+            minimo.estados_finales.add(nuevo)
+
+    k = compilado.num_simbolos
+    for i, bloque in enumerate(bloques):
+        representante = next(iter(bloque))
+        for c, simbolo in enumerate(compilado.alfabeto):
+            destino = compilado.tabla[representante * k + c]
+            minimo.transiciones[(nuevos_estados[i], simbolo)] = nuevos_estados[bloque_de[destino]]
+
+    return minimo
+
+def minimizar_compilado(compilado, clases=None):
+    """Minimiza un AFDCompilado; retorna el nuevo y el estado original que representa a cada estado nuevo."""
+    bloques, bloque_de = particion_hopcroft(compilado, clases)
+
+    # Los bloques se numeran en el orden de su primer estado, así el inicial sigue siendo el 0
+    numero = {}
+    representantes = []
+    for estado in range(compilado.num_estados):
+        if bloque_de[estado] not in numero:
+            numero[bloque_de[estado]] = len(representantes)
+            representantes.append(estado)
+
+    k = compilado.num_simbolos
+    tabla = array("i", [0]) * (len(representantes) * k)
+    finales = bytearray(len(representantes))
+    for nuevo, estado in enumerate(representantes):
+        for c in range(k):
+            tabla[nuevo * k + c] = numero[bloque_de[compilado.tabla[estado * k + c]]]
+        finales[nuevo] = compilado.finales[estado]
+
+    trampa = numero[bloque_de[compilado.estado_trampa]]
+    nombres = ["qT" if estado == trampa else f"q{estado}" for estado in range(len(representantes))]
+    minimo = AFDCompilado(list(compilado.alfabeto), tabla, numero[bloque_de[compilado.estado_inicial]],
+                          trampa, finales, nombres, compilado.clases)
+    return minimo, representantes
@@ -0,0 +1,109 @@
+import sys
+from afn import Estado, AFN
+from afd import convertir_afn_a_afd, compilar_afd, ordenar_estados
+from clases import agrupar_simbolos
+from expresion_regular import ErrorExpresion, a_postfijo
+from thompson import construir_afn_postfijo
+from minimizacion import minimizar_compilado
+from vectorizado import MINIMO_PALABRAS, np, obtener_simulador
+
+class ClasificadorCompilado:
+    """AFD combinado de varias expresiones; cada estado sabe qué patrones acepta."""
+
+    def __init__(self, patrones, alfabeto, afd, etiquetas):
+        self.patrones = patrones  # Expresiones; su posición es el id y la prioridad
+        self.alfabeto = alfabeto
+        self.afd = afd  # AFDCompilado de la unión de todos los patrones
+        self.etiquetas = etiquetas  # etiquetas[estado]: ids de los patrones que aceptan, ordenados
+
+    def clasificar(self, palabra):
+        """Retorna los ids de los patrones que aceptan la palabra."""
+        return self.etiquetas[self.afd.avanzar(self.afd.estado_inicial, palabra)]
+
+    def primero(self, palabra):
+        """Retorna el id del primer patrón que acepta la palabra, o None."""
+        ids = self.clasificar(palabra)
+        return ids[0] if ids else None
+
+    def clasificar_muchos(self, palabras, primero=False):
+        """Clasifica una colección de palabras con una sola pasada por palabra."""
+        etiquetas = self.etiquetas
+        if np is not None and len(palabras) >= MINIMO_PALABRAS:
+            estados = obtener_simulador(self.afd).estados_muchos(palabras).tolist()
+            if primero:
+                return [etiquetas[estado][0] if etiquetas[estado] else None for estado in estados]
+            return [etiquetas[estado] for estado in estados]
+
+        # Mismo ciclo que AFDCompilado.match_many, pero leyendo las etiquetas
+        afd = self.afd
+        tabla = afd.tabla
+        indice_simbolo = afd.indice_simbolo
+        k = afd.num_simbolos
+        trampa = afd.estado_trampa
+        inicial = afd.estado_inicial
+        resultados = []
+
+        for palabra in palabras:
+            estado = inicial
+            for simbolo in palabra:
+                indice = indice_simbolo.get(simbolo)
+                if indice is None:
+                    estado = trampa
+                    break
+                estado = tabla[estado * k + indice]
+                if estado == trampa:
+                    break
+            ids = etiquetas[estado]
+            if primero:
+                resultados.append(ids[0] if ids else None)
+            else:
+                resultados.append(ids)
+        return resultados
+
+def construir_clasificador(expresiones, alfabeto, minimizar=False):
+    """Compila varias expresiones en un solo AFD cuyos estados finales indican el patrón."""
+    if not expresiones:
+        raise ValueError("Se necesita al menos una expresión")
+
+    postfijos = []
+    for i, expresion in enumerate(expresiones):
+        try:
+            postfijos.append(a_postfijo(expresion, alfabeto))
+        except ErrorExpresion as e:
+            raise ErrorExpresion(f"Patrón {i}: {e.mensaje}", e.posicion, patron=i) from e
+
+    # Las clases de símbolos se calculan con todos los patrones a la vez, para
+    # que las columnas de la tabla sean las mismas para todos
+    postfijos, clases = agrupar_simbolos(postfijos, alfabeto)
+    afns = [construir_afn_postfijo(postfijo, set(clases)) for postfijo in postfijos]
+
+    # Un estado inicial nuevo con transiciones epsilon al inicio de cada patrón;
+    # el fin de cada AFN de Thompson identifica al patrón
+    inicio = Estado()
+    inicio.epsilon.extend(afn.inicio for afn in afns)
+    patron_de = {afn.fin: i for i, afn in enumerate(afns)}
+
+    afd = convertir_afn_a_afd(AFN(inicio, afns[0].fin, set(clases)))
+    afd.clases = clases
+    compilado = compilar_afd(afd)
+
+    # Las etiquetas siguen la numeración de compilar_afd; la trampa agregada no acepta nada
+    etiquetas = [tuple(sorted(patron_de[estado_afn] for estado_afn in estado if estado_afn in patron_de))
+                 for estado in ordenar_estados(afd)]
+    etiquetas.extend(() for _ in range(compilado.num_estados - len(etiquetas)))
+
+    # Sólo se fusionan estados que aceptan exactamente los mismos patrones
+    if minimizar:
+        compilado, representantes = minimizar_compilado(compilado, etiquetas)
+        etiquetas = [etiquetas[estado] for estado in representantes]
+
+    return ClasificadorCompilado(list(expresiones), alfabeto, compilado, etiquetas)
+
+def estimar_bytes_clasificador(clasificador):
+    """Estima la memoria que ocupa un ClasificadorCompilado."""
+    afd = clasificador.afd
+    total = len(afd.tabla) * afd.tabla.itemsize + len(afd.finales)
+    total += sum(sys.getsizeof(nombre) for nombre in afd.nombres)
+    total += sum(sys.getsizeof(ids) for ids in clasificador.etiquetas)
+    total += sum(sys.getsizeof(patron) for patron in clasificador.patrones)
+    return total
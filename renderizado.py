@@ -0,0 +1,113 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from afd import AFDCompilado, compilar_afd, dibujar_afd
+from metricas import Perfil
+
+def hash_afd(afd):
+    """Calcula un identificador estable del AFD a partir de su tabla compilada."""
+    compilado = afd if isinstance(afd, AFDCompilado) else compilar_afd(afd)
+    h = hashlib.sha256()
+    h.update("\x1f".join(compilado.alfabeto).encode())
+    h.update(b"\x00")
+    h.update("\x1f".join(compilado.nombres).encode())
+    h.update(b"\x00")
+    h.update(f"{compilado.estado_inicial},{compilado.estado_trampa}".encode())
+    h.update(compilado.tabla.tobytes())
+    h.update(bytes(compilado.finales))
+    return h.hexdigest()[:20]
+
+class RenderizadorAFD:
+    """Genera las imágenes de los AFDs en segundo plano, una por contenido."""
+
+    def __init__(self, directorio="static/afd", max_imagenes=256, max_trabajadores=2, metricas=None):
+        self.directorio = directorio
+        self.metricas = metricas  # Registra el tiempo de dibujar_afd si se indica
+        self.max_imagenes = max_imagenes
+        self._ejecutor = ThreadPoolExecutor(max_workers=max_trabajadores,
+                                            thread_name_prefix="renderizado-afd")
+        self._lock = threading.Lock()
+        self._pendientes = set()
+        self.errores = {}  # clave -> mensaje del último fallo
+
+    def ruta(self, clave):
+        """Ruta del archivo PNG para un AFD."""
+        return os.path.join(self.directorio, f"afd-{clave}.png")
+
+    def solicitar(self, afd, clave=None):
+        """Encola el dibujo del AFD si su imagen no existe y retorna su clave."""
+        if clave is None:
+            clave = hash_afd(afd)
+        ruta = self.ruta(clave)
+
+        with self._lock:
+            if clave in self._pendientes:
+                return clave
+            if os.path.exists(ruta):
+                # Marcar como usada recientemente para el desalojo
+                os.utime(ruta)
+                return clave
+            self.errores.pop(clave, None)
+            self._pendientes.add(clave)
+
+        self._ejecutor.submit(self._renderizar, afd, clave)
+        return clave
+
+    def _renderizar(self, afd, clave):
+        try:
+            with Perfil(self.metricas).etapa("dibujar_afd"):
+                dibujar_afd(afd, self.ruta(clave))
+            self.desalojar()
+        except Exception as e:
+            with self._lock:
+                self.errores[clave] = str(e)
+        finally:
+            with self._lock:
+                self._pendientes.discard(clave)
+
+    def estado(self, clave):
+        """Retorna 'listo', 'pendiente', 'error' o 'desconocido'."""
+        with self._lock:
+            if clave in self._pendientes:
+                return "pendiente"
+            if clave in self.errores:
+                return "error"
+        if os.path.exists(self.ruta(clave)):
+            return "listo"
+        return "desconocido"
+
+    def desalojar(self):
+        """Elimina las imágenes usadas hace más tiempo si se supera el límite."""
+        archivos = []
+        try:
+            with os.scandir(self.directorio) as entradas:
+                for entrada in entradas:
+                    if entrada.name.startswith("afd-") and entrada.name.endswith(".png"):
+                        archivos.append((entrada.stat().st_mtime, entrada.path))
+        except FileNotFoundError:
+            return
+
+        if len(archivos) <= self.max_imagenes:
+            return
+
+        archivos.sort()
+        for _, ruta in archivos[:len(archivos) - self.max_imagenes]:
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+
+    def esperar(self, clave, intervalo=0.05, limite=None):
+        """Bloquea hasta que la imagen deja de estar pendiente."""
+        inicio = time.monotonic()
+        while self.estado(clave) == "pendiente":
+            if limite is not None and time.monotonic() - inicio > limite:
+                break
+            time.sleep(intervalo)
+        return self.estado(clave)
+
+    def cerrar(self):
+        """Detiene el pool de trabajadores esperando los dibujos en curso."""
+        self._ejecutor.shutdown(wait=True)
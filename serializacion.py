@@ -0,0 +1,202 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from afd import AFDCompilado
+
+# Formato de un paquete (enteros en little endian salvo la tabla, que va en
+# el orden de bytes indicado en la cabecera):
+#
+#   cabecera: MAGIA, versión, orden de bytes, número de autómatas
+#   índice:   un desplazamiento de 8 bytes por autómata
+#   autómata: ENTRADA, clave, alfabeto, nombres, clases, relleno, tabla (int32), finales (un byte por estado)
+#
+# Cada tabla empieza en un múltiplo de 8 para poder verla sin copiarla. Las
+# clases (los símbolos de cada columna, en JSON) van vacías si cada columna es
+# un símbolo; los paquetes de la versión 1 no las tienen.
+MAGIA = b"AFDP"
+VERSION = 2
+CABECERA = struct.Struct("<4sHBxI")
+ENTRADA = struct.Struct("<IIiiIIII")  # estados, símbolos, inicial, trampa, bytes de clave, alfabeto, nombres y clases
+ENTRADA_V1 = struct.Struct("<IIiiIII")
+SEPARADOR = "\x00"
+ORDEN_BYTES = 0 if sys.byteorder == "little" else 1
+
+_paquetes_abiertos = {}  # ruta -> PaqueteAutomatas, para reutilizar el mapeo en el mismo proceso
+
+class NombresPredeterminados:
+    """Nombres q0, q1, ... y qT para el estado trampa, sin guardarlos uno por uno."""
+
+    def __init__(self, num_estados, estado_trampa):
+        self.num_estados = num_estados
+        self.estado_trampa = estado_trampa
+
+    def __len__(self):
+        return self.num_estados
+
+    def __getitem__(self, estado):
+        if not 0 <= estado < self.num_estados:
+            raise IndexError(estado)
+        return "qT" if estado == self.estado_trampa else f"q{estado}"
+
+    def __iter__(self):
+        return (self[estado] for estado in range(self.num_estados))
+
+def clave_paquete(alfabeto, expresion):
+    """Identifica una expresión dentro de un paquete, sin importar el orden del alfabeto."""
+    return ",".join(sorted(alfabeto)) + "\t" + expresion.strip()
+
+def nombres_predeterminados(compilado):
+    """Indica si los nombres de los estados son los que asigna compilar_afd por defecto."""
+    return list(compilado.nombres) == list(NombresPredeterminados(compilado.num_estados, compilado.estado_trampa))
+
+def _alinear(n, multiplo=8):
+    return (n + multiplo - 1) // multiplo * multiplo
+
+def serializar_afd(clave, compilado):
+    """Codifica un AFDCompilado como una entrada del paquete."""
+    clave_bytes = clave.encode("utf-8")
+    alfabeto_bytes = SEPARADOR.join(compilado.alfabeto).encode("utf-8")
+    nombres_bytes = b"" if nombres_predeterminados(compilado) else "\n".join(compilado.nombres).encode("utf-8")
+    clases_bytes = b""
+    if compilado.clases is not None:
+        clases_bytes = json.dumps([compilado.clases[etiqueta] for etiqueta in compilado.alfabeto]).encode("utf-8")
+
+    partes = [ENTRADA.pack(compilado.num_estados, compilado.num_simbolos, compilado.estado_inicial,
+                           compilado.estado_trampa, len(clave_bytes), len(alfabeto_bytes), len(nombres_bytes),
+                           len(clases_bytes)),
+              clave_bytes, alfabeto_bytes, nombres_bytes, clases_bytes]
+    tamano = sum(len(parte) for parte in partes)
+    partes.append(bytes(_alinear(tamano) - tamano))
+
+    tabla = compilado.tabla if isinstance(compilado.tabla, array) else array("i", compilado.tabla)
+    partes.append(tabla.tobytes())
+    partes.append(bytes(compilado.finales))
+    tamano = sum(len(parte) for parte in partes)
+    partes.append(bytes(_alinear(tamano) - tamano))
+    return b"".join(partes)
+
+def guardar_paquete(ruta, automatas):
+    """Escribe un paquete con los pares (clave, AFDCompilado) dados."""
+    entradas = [serializar_afd(clave, compilado) for clave, compilado in automatas]
+
+    desplazamiento = _alinear(CABECERA.size + 8 * len(entradas))
+    indice = []
+    for entrada in entradas:
+        indice.append(desplazamiento)
+        desplazamiento += len(entrada)
+
+    # Se escribe en un archivo temporal y se mueve, para que un proceso que
+    # mapee el paquete nunca vea uno a medio escribir
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as archivo:
+        archivo.write(CABECERA.pack(MAGIA, VERSION, ORDEN_BYTES, len(entradas)))
+        archivo.write(struct.pack(f"<{len(indice)}Q", *indice))
+        archivo.write(bytes(_alinear(archivo.tell()) - archivo.tell()))
+        for entrada in entradas:
+            archivo.write(entrada)
+    os.replace(temporal, ruta)
+
+class PaqueteAutomatas:
+    """Paquete de AFDs compilados mapeado en memoria; las tablas se leen sin copiarse."""
+
+    def __init__(self, ruta):
+        self.ruta = os.path.abspath(ruta)
+        with open(self.ruta, "rb") as archivo:
+            self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self._vista = memoryview(self._mapa)
+
+        if len(self._mapa) < CABECERA.size:
+            raise ValueError(f"{ruta} no es un paquete de autómatas")
+        magia, version, orden, cantidad = CABECERA.unpack_from(self._mapa, 0)
+        if magia != MAGIA:
+            raise ValueError(f"{ruta} no es un paquete de autómatas")
+        if version not in (1, VERSION):
+            raise ValueError(f"Versión de paquete no soportada: {version} (se esperaba {VERSION})")
+        self._mismo_orden = orden == ORDEN_BYTES
+        self._entrada = ENTRADA if version == VERSION else ENTRADA_V1
+
+        self._desplazamientos = {}  # clave -> desplazamiento de su entrada
+        for desplazamiento in struct.unpack_from(f"<{cantidad}Q", self._mapa, CABECERA.size):
+            campos = self._entrada.unpack_from(self._mapa, desplazamiento)
+            inicio = desplazamiento + self._entrada.size
+            clave = bytes(self._vista[inicio:inicio + campos[4]]).decode("utf-8")
+            self._desplazamientos[clave] = desplazamiento
+        self._automatas = {}  # Autómatas ya cargados
+
+    def __len__(self):
+        return len(self._desplazamientos)
+
+    def __contains__(self, clave):
+        return clave in self._desplazamientos
+
+    def claves(self):
+        """Retorna las claves de los autómatas del paquete, en el orden en que se guardaron."""
+        return list(self._desplazamientos)
+
+    def obtener(self, clave):
+        """Retorna el AFDCompilado guardado con la clave, o None si no está."""
+        compilado = self._automatas.get(clave)
+        if compilado is None and clave in self._desplazamientos:
+            compilado = self._cargar(self._desplazamientos[clave])
+            compilado.origen = (self.ruta, clave)
+            self._automatas[clave] = compilado
+        return compilado
+
+    def _cargar(self, desplazamiento):
+        """Arma el AFDCompilado de una entrada; la tabla y los finales apuntan al mapeo."""
+        campos = self._entrada.unpack_from(self._mapa, desplazamiento)
+        num_estados, num_simbolos, inicial, trampa, bytes_clave, bytes_alfabeto, bytes_nombres = campos[:7]
+        bytes_clases = campos[7] if len(campos) > 7 else 0
+        posicion = desplazamiento + self._entrada.size + bytes_clave
+
+        texto = bytes(self._vista[posicion:posicion + bytes_alfabeto]).decode("utf-8")
+        alfabeto = texto.split(SEPARADOR) if num_simbolos else []
+        posicion += bytes_alfabeto
+
+        if bytes_nombres:
+            nombres = bytes(self._vista[posicion:posicion + bytes_nombres]).decode("utf-8").split("\n")
+        else:
+            nombres = NombresPredeterminados(num_estados, trampa)
+        posicion += bytes_nombres
+
+        clases = None
+        if bytes_clases:
+            miembros = json.loads(bytes(self._vista[posicion:posicion + bytes_clases]).decode("utf-8"))
+            clases = {etiqueta: tuple(simbolos) for etiqueta, simbolos in zip(alfabeto, miembros)}
+        posicion = _alinear(posicion + bytes_clases)
+
+        celdas = num_estados * num_simbolos
+        if self._mismo_orden:
+            tabla = self._vista[posicion:posicion + 4 * celdas].cast("i")
+        else:
+            # Paquete generado en una máquina con el otro orden de bytes: hay que copiar
+            tabla = array("i", self._vista[posicion:posicion + 4 * celdas].tobytes())
+            tabla.byteswap()
+        posicion += 4 * celdas
+        finales = self._vista[posicion:posicion + num_estados]
+
+        return AFDCompilado(alfabeto, tabla, inicial, trampa, finales, nombres, clases)
+
+    def cerrar(self):
+        """Libera el mapeo; lanza BufferError si todavía se usan autómatas obtenidos del paquete."""
+        _paquetes_abiertos.pop(self.ruta, None)
+        self._automatas.clear()
+        self._vista.release()
+        self._mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
+
+def cargar_paquete(ruta):
+    """Mapea un paquete de autómatas; si ya está abierto en este proceso se reutiliza."""
+    ruta = os.path.abspath(ruta)
+    paquete = _paquetes_abiertos.get(ruta)
+    if paquete is None:
+        paquete = _paquetes_abiertos[ruta] = PaqueteAutomatas(ruta)
+    return paquete
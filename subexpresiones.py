@@ -0,0 +1,251 @@
+import threading
+import weakref
+from array import array
+from collections import deque
+from afn import AFNCompacto
+
+RAICES_RECIENTES = 64  # Expresiones cuyas subexpresiones se conservan aunque nadie más las use
+MAX_ESTADOS_FRAGMENTO = 2048  # Fragmentos más grandes se arman cada vez a partir de los de sus hijos
+
+class Subexpresion:
+    """Subexpresión única: dos subexpresiones iguales son el mismo objeto, y nunca se modifica."""
+
+    # Además de la estructura, cada subexpresión guarda los datos de su fragmento
+    # de Thompson en numeración local, que no dependen de dónde aparezca:
+    #   tamano: estados del fragmento, numerados como en construir_afn_compacto_postfijo
+    #   inicio, fin: números locales de sus estados inicial y final
+    #   entrada: máscara local de la cerradura epsilon del inicio dentro del fragmento
+    #   llega_fin: si esa cerradura incluye el fin (la subexpresión acepta la palabra vacía)
+    #   fragmento: el Fragmento ya armado, si se guardó (ver preparar_fragmentos)
+    __slots__ = ("tipo", "simbolo", "hijos", "id", "tamano", "inicio", "fin", "entrada", "llega_fin",
+                 "fragmento", "__weakref__")
+
+    def __init__(self, tipo, simbolo, hijos, identificador):
+        self.tipo = tipo  # "simbolo", ".", "|" o "*", como en Nodo
+        self.simbolo = simbolo
+        self.hijos = hijos
+        self.id = identificador
+        self.fragmento = None
+
+        if tipo == "simbolo":
+            self.tamano, self.inicio, self.fin = 2, 0, 1
+            self.entrada, self.llega_fin = 1, False
+        elif tipo == ".":
+            a, b = hijos
+            self.tamano = a.tamano + b.tamano
+            self.inicio, self.fin = a.inicio, a.tamano + b.fin
+            self.entrada = a.entrada | (b.entrada << a.tamano if a.llega_fin else 0)
+            self.llega_fin = a.llega_fin and b.llega_fin
+        elif tipo == "|":
+            a, b = hijos
+            self.tamano = a.tamano + b.tamano + 2
+            self.inicio, self.fin = self.tamano - 2, self.tamano - 1
+            self.llega_fin = a.llega_fin or b.llega_fin
+            self.entrada = (1 << self.inicio | a.entrada | b.entrada << a.tamano |
+                            (1 << self.fin if self.llega_fin else 0))
+        else:  # Estrella de Kleene
+            a, = hijos
+            self.tamano = a.tamano + 2
+            self.inicio, self.fin = self.tamano - 2, self.tamano - 1
+            self.entrada = 1 << self.inicio | a.entrada | 1 << self.fin
+            self.llega_fin = True
+
+    def __repr__(self):
+        if self.tipo == "simbolo":
+            return f"Subexpresion({self.simbolo!r})"
+        return f"Subexpresion({self.tipo!r}, id={self.id}, estados={self.tamano})"
+
+class TablaSubexpresiones:
+    """Consigna las subexpresiones por estructura, para compartirlas entre expresiones parecidas."""
+
+    def __init__(self, raices_recientes=RAICES_RECIENTES):
+        # Los hijos ya son únicos, así que basta su id para comparar la estructura
+        self._nodos = weakref.WeakValueDictionary()  # (tipo, símbolo, ids de hijos) -> Subexpresion
+        self._siguiente_id = 0
+        self._raices = deque(maxlen=raices_recientes)
+        self._lock = threading.RLock()  # La tabla se comparte entre los hilos del servidor
+        self.creados = 0
+        self.reutilizados = 0
+
+    def __len__(self):
+        return len(self._nodos)
+
+    def nodo(self, tipo, simbolo=None, hijos=()):
+        """Retorna la subexpresión única con esa estructura, creándola si no existe."""
+        clave = (tipo, simbolo, tuple(hijo.id for hijo in hijos))
+        with self._lock:
+            nodo = self._nodos.get(clave)
+            if nodo is None:
+                nodo = Subexpresion(tipo, simbolo, tuple(hijos), self._siguiente_id)
+                self._siguiente_id += 1
+                self._nodos[clave] = nodo
+                self.creados += 1
+            else:
+                self.reutilizados += 1
+            return nodo
+
+    def desde_postfijo(self, postfijo):
+        """Construye la subexpresión de una expresión en notación postfija."""
+        pila = []
+        with self._lock:
+            for c in postfijo:
+                if c not in {"*", ".", "|"}:  # Si es un símbolo del alfabeto
+                    pila.append(self.nodo("simbolo", c))
+                elif c == "*":
+                    pila.append(self.nodo("*", hijos=(pila.pop(),)))
+                else:
+                    b = pila.pop()
+                    a = pila.pop()
+                    pila.append(self.nodo(c, hijos=(a, b)))
+
+            # Las raíces recientes mantienen vivas sus subexpresiones para la próxima edición
+            self._raices.append(pila[0])
+        return pila[0]
+
+class Fragmento:
+    """Fragmento de Thompson de una subexpresión ya armado, que se copia tal cual donde aparezca."""
+
+    # Las transiciones epsilon se guardan relativas al estado de origen (0 si
+    # no hay), así que el fragmento no depende de su posición y se copia por
+    # tajadas. Las cerraduras están en numeración local y sin la salida del
+    # fragmento, que se agrega al copiarlas a los estados que llegan al fin.
+    # La transición por símbolo de un estado va siempre al estado siguiente.
+    __slots__ = ("simbolos", "epsilon1", "epsilon2", "cerraduras")
+
+    def __init__(self, simbolos, epsilon1, epsilon2, cerraduras):
+        self.simbolos = simbolos  # Símbolo de la transición de cada estado, o None
+        self.epsilon1 = epsilon1
+        self.epsilon2 = epsilon2
+        self.cerraduras = cerraduras  # None si no se pidieron
+
+def armar_fragmento(raiz, con_cerraduras=True):
+    """Arma el fragmento de Thompson de una subexpresión copiando los fragmentos ya guardados."""
+    # Se recorre el árbol de arriba hacia abajo con (subexpresión, desplazamiento,
+    # cerradura de la salida, destinos epsilon del fin). En Thompson un fragmento
+    # sólo se conecta con el resto a través de su fin, así que la cerradura de
+    # cualquier estado es su parte local más, si llega al fin, la cerradura de
+    # la salida: cada estado se resuelve con unas pocas operaciones de bits.
+    # Cada máscara es tan ancha como el número de su estado, así que sin
+    # con_cerraduras no se calcula ninguna y el armado queda lineal.
+    tamano = raiz.tamano
+    simbolos = [None] * tamano
+    epsilon1 = array("i", bytes(4 * tamano))
+    epsilon2 = array("i", bytes(4 * tamano))
+    cerraduras = [0] * tamano if con_cerraduras else None
+    pila = [(raiz, 0, 0, ())]
+    while pila:
+        nodo, desplazamiento, salida, aristas_fin = pila.pop()
+        fragmento = nodo.fragmento
+        if fragmento is not None:
+            fin = desplazamiento + nodo.fin
+            hasta = desplazamiento + nodo.tamano
+            simbolos[desplazamiento:hasta] = fragmento.simbolos
+            epsilon1[desplazamiento:hasta] = fragmento.epsilon1
+            epsilon2[desplazamiento:hasta] = fragmento.epsilon2
+            if con_cerraduras:
+                bit_fin = 1 << nodo.fin
+                cerraduras[desplazamiento:hasta] = [mascara << desplazamiento | salida if mascara & bit_fin
+                                                    else mascara << desplazamiento
+                                                    for mascara in fragmento.cerraduras]
+        elif nodo.tipo == "simbolo":
+            fin = desplazamiento + 1
+            simbolos[desplazamiento] = nodo.simbolo
+            if con_cerraduras:
+                cerraduras[desplazamiento] = 1 << desplazamiento
+                cerraduras[fin] = 1 << fin | salida
+        elif nodo.tipo == ".":
+            # El fin de la concatenación es el de b, que recibe las aristas del fin
+            a, b = nodo.hijos
+            inicio_b = desplazamiento + a.tamano + b.inicio
+            entrada_b = 0
+            if con_cerraduras:
+                entrada_b = b.entrada << desplazamiento + a.tamano | (salida if b.llega_fin else 0)
+            pila.append((a, desplazamiento, entrada_b, (inicio_b,)))
+            pila.append((b, desplazamiento + a.tamano, salida, aristas_fin))
+            continue
+        elif nodo.tipo == "|":
+            a, b = nodo.hijos
+            inicio = desplazamiento + nodo.inicio
+            fin = desplazamiento + nodo.fin
+            inicio_a = desplazamiento + a.inicio
+            inicio_b = desplazamiento + a.tamano + b.inicio
+            epsilon1[inicio] = inicio_a - inicio
+            epsilon2[inicio] = inicio_b - inicio
+            cerradura_fin = 0
+            if con_cerraduras:
+                cerradura_fin = 1 << fin | salida
+                cerraduras[fin] = cerradura_fin
+                cerraduras[inicio] = (
+                    1 << inicio
+                    | a.entrada << desplazamiento | (cerradura_fin if a.llega_fin else 0)
+                    | b.entrada << desplazamiento + a.tamano | (cerradura_fin if b.llega_fin else 0))
+            pila.append((a, desplazamiento, cerradura_fin, (fin,)))
+            pila.append((b, desplazamiento + a.tamano, cerradura_fin, (fin,)))
+        else:  # Estrella: el fin del operando vuelve a su inicio y sale por el fin
+            a, = nodo.hijos
+            inicio = desplazamiento + nodo.inicio
+            fin = desplazamiento + nodo.fin
+            inicio_a = desplazamiento + a.inicio
+            epsilon1[inicio] = inicio_a - inicio
+            epsilon2[inicio] = fin - inicio
+            salida_a = 0
+            if con_cerraduras:
+                cerradura_fin = 1 << fin | salida
+                cerraduras[fin] = cerradura_fin
+                salida_a = a.entrada << desplazamiento | cerradura_fin
+                cerraduras[inicio] = 1 << inicio | salida_a
+            pila.append((a, desplazamiento, salida_a, (inicio_a, fin)))
+
+        # El fin de un fragmento no tiene transiciones propias: recibe las del contexto
+        if aristas_fin:
+            epsilon1[fin] = aristas_fin[0] - fin
+            if len(aristas_fin) > 1:
+                epsilon2[fin] = aristas_fin[1] - fin
+    return Fragmento(simbolos, epsilon1, epsilon2, cerraduras)
+
+def preparar_fragmentos(raiz):
+    """Arma y guarda los fragmentos que faltan en la raíz y en los operandos de la subexpresión."""
+    # Se guardan los fragmentos de la raíz y de cada operando que no es del
+    # mismo tipo que su padre (una rama de una unión, un factor de una
+    # concatenación, el operando de una estrella). Al editar una rama de una
+    # unión grande, las demás ramas se copian de su fragmento. Las cadenas de
+    # uniones o de concatenaciones se arman dentro del fragmento de arriba, y
+    # los fragmentos muy grandes no se guardan, porque sus cerraduras ocupan
+    # memoria cuadrática en su tamaño.
+    orden = []
+    pila = [(raiz, None)]
+    while pila:
+        nodo, padre = pila.pop()
+        if nodo.fragmento is not None or nodo.tipo == "simbolo":
+            continue
+        if (padre is None or nodo.tipo != padre.tipo or padre.tipo == "*") and nodo.tamano <= MAX_ESTADOS_FRAGMENTO:
+            orden.append(nodo)
+        pila.extend((hijo, nodo) for hijo in nodo.hijos)
+
+    # En preorden los operandos quedan después de quien los contiene: al revés,
+    # cada fragmento se arma con los de sus operandos ya guardados
+    for nodo in reversed(orden):
+        if nodo.fragmento is None:
+            nodo.fragmento = armar_fragmento(nodo)
+
+def construir_afn_subexpresion(raiz, alfabeto, con_cerraduras=False):
+    """Construye el AFNCompacto de Thompson de una subexpresión, con las cerraduras si se piden."""
+    # La numeración es la de construir_afn_compacto_postfijo. Las cerraduras
+    # sólo sirven para la construcción por subconjuntos; el listado no las usa.
+    preparar_fragmentos(raiz)
+    fragmento = raiz.fragmento
+    if fragmento is None:
+        fragmento = armar_fragmento(raiz, con_cerraduras)
+
+    afn = AFNCompacto(alfabeto)
+    afn.simbolos = sorted({simbolo for simbolo in fragmento.simbolos if simbolo is not None})
+    afn.indice_simbolo = {simbolo: i for i, simbolo in enumerate(afn.simbolos)}
+    indice_simbolo = afn.indice_simbolo
+    afn.simbolo = array("i", [indice_simbolo.get(simbolo, -1) for simbolo in fragmento.simbolos])
+    afn.destino = array("i", [-1 if simbolo is None else q + 1 for q, simbolo in enumerate(fragmento.simbolos)])
+    afn.epsilon1 = array("i", [q + d if d else -1 for q, d in enumerate(fragmento.epsilon1)])
+    afn.epsilon2 = array("i", [q + d if d else -1 for q, d in enumerate(fragmento.epsilon2)])
+    afn.inicio, afn.fin = raiz.inicio, raiz.fin
+    if con_cerraduras:
+        afn.cerraduras = list(fragmento.cerraduras)
+    return afn
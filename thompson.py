@@ -1,41 +1,49 @@
-from afn import Estado, AFN
+from afn import Estado, AFN, AFNCompacto, RecorridoAFN
 
-def crear_afn_simbolo(simbolo):
+def crear_afn_simbolo(simbolo, alfabeto):
     """Crea un AFN para un símbolo individual."""
     inicio = Estado()
     fin = Estado()
     inicio.transiciones[simbolo] = [fin]
-    return AFN(inicio, fin)
+    return AFN(inicio, fin, alfabeto)
 
 def concatenacion(afn1, afn2):
     """Concatena dos AFNs."""
+    # El fin del primer fragmento deja de ser de aceptación al enlazarlo
+    afn1.fin.es_final = False
     afn1.fin.epsilon.append(afn2.inicio)
-    return AFN(afn1.inicio, afn2.fin)
+    return AFN(afn1.inicio, afn2.fin, afn1.alfabeto)
 
 def union(afn1, afn2):
     """Realiza la unión de dos AFNs."""
     inicio = Estado()
     fin = Estado()
+    afn1.fin.es_final = False
+    afn2.fin.es_final = False
     inicio.epsilon.extend([afn1.inicio, afn2.inicio])
     afn1.fin.epsilon.append(fin)
     afn2.fin.epsilon.append(fin)
-    return AFN(inicio, fin)
+    return AFN(inicio, fin, afn1.alfabeto)
 
 def estrella(afn):
     """Aplica la estrella de Kleene a un AFN."""
     inicio = Estado()
     fin = Estado()
+    afn.fin.es_final = False
     inicio.epsilon.extend([afn.inicio, fin])
     afn.fin.epsilon.extend([afn.inicio, fin])
-    return AFN(inicio, fin)
+    return AFN(inicio, fin, afn.alfabeto)
 
-def construir_afn_postfijo(postfijo):
+def construir_afn_postfijo(postfijo, alfabeto, compacto=False):
     """Construye un AFN a partir de una expresión regular en notación postfija."""
+    if compacto:
+        return construir_afn_compacto_postfijo(postfijo, alfabeto)
+
     pila = []
 
     for c in postfijo:
         if c not in {"*", ".", "|"}:  # Si es un símbolo del alfabeto
-            pila.append(crear_afn_simbolo(c))
+            pila.append(crear_afn_simbolo(c, alfabeto))
         elif c == "*":  # Estrella de Kleene
             afn = pila.pop()
             pila.append(estrella(afn))
@@ -50,32 +58,59 @@ def construir_afn_postfijo(postfijo):
 
     return pila[0]
 
+def construir_afn_compacto_postfijo(postfijo, alfabeto):
+    """Construye un AFNCompacto con las mismas reglas de Thompson, sin objetos Estado."""
+    afn = AFNCompacto(alfabeto)
+    pila = []  # Fragmentos como pares (inicio, fin)
+
+    for c in postfijo:
+        if c not in {"*", ".", "|"}:  # Si es un símbolo del alfabeto
+            inicio = afn.nuevo_estado()
+            fin = afn.nuevo_estado()
+            afn.agregar_transicion(inicio, c, fin)
+            pila.append((inicio, fin))
+        elif c == "*":  # Estrella de Kleene
+            inicio1, fin1 = pila.pop()
+            inicio = afn.nuevo_estado()
+            fin = afn.nuevo_estado()
+            afn.agregar_epsilon(inicio, inicio1)
+            afn.agregar_epsilon(inicio, fin)
+            afn.agregar_epsilon(fin1, inicio1)
+            afn.agregar_epsilon(fin1, fin)
+            pila.append((inicio, fin))
+        elif c == ".":  # Concatenación
+            inicio2, fin2 = pila.pop()
+            inicio1, fin1 = pila.pop()
+            afn.agregar_epsilon(fin1, inicio2)
+            pila.append((inicio1, fin2))
+        elif c == "|":  # Unión
+            inicio2, fin2 = pila.pop()
+            inicio1, fin1 = pila.pop()
+            inicio = afn.nuevo_estado()
+            fin = afn.nuevo_estado()
+            afn.agregar_epsilon(inicio, inicio1)
+            afn.agregar_epsilon(inicio, inicio2)
+            afn.agregar_epsilon(fin1, fin)
+            afn.agregar_epsilon(fin2, fin)
+            pila.append((inicio, fin))
+
+    afn.inicio, afn.fin = pila[0]
+    return afn
+
 def eliminar_estados_vacios(afn):
     """Elimina los estados vacíos del AFN."""
     visitados = set()
     transiciones_utiles = set()
 
-    def recorrer(estado):
-        """Recorre el AFN y marca los estados útiles."""
-        if estado in visitados:
-            return
+    # Recorre el AFN desde el estado inicial y marca los estados útiles
+    for _, estado, _ in RecorridoAFN(afn):
         visitados.add(estado)
-        for simbolo, destinos in estado.transiciones.items():
-            for destino in destinos:
-                transiciones_utiles.add(destino)
-                recorrer(destino)
-        for destino in estado.epsilon:
-            transiciones_utiles.add(destino)
-            recorrer(destino)
-
-    # Recorre el AFN desde el estado inicial
-    recorrer(afn.inicio)
+        for destinos in estado.transiciones.values():
+            transiciones_utiles.update(destinos)
+        transiciones_utiles.update(estado.epsilon)
 
     # Elimina los estados que no están en las transiciones útiles
-    def limpiar(estado):
+    for estado in visitados:
         if estado not in transiciones_utiles:
             estado.transiciones.clear()
             estado.epsilon.clear()
-
-    for estado in visitados:
-        limpiar(estado)
\ No newline at end of file
@@ -0,0 +1,168 @@
+import weakref
+
+# NumPy es opcional: sin él, evaluar_muchos usa AFDCompilado.match_many
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAY_NUMPY = np is not None
+MINIMO_PALABRAS = 256  # Con menos palabras no compensa preparar los arreglos
+MINIMO_ACTIVAS = 16  # Cuando quedan menos palabras sin terminar se siguen una por una
+MAXIMO_PUNTO_TABLA = 1 << 16  # Alfabetos con puntos de código menores se traducen con una tabla
+SEPARADOR = "\n"
+
+_simuladores = weakref.WeakKeyDictionary()  # AFDCompilado -> SimuladorVectorizado
+
+class SimuladorVectorizado:
+    """Avanza muchas palabras a la vez por la tabla de un AFDCompilado usando NumPy."""
+
+    def __init__(self, compilado):
+        if np is None:
+            raise RuntimeError("SimuladorVectorizado requiere NumPy")
+        # No se guarda el autómata: el caché de simuladores lo referencia débilmente
+        self.estado_inicial = compilado.estado_inicial
+        self.estado_trampa = compilado.estado_trampa
+        self.indice_simbolo = compilado.indice_simbolo
+        n = compilado.num_estados
+        k = compilado.num_simbolos
+
+        # Una columna extra para los símbolos fuera del alfabeto, que llevan a la trampa
+        self.columnas = k + 1
+        matriz = np.empty((n, k + 1), dtype=np.int32)
+        matriz[:, :k] = np.frombuffer(compilado.tabla, dtype=np.int32).reshape(n, k)
+        matriz[:, k] = compilado.estado_trampa
+        self.matriz = matriz.ravel()
+        self._lista = None  # La misma matriz como lista, para las palabras que se siguen una por una
+        self.finales = np.frombuffer(compilado.finales, dtype=np.uint8).astype(bool)
+
+        # Si todos los símbolos son caracteres, las palabras se codifican sin
+        # recorrerlas en Python: cada punto de código se traduce a su columna (la
+        # de su clase, si el AFD va por clases) con una tabla, o con búsqueda
+        # binaria si los puntos de código son muy altos
+        self.puntos = None
+        self.columnas_puntos = None
+        self.columna_punto = None
+        if all(len(simbolo) == 1 for simbolo in self.indice_simbolo):
+            simbolos = sorted(self.indice_simbolo)
+            self.puntos = np.array([ord(simbolo) for simbolo in simbolos], dtype=np.uint32)
+            self.columnas_puntos = np.array([self.indice_simbolo[simbolo] for simbolo in simbolos], dtype=np.int32)
+            if not simbolos or self.puntos[-1] < MAXIMO_PUNTO_TABLA:
+                self.columna_punto = np.full(int(self.puntos[-1]) + 2 if simbolos else 1, k, dtype=np.int32)
+                self.columna_punto[self.puntos] = self.columnas_puntos
+
+    def _columnas_texto(self, texto):
+        """Traduce un arreglo de puntos de código a columnas de la matriz."""
+        if self.columna_punto is not None:
+            return self.columna_punto[np.minimum(texto, len(self.columna_punto) - 1)]
+        posiciones = np.minimum(np.searchsorted(self.puntos, texto), len(self.puntos) - 1)
+        codigos = self.columnas_puntos[posiciones]
+        codigos[self.puntos[posiciones] != texto] = self.columnas - 1
+        return codigos
+
+    def codificar(self, palabras):
+        """Convierte las palabras en un arreglo plano de columnas; retorna (códigos, inicios, longitudes)."""
+        if self.puntos is not None:
+            # Las palabras se unen con un salto de línea, que no aparece en
+            # palabras leídas por líneas; sus posiciones dan las longitudes sin
+            # recorrer la lista. Si alguna palabra lo contiene, se miden una por una.
+            try:
+                unido = SEPARADOR.join(palabras)
+            except TypeError:  # Palabras dadas como listas de símbolos
+                unido = None
+            if unido is not None:
+                texto = np.frombuffer(unido.encode("utf-32-le"), dtype=np.uint32)
+                if unido.count(SEPARADOR) == len(palabras) - 1:
+                    fines = np.append(np.flatnonzero(texto == ord(SEPARADOR)), len(texto))
+                    inicios = np.empty(len(palabras), dtype=np.intp)
+                    inicios[0] = 0
+                    inicios[1:] = fines[:-1] + 1
+                    return self._columnas_texto(texto), inicios, fines - inicios
+                longitudes = np.array([len(palabra) for palabra in palabras], dtype=np.intp)
+                inicios = np.zeros(len(palabras), dtype=np.intp)
+                np.cumsum(longitudes[:-1] + 1, out=inicios[1:])
+                return self._columnas_texto(texto), inicios, longitudes
+
+        longitudes = np.array([len(palabra) for palabra in palabras], dtype=np.intp)
+        inicios = np.zeros(len(palabras), dtype=np.intp)
+        np.cumsum(longitudes[:-1], out=inicios[1:])
+        indice_simbolo = self.indice_simbolo
+        k = self.columnas - 1
+        codigos = np.fromiter((indice_simbolo.get(simbolo, k) for palabra in palabras for simbolo in palabra),
+                              dtype=np.int32, count=int(longitudes.sum()))
+        return codigos, inicios, longitudes
+
+    def estados_muchos(self, palabras):
+        """Retorna un arreglo con el estado en que termina cada palabra."""
+        palabras = palabras if isinstance(palabras, list) else list(palabras)
+        if not palabras:
+            return np.empty(0, dtype=np.int32)
+        codigos, inicios, longitudes = self.codificar(palabras)
+
+        # Las palabras se ordenan de la más larga a la más corta: en el paso j
+        # sólo avanzan las primeras, sin necesidad de relleno. Con longitudes
+        # de 16 bits NumPy ordena por radix, que es lineal.
+        maximo = int(longitudes.max())
+        inversas = maximo - longitudes
+        orden = np.argsort(inversas.astype(np.uint16) if maximo < 1 << 16 else inversas, kind="stable")
+        ascendentes = longitudes[orden][::-1]
+        # Con índices de 32 bits cada paso mueve la mitad de memoria
+        tipo = np.int32 if len(codigos) < 1 << 31 else np.intp
+        posiciones = inicios[orden].astype(tipo)
+        estados = np.full(len(palabras), self.estado_inicial, dtype=tipo)
+        indices = np.empty(len(palabras), dtype=tipo)
+        leidos = np.empty(len(palabras), dtype=tipo)
+        trampa = self.estado_trampa
+        matriz = self.matriz
+        columnas = self.columnas
+
+        j = 0
+        activas = len(palabras) - int(np.searchsorted(ascendentes, 0, side="right"))
+        while activas >= MINIMO_ACTIVAS:
+            vivos = estados[:activas]
+            np.add(posiciones[:activas], j, out=indices[:activas])
+            np.take(codigos, indices[:activas], out=leidos[:activas])
+            np.multiply(vivos, columnas, out=indices[:activas])
+            indices[:activas] += leidos[:activas]
+            np.take(matriz, indices[:activas], out=vivos)
+            # Si todas las palabras que siguen activas cayeron en la trampa ya no cambian
+            if (vivos == trampa).all():
+                break
+            j += 1
+            activas = len(palabras) - int(np.searchsorted(ascendentes, j, side="right"))
+        else:
+            # Las pocas palabras largas que quedan se terminan con el ciclo de siempre
+            if activas and self._lista is None:
+                self._lista = matriz.tolist()
+            transiciones = self._lista
+            for i in range(activas):
+                estado = int(estados[i])
+                fin = posiciones[i] + ascendentes[len(palabras) - 1 - i]
+                for codigo in codigos[posiciones[i] + j:fin].tolist():
+                    if estado == trampa:
+                        break
+                    estado = transiciones[estado * columnas + codigo]
+                estados[i] = estado
+
+        resultado = np.empty_like(estados)
+        resultado[orden] = estados
+        return resultado
+
+    def match_many(self, palabras):
+        """Evalúa una colección de palabras y retorna una lista de booleanos."""
+        if not len(palabras):
+            return []
+        return self.finales[self.estados_muchos(palabras)].tolist()
+
+def obtener_simulador(compilado):
+    """Retorna el SimuladorVectorizado del autómata, creándolo la primera vez."""
+    simulador = _simuladores.get(compilado)
+    if simulador is None:
+        simulador = _simuladores[compilado] = SimuladorVectorizado(compilado)
+    return simulador
+
+def evaluar_muchos(compilado, palabras):
+    """Evalúa las palabras con NumPy si está disponible y el lote es grande; si no, con match_many."""
+    if np is None or len(palabras) < MINIMO_PALABRAS:
+        return compilado.match_many(palabras)
+    return obtener_simulador(compilado).match_many(palabras)